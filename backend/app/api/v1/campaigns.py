@@ -0,0 +1,185 @@
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, Header
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime, time, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import json
+
+from app.config import settings
+from app.database import get_db
+from app.models.campaign import Campaign
+from app.services.sender_pool import get_sender_pool
+from app.utils.file_handlers import ExcelProcessor
+from app.utils.idempotency import run_idempotent, upload_digest
+from app.utils.templating import MessageTemplate
+
+router = APIRouter()
+
+CHANNELS = ("whatsapp", "sms")
+
+# Pydantic models
+class CampaignResponse(BaseModel):
+    id: int
+    name: str
+    channel: str
+    message: str
+    status: str  # scheduled/running/outside_window/completed/cancelled/failed
+    start_at: str  # UTC
+    window_start: Optional[str]
+    window_end: Optional[str]
+    timezone: str
+    max_rate_per_second: Optional[float]
+    total_recipients: int
+    sent: int
+    failed: int
+    remaining: int
+    invalid_numbers: List[str]
+    last_error: Optional[str]
+    created_at: str
+    started_at: Optional[str]
+    finished_at: Optional[str]
+
+class CampaignListResponse(BaseModel):
+    total: int
+    campaigns: List[CampaignResponse]
+
+@router.post("/create", response_model=CampaignResponse)
+async def create_campaign(
+    file: UploadFile = File(..., description="Excel file with mobile numbers"),
+    name: str = Form(..., description="Campaign name"),
+    channel: str = Form(..., description="whatsapp or sms"),
+    message: str = Form(..., description="Message to send. May contain {placeholders} filled from other columns"),
+    column_name: str = Form(default="mobile", description="Column name containing mobile numbers"),
+    start_at: Optional[datetime] = Form(default=None, description="When to start (ISO 8601; without an offset it is read in `timezone`). Defaults to now"),
+    window_start: Optional[time] = Form(default=None, description="Daily delivery window start, e.g. 09:00"),
+    window_end: Optional[time] = Form(default=None, description="Daily delivery window end, e.g. 20:00"),
+    timezone: str = Form(default=settings.CAMPAIGN_DEFAULT_TIMEZONE, description="Timezone of the delivery window"),
+    max_rate_per_second: Optional[float] = Form(default=None, description="Cap on messages per second for this campaign"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Retries with the same key return the first campaign"),
+    db: Session = Depends(get_db)
+):
+    """Schedule a bulk send with an optional daily delivery window and rate cap"""
+    content = await upload_digest(file) if idempotency_key else ""
+    fingerprint = "|".join(str(v) for v in (
+        file.filename, content, name, channel, message, column_name,
+        start_at, window_start, window_end, timezone, max_rate_per_second,
+    ))
+    return await run_idempotent(
+        idempotency_key,
+        "campaigns.create",
+        fingerprint,
+        lambda: _create_campaign(
+            file, name, channel, message, column_name, start_at,
+            window_start, window_end, timezone, max_rate_per_second, db
+        )
+    )
+
+async def _create_campaign(
+    file: UploadFile,
+    name: str,
+    channel: str,
+    message: str,
+    column_name: str,
+    start_at: Optional[datetime],
+    window_start: Optional[time],
+    window_end: Optional[time],
+    timezone: str,
+    max_rate_per_second: Optional[float],
+    db: Session
+) -> CampaignResponse:
+    if not name.strip():
+        raise HTTPException(status_code=400, detail="Campaign name cannot be empty")
+    if channel not in CHANNELS:
+        raise HTTPException(status_code=400, detail=f"Channel must be one of {list(CHANNELS)}")
+    if (window_start is None) != (window_end is None):
+        raise HTTPException(status_code=400, detail="Set both window_start and window_end, or neither")
+    if window_start is not None and window_start == window_end:
+        raise HTTPException(status_code=400, detail="Delivery window cannot be empty")
+    if max_rate_per_second is not None and max_rate_per_second <= 0:
+        raise HTTPException(status_code=400, detail="max_rate_per_second must be positive")
+    try:
+        zone = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone '{timezone}'")
+
+    if not get_sender_pool(channel).senders:
+        raise HTTPException(status_code=500, detail="Twilio credentials not configured")
+
+    template = MessageTemplate(message)
+    valid_numbers, invalid_numbers, messages = await ExcelProcessor.parse_recipients(file, column_name, template)
+    if not valid_numbers:
+        raise HTTPException(status_code=400, detail="No valid mobile numbers found in the file")
+
+    # Stored in UTC, like every other timestamp in the database
+    if start_at is None:
+        start_at_utc = datetime.utcnow()
+    else:
+        if start_at.tzinfo is None:
+            start_at = start_at.replace(tzinfo=zone)
+        start_at_utc = start_at.astimezone(dt_timezone.utc).replace(tzinfo=None)
+
+    campaign = Campaign(
+        name=name.strip(),
+        channel=channel,
+        message=message,
+        status="scheduled",
+        start_at=start_at_utc,
+        window_start=window_start.replace(tzinfo=None) if window_start else None,
+        window_end=window_end.replace(tzinfo=None) if window_end else None,
+        timezone=timezone,
+        max_rate_per_second=max_rate_per_second,
+        recipients=json.dumps(valid_numbers),
+        messages=json.dumps(messages) if messages is not None else None,
+        invalid_numbers=json.dumps(invalid_numbers),
+        total_recipients=len(valid_numbers),
+    )
+    db.add(campaign)
+    db.commit()
+    db.refresh(campaign)
+
+    return CampaignResponse(**campaign.to_dict())
+
+@router.get("/list", response_model=CampaignListResponse)
+async def list_campaigns(
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """List campaigns, newest first"""
+    query = db.query(Campaign)
+    if status:
+        query = query.filter(Campaign.status == status)
+
+    total = query.count()
+    campaigns = query.order_by(Campaign.created_at.desc()).offset(skip).limit(limit).all()
+
+    return CampaignListResponse(
+        total=total,
+        campaigns=[CampaignResponse(**c.to_dict()) for c in campaigns]
+    )
+
+@router.get("/{campaign_id}", response_model=CampaignResponse)
+async def get_campaign(campaign_id: int, db: Session = Depends(get_db)):
+    """Progress of a campaign"""
+    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return CampaignResponse(**campaign.to_dict())
+
+@router.post("/{campaign_id}/cancel", response_model=CampaignResponse)
+async def cancel_campaign(campaign_id: int, db: Session = Depends(get_db)):
+    """Stop a campaign; a batch already being sent finishes first"""
+    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    if campaign.status in ("completed", "failed", "cancelled"):
+        raise HTTPException(status_code=409, detail=f"Campaign is already {campaign.status}")
+
+    campaign.status = "cancelled"
+    campaign.finished_at = datetime.utcnow()
+    db.commit()
+    db.refresh(campaign)
+
+    return CampaignResponse(**campaign.to_dict())
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, HTTPException
+
+from app.models.bulk_job import BulkJobStatus
+from app.services.bulk_jobs import get_bulk_job_queue
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=BulkJobStatus)
+async def get_bulk_job(job_id: str):
+    """Status (and, once finished, the result) of a background bulk send"""
+    job = await get_bulk_job_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
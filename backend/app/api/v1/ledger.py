@@ -0,0 +1,110 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import FileResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+import asyncio
+import os
+import tempfile
+
+from app.database import get_db
+from app.models.send_ledger import CampaignSendStats, SendRecord
+from app.services.send_ledger import EXPORT_FORMATS, export_ledger
+
+router = APIRouter()
+
+EXPORT_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+# Pydantic models
+class CampaignStatsResponse(BaseModel):
+    campaign_id: str  # campaign-<id>, job-<id>, bulk-<id> or notifications
+    channel: str
+    attempts: int
+    successful: int
+    failed: int
+    success_rate: float
+    avg_latency_ms: Optional[float]
+    first_sent_at: str
+    last_sent_at: str
+
+class ErrorCount(BaseModel):
+    error_code: Optional[int]  # None for failures without a Twilio error code
+    count: int
+
+class CampaignStatsDetailResponse(CampaignStatsResponse):
+    errors: List[ErrorCount]
+
+class CampaignStatsListResponse(BaseModel):
+    total: int
+    campaigns: List[CampaignStatsResponse]
+
+@router.get("/campaigns", response_model=CampaignStatsListResponse)
+async def list_campaign_stats(
+    channel: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """Success rates per campaign, most recently active first (read from the running totals, not the ledger)"""
+    query = db.query(CampaignSendStats)
+    if channel:
+        query = query.filter(CampaignSendStats.channel == channel)
+
+    total = query.count()
+    stats = query.order_by(CampaignSendStats.last_sent_at.desc()).offset(skip).limit(limit).all()
+
+    return CampaignStatsListResponse(
+        total=total,
+        campaigns=[CampaignStatsResponse(**s.to_dict()) for s in stats]
+    )
+
+@router.get("/campaigns/{campaign_id}", response_model=CampaignStatsDetailResponse)
+async def get_campaign_stats(campaign_id: str, db: Session = Depends(get_db)):
+    """Totals for one campaign, with its failures broken down by Twilio error code"""
+    stats = db.query(CampaignSendStats).filter(CampaignSendStats.campaign_id == campaign_id).first()
+    if not stats:
+        raise HTTPException(status_code=404, detail="No sends recorded for this campaign")
+
+    errors = db.query(SendRecord.error_code, func.count()).filter(
+        SendRecord.campaign_id == campaign_id,
+        SendRecord.status == "failed",
+    ).group_by(SendRecord.error_code).order_by(func.count().desc()).all()
+
+    return CampaignStatsDetailResponse(
+        **stats.to_dict(),
+        errors=[ErrorCount(error_code=code, count=count) for code, count in errors]
+    )
+
+@router.get("/export")
+async def export_send_ledger(
+    format: str = "parquet",
+    campaign_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+):
+    """Download the ledger (optionally one campaign, optionally from `since`, UTC) as Parquet or Arrow"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of {list(EXPORT_FORMATS)}")
+
+    fd, path = tempfile.mkstemp(prefix="send-ledger-", suffix=f".{format}")
+    os.close(fd)
+    try:
+        await asyncio.to_thread(export_ledger, path, format, campaign_id, since)
+    except RuntimeError as e:
+        os.remove(path)
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception:
+        os.remove(path)
+        raise
+
+    return FileResponse(
+        path,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        filename=f"send-ledger-{campaign_id or 'all'}.{format}",
+        background=BackgroundTask(os.remove, path)
+    )
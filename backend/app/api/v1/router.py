@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import whatsapp, sms, tickets
+from app.api.v1 import whatsapp, sms, tickets, jobs, campaigns, ledger
 
 api_v1_router = APIRouter()
 
@@ -19,4 +19,22 @@ api_v1_router.include_router(
     tickets.router,
     prefix="/tickets",
     tags=["Tickets"]
-)
\ No newline at end of file
+)
+
+api_v1_router.include_router(
+    jobs.router,
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
+api_v1_router.include_router(
+    campaigns.router,
+    prefix="/campaigns",
+    tags=["Campaigns"]
+)
+
+api_v1_router.include_router(
+    ledger.router,
+    prefix="/ledger",
+    tags=["Send Ledger"]
+)
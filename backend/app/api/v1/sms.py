@@ -1,10 +1,17 @@
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
-from typing import List, Optional
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, Header, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import List, Optional, Union
 from pydantic import BaseModel
 from datetime import datetime
+import uuid
 
+from app.services.bulk_jobs import get_bulk_job_queue
 from app.services.sms_service import SMSService
 from app.utils.file_handlers import ExcelProcessor
+from app.utils.http_cache import STATIC, conditional_response, make_etag
+from app.utils.idempotency import run_idempotent, upload_digest
+from app.utils.templating import MessageTemplate
 from app.utils.validators import MobileNumberValidator
 
 router = APIRouter()
@@ -25,6 +32,7 @@ class BulkSMSResponse(BaseModel):
     invalid_numbers: List[str]
     results: List[BulkSMSResult]
     message_sent: str
+    campaign_id: Optional[str] = None  # Key of these sends in the send ledger
 
 class SingleSMSResult(BaseModel):
     number: str
@@ -41,10 +49,18 @@ def get_sms_service() -> SMSService:
 async def send_single_sms(
     mobile_number: str = Form(..., description="Recipient mobile number"),
     message: str = Form(..., description="Message to send"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Retries with the same key replay the first result"),
     sms_service: SMSService = Depends(get_sms_service)
 ):
     """Send a single SMS"""
-    
+    return await run_idempotent(
+        idempotency_key,
+        "sms.send-single",
+        f"{mobile_number}|{message}",
+        lambda: _send_single_sms(mobile_number, message, sms_service)
+    )
+
+async def _send_single_sms(mobile_number: str, message: str, sms_service: SMSService) -> SingleSMSResult:
     if not sms_service.validate_credentials():
         raise HTTPException(status_code=500, detail="SMS service not configured. Please set Twilio credentials.")
     
@@ -64,24 +80,51 @@ async def send_single_sms(
 @router.post("/send-bulk", response_model=BulkSMSResponse)
 async def send_bulk_sms(
     file: UploadFile = File(..., description="Excel file with mobile numbers"),
-    message: str = Form(..., description="Message to send"),
+    message: str = Form(..., description="Message to send. May contain {placeholders} filled from other columns, e.g. {name}, {event_date}, {gdrive_link}"),
     column_name: str = Form(default="mobile", description="Column name containing mobile numbers"),
+    background: bool = Form(default=False, description="Queue the send as a background job and return its id (poll /jobs/{job_id})"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Retries with the same key replay the first result"),
     sms_service: SMSService = Depends(get_sms_service)
 ):
     """Send SMS to multiple numbers from Excel"""
+    # The sheet's content, not just its name and size: a different sheet under a reused key gets 422
+    content = await upload_digest(file) if idempotency_key else ""
+    fingerprint = f"{file.filename}|{content}|{column_name}|{message}|{background}"
+    return await run_idempotent(
+        idempotency_key,
+        "sms.send-bulk",
+        fingerprint,
+        lambda: _send_bulk_sms(file, message, column_name, background, sms_service)
+    )
+
+async def _send_bulk_sms(
+    file: UploadFile, message: str, column_name: str, background: bool, sms_service: SMSService
+) -> Union[BulkSMSResponse, JSONResponse]:
+    template = MessageTemplate(message)
     
     if not sms_service.validate_credentials():
         raise HTTPException(status_code=500, detail="SMS service not configured. Please set Twilio credentials.")
-    
+
+    # Refuse before parsing the upload when the job queue is full
+    if background:
+        await get_bulk_job_queue().check_capacity()
+
     # Read Excel
-    df = await ExcelProcessor.read_excel_file(file)
-    valid_numbers, invalid_numbers = ExcelProcessor.extract_mobile_numbers(df, column_name)
+    valid_numbers, invalid_numbers, messages = await ExcelProcessor.parse_recipients(file, column_name, template)
+    if messages is None:
+        messages = message
     
     if not valid_numbers:
         raise HTTPException(status_code=400, detail="No valid mobile numbers found in the file")
     
+    # Hand off to any worker when queued
+    if background:
+        job = await get_bulk_job_queue().submit("sms", valid_numbers, messages, invalid_numbers, message)
+        return JSONResponse(status_code=202, content=jsonable_encoder(job))
+
     # Send SMS
-    results_raw = await sms_service.send_bulk_sms(valid_numbers, message)
+    campaign_id = f"bulk-{uuid.uuid4().hex[:12]}"
+    results_raw = await sms_service.send_bulk_sms(valid_numbers, messages, campaign_id=campaign_id)
     
     success_count = sum(1 for r in results_raw if r["status"] == "success")
     failed_count = len(results_raw) - success_count
@@ -104,13 +147,14 @@ async def send_bulk_sms(
         failed=failed_count,
         invalid_numbers=invalid_numbers,
         results=results,
-        message_sent=message
+        message_sent=message,
+        campaign_id=campaign_id
     )
 
 # -------------------- Setup Instructions --------------------
 @router.get("/setup")
-async def get_setup_instructions():
-    return {
+async def get_setup_instructions(request: Request, response: Response):
+    instructions = {
         "instructions": [
             "1. Sign up for Twilio account at https://www.twilio.com",
             "2. Go to Console Dashboard and get Account SID and Auth Token",
@@ -120,3 +164,7 @@ async def get_setup_instructions():
         ],
         "note": "For bulk messages, ensure numbers are in E.164 format (+91XXXXXXXXXX)"
     }
+
+    # Static per deploy: cacheable for a day, revalidated by content hash
+    not_modified = conditional_response(request, response, make_etag("sms.setup", instructions), cache_control=STATIC)
+    return not_modified or instructions
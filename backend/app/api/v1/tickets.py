@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, validator
 from typing import List, Optional
@@ -6,15 +7,17 @@ from datetime import datetime
 import random
 import string
 
-from app.database import get_db, engine, Base
+from app.database import get_db
 from app.models.ticket import Ticket
 from app.models.comment import Comment
+from app.models.archive import CommentArchive, TicketArchive
+from app.services.archival import find_archived_ticket, restore_ticket
+from app.services.notifications import notify_comment_added, notify_status_changed, notify_ticket_created
+from app.utils.http_cache import conditional_response, make_etag
+from app.utils.idempotency import run_idempotent
 
 router = APIRouter()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
 # Pydantic models
 class TicketCreate(BaseModel):
     name: str
@@ -107,14 +110,25 @@ def generate_ticket_number():
     return f"TKT-{date_part}-{random_part}"
 
 @router.post("/create", response_model=TicketResponse)
-async def create_ticket(ticket: TicketCreate, db: Session = Depends(get_db)):
+async def create_ticket(
+    ticket: TicketCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Retries with the same key return the first ticket"),
+    db: Session = Depends(get_db)
+):
     """Create a new ticket"""
+    return await run_idempotent(
+        idempotency_key,
+        "tickets.create",
+        ticket.model_dump_json(),
+        lambda: _create_ticket(ticket, db)
+    )
 
+async def _create_ticket(ticket: TicketCreate, db: Session) -> TicketResponse:
     # Generate unique ticket number
     while True:
         ticket_number = generate_ticket_number()
         existing = db.query(Ticket).filter(Ticket.ticket_number == ticket_number).first()
-        if not existing:
+        if not existing and not find_archived_ticket(db, ticket_number):
             break
 
     # Parse event_date
@@ -135,6 +149,9 @@ async def create_ticket(ticket: TicketCreate, db: Session = Depends(get_db)):
     )
 
     db.add(db_ticket)
+    db.flush()  # Assigns the id the notification refers to
+    # Same commit as the ticket: the notification exists if and only if the ticket does
+    notify_ticket_created(db, db_ticket)
     db.commit()
     db.refresh(db_ticket)
 
@@ -142,35 +159,44 @@ async def create_ticket(ticket: TicketCreate, db: Session = Depends(get_db)):
 
 @router.get("/list", response_model=TicketListResponse)
 async def list_tickets(
+    request: Request,
+    response: Response,
     status: Optional[str] = None,
     search: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
+    archived: bool = False,
     db: Session = Depends(get_db)
 ):
-    """List all tickets with optional filtering"""
+    """List all tickets with optional filtering (archived=true lists the archive instead)"""
 
-    query = db.query(Ticket)
+    model = TicketArchive if archived else Ticket
+    query = db.query(model)
 
     # Filter by status
     if status:
-        query = query.filter(Ticket.status == status)
+        query = query.filter(model.status == status)
 
     # Search across multiple fields
     if search:
         search_filter = f"%{search}%"
         query = query.filter(
-            (Ticket.ticket_number.like(search_filter)) |
-            (Ticket.name.like(search_filter)) |
-            (Ticket.mobile_number.like(search_filter)) |
-            (Ticket.pincode.like(search_filter))
+            (model.ticket_number.like(search_filter)) |
+            (model.name.like(search_filter)) |
+            (model.mobile_number.like(search_filter)) |
+            (model.pincode.like(search_filter))
         )
 
-    # Get total count
-    total = query.count()
+    # Count and latest change of the filtered set double as its version:
+    # any create, update or removal in it changes one of them
+    total, last_modified = query.with_entities(func.count(model.id), func.max(model.updated_at)).one()
+    etag = make_etag("tickets.list", request.url.query, total, last_modified)
+    not_modified = conditional_response(request, response, etag, last_modified)
+    if not_modified:
+        return not_modified
 
     # Get paginated results, ordered by created_at desc
-    tickets = query.order_by(Ticket.created_at.desc()).offset(skip).limit(limit).all()
+    tickets = query.order_by(model.created_at.desc()).offset(skip).limit(limit).all()
 
     return TicketListResponse(
         total=total,
@@ -178,16 +204,37 @@ async def list_tickets(
     )
 
 @router.get("/{ticket_number}", response_model=TicketResponse)
-async def get_ticket(ticket_number: str, db: Session = Depends(get_db)):
-    """Get a specific ticket by ticket number"""
+async def get_ticket(
+    ticket_number: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """Get a specific ticket by ticket number (supports If-None-Match / If-Modified-Since)"""
 
-    ticket = db.query(Ticket).filter(Ticket.ticket_number == ticket_number).first()
+    ticket = db.query(Ticket).filter(Ticket.ticket_number == ticket_number).first() or \
+        find_archived_ticket(db, ticket_number)
 
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
+    etag = make_etag("ticket", ticket.id, ticket.updated_at, ticket.status)
+    not_modified = conditional_response(request, response, etag, ticket.updated_at)
+    if not_modified:
+        return not_modified
+
     return TicketResponse(**ticket.to_dict())
 
+def _get_active_ticket(db: Session, ticket_number: str) -> Ticket:
+    """Ticket to modify; an archived one is moved back to the active tables first"""
+    ticket = db.query(Ticket).filter(Ticket.ticket_number == ticket_number).first() or \
+        restore_ticket(db, ticket_number)
+
+    if not ticket:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    return ticket
+
 @router.patch("/{ticket_number}/status", response_model=TicketResponse)
 async def update_ticket_status(
     ticket_number: str,
@@ -196,13 +243,13 @@ async def update_ticket_status(
 ):
     """Update ticket status"""
 
-    ticket = db.query(Ticket).filter(Ticket.ticket_number == ticket_number).first()
-
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
+    ticket = _get_active_ticket(db, ticket_number)
 
+    changed = ticket.status != status_update.status
     ticket.status = status_update.status
     ticket.updated_at = datetime.utcnow()
+    if changed:
+        notify_status_changed(db, ticket)
     db.commit()
     db.refresh(ticket)
 
@@ -216,10 +263,7 @@ async def add_comment(
 ):
     """Add a comment to a ticket"""
 
-    ticket = db.query(Ticket).filter(Ticket.ticket_number == ticket_number).first()
-
-    if not ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
+    ticket = _get_active_ticket(db, ticket_number)
 
     db_comment = Comment(
         ticket_id=ticket.id,
@@ -232,6 +276,7 @@ async def add_comment(
     # Update ticket's updated_at timestamp
     ticket.updated_at = datetime.utcnow()
 
+    notify_comment_added(db, ticket)
     db.commit()
     db.refresh(db_comment)
 
@@ -245,11 +290,16 @@ async def get_comments(
     """Get all comments for a ticket"""
 
     ticket = db.query(Ticket).filter(Ticket.ticket_number == ticket_number).first()
+    comment_model = Comment
+
+    if not ticket:
+        ticket = find_archived_ticket(db, ticket_number)
+        comment_model = CommentArchive
 
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
-    comments = db.query(Comment).filter(Comment.ticket_id == ticket.id).order_by(Comment.created_at.desc()).all()
+    comments = db.query(comment_model).filter(comment_model.ticket_id == ticket.id).order_by(comment_model.created_at.desc()).all()
 
     return CommentsListResponse(
         total=len(comments),
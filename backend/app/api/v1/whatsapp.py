@@ -1,5 +1,8 @@
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, Header, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import List, Optional, Union
+import uuid
 
 from app.models.whatsapp import (
     WhatsAppMessageRequest, 
@@ -8,8 +11,12 @@ from app.models.whatsapp import (
     MessageResult,
     SetupInstructions
 )
+from app.services.bulk_jobs import get_bulk_job_queue
 from app.services.whatsapp_service import WhatsAppService
 from app.utils.file_handlers import ExcelProcessor
+from app.utils.http_cache import STATIC, conditional_response, make_etag
+from app.utils.idempotency import run_idempotent, upload_digest
+from app.utils.templating import MessageTemplate
 from app.utils.validators import MobileNumberValidator
 
 router = APIRouter()
@@ -21,23 +28,43 @@ def get_whatsapp_service() -> WhatsAppService:
 @router.post("/send-bulk", response_model=BulkMessageResponse)
 async def send_bulk_whatsapp_messages(
     file: UploadFile = File(..., description="Excel file with mobile numbers"),
-    message: str = Form(..., description="Message to send"),
+    message: str = Form(..., description="Message to send. May contain {placeholders} filled from other columns, e.g. {name}, {event_date}, {gdrive_link}"),
     column_name: str = Form(default="mobile", description="Column name containing mobile numbers"),
+    background: bool = Form(default=False, description="Queue the send as a background job and return its id (poll /jobs/{job_id})"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Retries with the same key replay the first result"),
     whatsapp_service: WhatsAppService = Depends(get_whatsapp_service)
 ):
     """Send WhatsApp messages to mobile numbers from Excel file"""
+    # The sheet's content, not just its name and size: a different sheet under a reused key gets 422
+    content = await upload_digest(file) if idempotency_key else ""
+    fingerprint = f"{file.filename}|{content}|{column_name}|{message}|{background}"
+    return await run_idempotent(
+        idempotency_key,
+        "whatsapp.send-bulk",
+        fingerprint,
+        lambda: _send_bulk_whatsapp_messages(file, message, column_name, background, whatsapp_service)
+    )
+
+async def _send_bulk_whatsapp_messages(
+    file: UploadFile, message: str, column_name: str, background: bool, whatsapp_service: WhatsAppService
+) -> Union[BulkMessageResponse, JSONResponse]:
+    template = MessageTemplate(message)
+
     # Validate service
     if not whatsapp_service.validate_credentials():
         raise HTTPException(
             status_code=500,
             detail="WhatsApp service not configured. Please set Twilio credentials."
         )
-    
+
+    # Refuse before parsing the upload when the job queue is full
+    if background:
+        await get_bulk_job_queue().check_capacity()
+
     # Process Excel file
-    df = await ExcelProcessor.read_excel_file(file)
-    valid_numbers, invalid_numbers = ExcelProcessor.extract_mobile_numbers(df, column_name)
-    print('valid_numbers',valid_numbers)
-    print('invalid_numbers',invalid_numbers)
+    valid_numbers, invalid_numbers, messages = await ExcelProcessor.parse_recipients(file, column_name, template)
+    if messages is None:
+        messages = message
 
     if not valid_numbers:
         raise HTTPException(
@@ -45,8 +72,14 @@ async def send_bulk_whatsapp_messages(
             detail="No valid mobile numbers found in the file"
         )
     
+    # Hand off to any worker when queued
+    if background:
+        job = await get_bulk_job_queue().submit("whatsapp", valid_numbers, messages, invalid_numbers, message)
+        return JSONResponse(status_code=202, content=jsonable_encoder(job))
+
     # Send messages
-    results = await whatsapp_service.send_bulk_messages(valid_numbers, message)
+    campaign_id = f"bulk-{uuid.uuid4().hex[:12]}"
+    results = await whatsapp_service.send_bulk_messages(valid_numbers, messages, campaign_id=campaign_id)
     # Calculate stats
     success_count = sum(1 for r in results if r.status == "success")
     failed_count = len(results) - success_count
@@ -58,17 +91,28 @@ async def send_bulk_whatsapp_messages(
         failed=failed_count,
         invalid_numbers=invalid_numbers,
         results=results,
-        message_sent=message
+        message_sent=message,
+        campaign_id=campaign_id
     )
 
 @router.post("/send-single", response_model=MessageResult)
 async def send_single_whatsapp_message(
     mobile_number: str = Form(..., description="Mobile number to test"),
     message: str = Form(..., description="Test message"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Retries with the same key replay the first result"),
     whatsapp_service: WhatsAppService = Depends(get_whatsapp_service)
 ):
     """Test sending message to a single number"""
-    
+    return await run_idempotent(
+        idempotency_key,
+        "whatsapp.send-single",
+        f"{mobile_number}|{message}",
+        lambda: _send_single_whatsapp_message(mobile_number, message, whatsapp_service)
+    )
+
+async def _send_single_whatsapp_message(
+    mobile_number: str, message: str, whatsapp_service: WhatsAppService
+) -> MessageResult:
     # Validate service
     if not whatsapp_service.validate_credentials():
         raise HTTPException(
@@ -86,9 +130,9 @@ async def send_single_whatsapp_message(
     return result
 
 @router.get("/setup", response_model=SetupInstructions)
-async def get_setup_instructions():
+async def get_setup_instructions(request: Request, response: Response):
     """Get setup instructions for Twilio WhatsApp API"""
-    return SetupInstructions(
+    instructions = SetupInstructions(
         instructions=[
             "1. Sign up for Twilio account at https://www.twilio.com",
             "2. Go to Console Dashboard and get Account SID and Auth Token",
@@ -110,6 +154,12 @@ async def get_setup_instructions():
                 {"mobile": "9876543210"},
                 {"mobile": "+919876543210"},
                 {"mobile": "919876543210"}
-            ]
+            ],
+            "message_placeholders": "Use {column name} in the message to personalize it per row, "
+                                    "e.g. 'Hi {name}, photos from {event_date}: {gdrive_link}'"
         }
-    )
\ No newline at end of file
+    )
+
+    # Static per deploy: cacheable for a day, revalidated by content hash
+    not_modified = conditional_response(request, response, make_etag("whatsapp.setup", instructions), cache_control=STATIC)
+    return not_modified or instructions
\ No newline at end of file
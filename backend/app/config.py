@@ -1,11 +1,32 @@
 import os
 from pathlib import Path
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 from typing import Optional, List
 
 # Get the directory containing this config file
 BASE_DIR = Path(__file__).resolve().parent
 
+class SenderConfig(BaseModel):
+    """One sending identity (number + account) in the sender pool"""
+    channel: str  # "whatsapp" or "sms"
+    from_number: str  # e.g. whatsapp:+14155238886 or +1234567890
+    account_sid: Optional[str] = None  # Defaults to TWILIO_ACCOUNT_SID (set for sub-accounts)
+    auth_token: Optional[str] = None  # Defaults to TWILIO_AUTH_TOKEN
+    rate_per_second: float = 1.0  # Messages per second allowed for this sender
+    weight: int = 1  # Relative share of recipients
+
+class RouteLimit(BaseModel):
+    """Request limits for a group of API paths, enforced per worker process"""
+    name: str
+    paths: List[str]  # Glob patterns, e.g. /api/v1/*/send-bulk
+    rate_per_second: float = 0.0  # Token bucket refill per client (RATE_LIMIT_PER_CLIENT); 0 = no rate limit
+    burst: int = 1  # Token bucket size per client
+    concurrency: int = 0  # In-flight requests across all clients; 0 = no cap
+    max_waiting: int = 0  # Requests queued for a slot beyond `concurrency`; more are shed with 429
+    max_wait_seconds: float = 5.0  # A queued request gives up with 429 after this
+    retry_after_seconds: int = 1  # Retry-After sent when shedding
+
 class Settings(BaseSettings):
     # Project Info
     PROJECT_NAME: str = "Communication API"
@@ -20,13 +41,115 @@ class Settings(BaseSettings):
     # Twilio SMS Config
     TWILIO_PHONE_NUMBER: Optional[str] = None  # Your Twilio phone number for SMS (e.g., +1234567890)
 
+    # Twilio API overrides (point at benchmarks/fake_twilio.py for local load tests)
+    TWILIO_API_BASE_URL: Optional[str] = None  # Defaults to https://api.twilio.com
+    TWILIO_STATUS_CALLBACK_URL: Optional[str] = None  # Sent as StatusCallback on every message
+
+    # Database
+    DATABASE_URL: Optional[str] = None  # Defaults to SQLite file app/tickets.db; use postgresql://... for multi-worker
+    DATABASE_POOL_SIZE: int = 5  # Per worker process (server databases only)
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800
+
+    # Multi-worker deployment
+    # Shared rate-limit / job state: "" (single process), sqlite:///path (one host) or redis://host:6379/0
+    SHARED_STATE_URL: str = ""
+    BULK_JOB_WORKERS: int = 1  # Background bulk jobs run concurrently per worker process
+    BULK_JOB_RESULT_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    BULK_JOB_MAX_QUEUED: int = 20  # Background bulk sends waiting in the shared queue; more get 429
+    BULK_JOB_LEASE_SECONDS: int = 60  # A job whose worker stops renewing its lease this long is marked failed
+
     # File Upload Settings
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    UPLOAD_SPOOL_MAX_SIZE: int = 1024 * 1024  # Uploads above this are buffered on disk, not in memory
     ALLOWED_FILE_EXTENSIONS: List[str] = ['.xlsx', '.xls', '.csv']
+    EXCEL_PARSE_WORKERS: int = 0  # Parser processes; 0 = min(4, CPU count)
+    EXCEL_PARSE_MAX_QUEUED: int = 8  # Uploads allowed to wait for a parser before 503
+    EXCEL_PARSE_TIMEOUT_SECONDS: int = 120
 
     # Rate Limiting
     MESSAGE_DELAY_SECONDS: int = 1  # Delay between messages for trial
 
+    # Sender Pool
+    # JSON list of SenderConfig, e.g.
+    # [{"channel": "whatsapp", "from_number": "whatsapp:+14155238886", "rate_per_second": 1, "weight": 2}]
+    # When empty, TWILIO_WHATSAPP_FROM / TWILIO_PHONE_NUMBER are used as a single sender
+    TWILIO_SENDER_POOL: List[SenderConfig] = []
+    SENDER_FAILURE_THRESHOLD: int = 5  # Consecutive sender errors before it is taken out of rotation
+    SENDER_COOLDOWN_SECONDS: int = 300  # How long an unhealthy sender stays out of rotation
+
+    # Scheduled campaigns
+    CAMPAIGN_POLL_SECONDS: int = 15  # How often each worker looks for due campaigns
+    CAMPAIGN_LEASE_SECONDS: int = 120  # A campaign held by a crashed worker is picked up again after this
+    CAMPAIGN_MAX_RUNNING: int = 4  # Campaigns one worker process sends at the same time
+    CAMPAIGN_BATCH_SIZE: int = 200  # Recipients sent between progress checkpoints
+    CAMPAIGN_DEFAULT_TIMEZONE: str = "Asia/Kolkata"  # For delivery windows
+
+    # Ticket notifications (transactional outbox)
+    NOTIFICATIONS_ENABLED: bool = True  # Text customers when their ticket is created, updated or commented on
+    NOTIFICATION_CHANNEL: str = "sms"  # sms or whatsapp
+    NOTIFICATION_COALESCE_SECONDS: int = 20  # Changes within this window are sent as one message
+    NOTIFICATION_POLL_SECONDS: int = 5
+    NOTIFICATION_BATCH_SIZE: int = 50
+    NOTIFICATION_MAX_ATTEMPTS: int = 5
+
+    # Ticket archival
+    TICKET_ARCHIVE_AFTER_DAYS: int = 90  # Closed tickets untouched this long move to the archive tables; 0 disables
+    TICKET_ARCHIVE_INTERVAL_SECONDS: int = 6 * 60 * 60
+    TICKET_ARCHIVE_BATCH_SIZE: int = 1000  # Tickets moved per transaction
+
+    # Idempotency-Key support
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60  # How long a stored response can be replayed
+
+    # Send ledger: every send attempt, written in batches
+    SEND_LEDGER_ENABLED: bool = True
+    SEND_LEDGER_FLUSH_SECONDS: float = 1.0  # Buffered attempts are written at least this often
+    SEND_LEDGER_BATCH_SIZE: int = 1000  # Rows per insert
+    SEND_LEDGER_MAX_BUFFERED: int = 100_000  # Attempts beyond this are dropped while the database is unavailable
+    SEND_LEDGER_EXPORT_CHUNK_ROWS: int = 50_000  # Rows read per query when exporting
+
+    # Numbers Twilio rejected permanently (invalid, landline, not on WhatsApp) are skipped on later sends
+    NUMBER_CACHE_ENABLED: bool = True
+    NUMBER_CACHE_TTL_DAYS: int = 30  # After this a number is tried again
+    NUMBER_CACHE_DIR: Optional[str] = None  # Defaults to the app directory (next to tickets.db)
+    NUMBER_CACHE_SAVE_SECONDS: int = 60  # New failures reach the file (and the other workers) this often
+
+    # API protection, per worker process. The first RATE_LIMIT_ROUTES entry matching
+    # the path applies; paths matching none (/, /health, /docs) are not limited
+    RATE_LIMIT_ENABLED: bool = True
+    # Per-client token buckets and in-flight caps. Off by default: behind a load balancer every
+    # request comes from the proxy's address, so all users would share one client's budget.
+    # Turn on when clients connect directly, or with RATE_LIMIT_TRUST_FORWARDED_FOR behind the proxy
+    RATE_LIMIT_PER_CLIENT: bool = False
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # Identify clients by X-Forwarded-For (only behind a trusted proxy)
+    RATE_LIMIT_CLIENT_CONCURRENCY: int = 16  # In-flight requests per client across all routes
+    RATE_LIMIT_MAX_CLIENTS: int = 10_000  # Token buckets kept; the least recently seen clients are forgotten
+    RATE_LIMIT_ROUTES: List[RouteLimit] = [
+        # Uploads that parse a sheet and hold a send loop open
+        RouteLimit(
+            name="bulk", paths=["/api/v1/*/send-bulk", "/api/v1/campaigns/create"],
+            rate_per_second=0.2, burst=3, concurrency=2, max_waiting=4, max_wait_seconds=30, retry_after_seconds=30,
+        ),
+        RouteLimit(
+            name="send", paths=["/api/v1/*/send-single"],
+            rate_per_second=5, burst=10, concurrency=32, max_waiting=64,
+        ),
+        RouteLimit(
+            name="api", paths=["/api/*"],
+            rate_per_second=20, burst=40, concurrency=128, max_waiting=256,
+        ),
+    ]
+
+    # Health checks: /health/live (process is up) and /health/ready (safe to send traffic to)
+    HEALTH_CACHE_SECONDS: float = 2.0  # Probe results are reused this long, however often they are polled
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 2.0  # A slower database probe (or a locked SQLite file) counts as down
+    HEALTH_MAX_EVENT_LOOP_LAG_MS: int = 500  # Worst event-loop lag over the last 10s before the instance is unready
+    HEALTH_MAX_POOL_UTILIZATION: float = 1.0  # Unready when this share of the database connections is checked out
+    HEALTH_REQUIRE_TWILIO: bool = True  # Unready when no channel has a sender with Twilio credentials
+
+    # Response compression (brotli when the optional brotli-asgi package is installed, else gzip)
+    COMPRESSION_MINIMUM_SIZE: int = 1000  # Bytes; smaller responses are sent as is
+
     # Logging
     LOG_LEVEL: str = "INFO"
 
@@ -1,8 +1,24 @@
 import os
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.formparsers import MultiPartParser
 from app.config import settings
+from app.database import init_db
+from app.middleware.body_size_limit import BodySizeLimitMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.services.bulk_jobs import get_bulk_job_queue
+from app.services.archival import get_ticket_archiver
+from app.services.campaigns import get_campaign_scheduler
+from app.services.health import get_health_monitor
+from app.services.notifications import get_notification_dispatcher
+from app.services.number_cache import get_number_cache
+from app.services.send_ledger import get_send_ledger
+from app.utils.file_handlers import excel_parse_pool
 from app.api.v1.router import api_v1_router
 
 # ---------------------------
@@ -14,6 +30,51 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ---------------------------
+# Startup / Shutdown
+# ---------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema setup runs at startup instead of as an import side effect. Normally it
+    # was already done before the workers were started (see __main__), and this finds
+    # nothing to do; init_db serializes workers that get here together
+    init_db()
+
+    # Background bulk-job runners; every worker process pulls from the shared queue
+    queue = get_bulk_job_queue()
+    job_workers = [asyncio.create_task(queue.worker_loop()) for _ in range(settings.BULK_JOB_WORKERS)]
+
+    # Event-loop lag sampler behind /health/ready
+    job_workers.append(asyncio.create_task(get_health_monitor().run_forever()))
+
+    # Send attempts are written to the ledger in batches
+    if settings.SEND_LEDGER_ENABLED:
+        job_workers.append(asyncio.create_task(get_send_ledger().run_forever()))
+
+    # Numbers that failed permanently are saved to disk and shared between workers
+    if settings.NUMBER_CACHE_ENABLED:
+        for channel in ("sms", "whatsapp"):
+            job_workers.append(asyncio.create_task(get_number_cache(channel).run_forever()))
+
+    # Scheduled campaigns; each is claimed by one worker at a time
+    job_workers.append(asyncio.create_task(get_campaign_scheduler().run_forever()))
+
+    # Ticket notifications written by the ticket endpoints
+    if settings.NOTIFICATIONS_ENABLED:
+        job_workers.append(asyncio.create_task(get_notification_dispatcher().run_forever()))
+
+    # Long-closed tickets move to the archive tables
+    if settings.TICKET_ARCHIVE_AFTER_DAYS > 0:
+        job_workers.append(asyncio.create_task(get_ticket_archiver().run_forever()))
+
+    yield
+
+    for task in job_workers:
+        task.cancel()
+    await asyncio.gather(*job_workers, return_exceptions=True)
+    excel_parse_pool.shutdown()
+
+
 # ---------------------------
 # Create FastAPI App
 # ---------------------------
@@ -22,9 +83,29 @@ def create_app() -> FastAPI:
         title=settings.PROJECT_NAME,
         version=settings.VERSION,
         description=settings.DESCRIPTION,
-        debug=True  # Enable debug for local development
+        debug=True,  # Enable debug for local development
+        lifespan=lifespan
     )
 
+    # ---------------------------
+    # Rate Limits / Load Shedding
+    # ---------------------------
+    # Added first so it sits inside CORS: browsers can read the 429s
+    if settings.RATE_LIMIT_ENABLED:
+        if settings.RATE_LIMIT_PER_CLIENT and not settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+            logger.warning(
+                "RATE_LIMIT_PER_CLIENT without RATE_LIMIT_TRUST_FORWARDED_FOR: behind a load balancer "
+                "all clients share the proxy's address, and with it one client's rate limit"
+            )
+        app.add_middleware(
+            RateLimitMiddleware,
+            routes=settings.RATE_LIMIT_ROUTES,
+            client_concurrency=settings.RATE_LIMIT_CLIENT_CONCURRENCY,
+            max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+            trust_forwarded_for=settings.RATE_LIMIT_TRUST_FORWARDED_FOR,
+            per_client=settings.RATE_LIMIT_PER_CLIENT,
+        )
+
     # ---------------------------
     # CORS Middleware
     # ---------------------------
@@ -39,6 +120,22 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # ---------------------------
+    # Compression
+    # ---------------------------
+    try:
+        from brotli_asgi import BrotliMiddleware  # Optional; falls back to gzip for clients without br
+        app.add_middleware(BrotliMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+    except ImportError:
+        app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+    # ---------------------------
+    # Upload Limits
+    # ---------------------------
+    # Headroom over MAX_FILE_SIZE for the multipart envelope and form fields
+    app.add_middleware(BodySizeLimitMiddleware, max_body_size=settings.MAX_FILE_SIZE + 64 * 1024)
+    MultiPartParser.spool_max_size = settings.UPLOAD_SPOOL_MAX_SIZE
+
     # ---------------------------
     # Routers
     # ---------------------------
@@ -62,6 +159,31 @@ def create_app() -> FastAPI:
         print("Health check accessed")
         return {"status": "healthy"}
 
+    # Liveness: the process is up and its event loop answers; never touches dependencies
+    @app.get("/health/live")
+    async def liveness():
+        return {"status": "alive"}
+
+    # Readiness: 503 while a dependency is down, so the load balancer routes around this instance
+    @app.api_route("/health/ready", methods=["GET", "HEAD"])
+    async def readiness():
+        report = await get_health_monitor().check()
+        return JSONResponse(
+            status_code=200 if report["status"] == "ready" else 503,
+            content=report,
+            headers={"Cache-Control": "no-store"},
+        )
+
+    # The readiness probes in the Prometheus text format (served from the same cache)
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        monitor = get_health_monitor()
+        return PlainTextResponse(
+            monitor.metrics(await monitor.check()),
+            media_type="text/plain; version=0.0.4",
+            headers={"Cache-Control": "no-store"},
+        )
+
     return app
 
 
@@ -80,14 +202,22 @@ if __name__ == "__main__":
     # Use Render's dynamic port if available, else default to 8000 locally
     port = int(os.getenv("PORT", 8000))
 
-    # If running locally -> enable reload + debug
+    # If running locally -> enable reload
     is_local = os.getenv("RENDER", "false").lower() != "true"
 
+    # Several worker processes share rate limits and bulk jobs through SHARED_STATE_URL
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    if workers > 1 and not settings.SHARED_STATE_URL:
+        logger.warning("WEB_CONCURRENCY > 1 without SHARED_STATE_URL: Twilio rate limits will be per worker")
+
+    # Set the schema up once, before the workers fork, instead of in every worker at the same moment
+    init_db()
+
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=port,
-        reload=is_local,        # Reload only for local dev
-        log_level="debug",
-        debug=is_local
+        reload=is_local and workers == 1,  # Reload only for local dev, single process
+        workers=workers,
+        log_level="debug"
     )
@@ -0,0 +1,48 @@
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """
+    Rejects request bodies larger than max_body_size with 413.
+
+    - A declared Content-Length over the limit is refused before any of the
+      body is read.
+    - Otherwise bytes are counted as they arrive (chunked uploads, a wrong
+      Content-Length), and the request fails as soon as the limit is crossed
+      rather than after the whole body has been received.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    def _detail(self) -> str:
+        return f"Request body exceeds the maximum size of {self.max_body_size / (1024 * 1024):.1f} MB"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_body_size:
+            response = JSONResponse(status_code=413, content={"detail": self._detail()}, headers={"Connection": "close"})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Raised inside the app, so the regular exception handlers answer it
+                    raise HTTPException(status_code=413, detail=self._detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
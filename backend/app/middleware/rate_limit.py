@@ -0,0 +1,200 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import RouteLimit
+
+# Never limited: CORS preflights carry no work and must not eat a client's budget
+EXEMPT_METHODS = ("OPTIONS",)
+
+
+class ConcurrencyGate:
+    """
+    At most `limit` holders; up to `max_waiting` more wait in FIFO order.
+    A released slot goes straight to the oldest waiter, so waiters are not
+    overtaken by new arrivals.
+    """
+
+    def __init__(self, limit: int, max_waiting: int):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def enter(self, timeout: float) -> bool:
+        """False when the queue is full or the wait timed out"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_waiting:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.leave()  # The slot was handed over just as the client went away
+            raise
+        finally:
+            if waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def leave(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # The slot moves to the waiter; `active` is unchanged
+                return
+        self.active -= 1
+
+
+class TokenBuckets:
+    """Per-key token buckets, remembering at most max_keys keys (least recently used dropped)"""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Tuple[str, str], Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: Tuple[str, str], rate: float, burst: int, now: float) -> float:
+        """0 if a token was taken, otherwise the seconds until one is available"""
+        tokens, last = self._buckets.get(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - last) * rate)
+        if tokens >= 1.0:
+            tokens -= 1.0
+            wait = 0.0
+        else:
+            wait = (1.0 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class RateLimitMiddleware:
+    """
+    Protects the API from bursts and from slow requests piling up:
+
+    - with per_client, a token bucket per client and route group
+      (rate_per_second / burst) and a cap on in-flight requests per client
+      across all routes. Behind a proxy these need trust_forwarded_for, or
+      every request looks like the same client;
+    - a cap on in-flight requests per route group across all clients, with a
+      bounded FIFO queue in front of it. When the queue is full, or a request
+      has waited max_wait_seconds, the request is shed.
+
+    Everything that is refused gets 429 with Retry-After before the body is
+    read. State is per worker process; limits are enforced independently by
+    each worker.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: List[RouteLimit],
+        client_concurrency: int = 0,
+        max_clients: int = 10_000,
+        trust_forwarded_for: bool = False,
+        per_client: bool = True,
+    ):
+        self.app = app
+        self.routes = routes
+        self.per_client = per_client
+        self.client_concurrency = client_concurrency if per_client else 0
+        self.trust_forwarded_for = trust_forwarded_for
+        self.buckets = TokenBuckets(max_clients)
+        self.gates: Dict[str, ConcurrencyGate] = {
+            r.name: ConcurrencyGate(r.concurrency, r.max_waiting) for r in routes if r.concurrency > 0
+        }
+        self.in_flight: Dict[str, int] = {}
+        self.shed_count: Dict[str, int] = {r.name: 0 for r in routes}
+        self.route_for = lru_cache(maxsize=4096)(self._match_route)
+
+    def _match_route(self, path: str) -> Optional[RouteLimit]:
+        for route in self.routes:
+            if any(fnmatchcase(path, pattern) for pattern in route.paths):
+                return route
+        return None
+
+    def _client(self, scope: Scope) -> str:
+        if self.trust_forwarded_for:
+            forwarded = Headers(scope=scope).get("x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, route: RouteLimit, detail: str, retry_after: float):
+        self.shed_count[route.name] += 1
+        response = JSONResponse(
+            status_code=429,
+            content={"detail": detail},
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        await response(scope, receive, send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in EXEMPT_METHODS:
+            await self.app(scope, receive, send)
+            return
+        route = self.route_for(scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not self.per_client:
+            await self._run_gated(scope, receive, send, route)
+            return
+
+        client = self._client(scope)
+        if route.rate_per_second > 0:
+            wait = self.buckets.take((client, route.name), route.rate_per_second, route.burst, time.monotonic())
+            if wait:
+                await self._reject(scope, receive, send, route, "Too many requests, slow down", wait)
+                return
+
+        if self.client_concurrency and self.in_flight.get(client, 0) >= self.client_concurrency:
+            await self._reject(scope, receive, send, route, "Too many concurrent requests from this client", 1)
+            return
+
+        self.in_flight[client] = self.in_flight.get(client, 0) + 1
+        try:
+            await self._run_gated(scope, receive, send, route)
+        finally:
+            remaining = self.in_flight[client] - 1
+            if remaining:
+                self.in_flight[client] = remaining
+            else:
+                del self.in_flight[client]
+
+    async def _run_gated(self, scope: Scope, receive: Receive, send: Send, route: RouteLimit) -> None:
+        gate = self.gates.get(route.name)
+        if gate and not await gate.enter(route.max_wait_seconds):
+            await self._reject(scope, receive, send, route, "Server is busy, try again later", route.retry_after_seconds)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if gate:
+                gate.leave()
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date
+from datetime import datetime
+from app.database import Base
+from app.models.ticket import Ticket
+from app.models.comment import Comment
+
+# Long-closed tickets and their comments, moved out of the hot tables by
+# app.services.archival. Ids are kept, so a ticket reads the same either way.
+
+class TicketArchive(Base):
+    __tablename__ = "tickets_archive"
+
+    id = Column(Integer, primary_key=True)
+    ticket_number = Column(String, unique=True, index=True, nullable=False)
+    name = Column(String, nullable=False)
+    father_name = Column(String, nullable=False)
+    address = Column(Text, nullable=False)
+    pincode = Column(String, nullable=False)
+    mobile_number = Column(String, nullable=False)
+    event_date = Column(Date, nullable=False)
+    query = Column(Text, nullable=False)
+    status = Column(String, nullable=False)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    to_dict = Ticket.to_dict
+
+class CommentArchive(Base):
+    __tablename__ = "comments_archive"
+
+    id = Column(Integer, primary_key=True)
+    ticket_id = Column(Integer, nullable=False, index=True)
+    author_name = Column(String, nullable=False)
+    comment_text = Column(Text, nullable=False)
+    created_at = Column(DateTime)
+
+    to_dict = Comment.to_dict
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class BulkJobStatus(BaseModel):
+    job_id: str
+    channel: str  # whatsapp/sms
+    status: str  # queued/running/completed/failed
+    total_numbers: int
+    submitted_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result: Optional[dict] = None  # Same shape as the synchronous /send-bulk response
@@ -0,0 +1,55 @@
+import json
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Time
+from datetime import datetime
+from app.database import Base
+
+class Campaign(Base):
+    __tablename__ = "campaigns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    channel = Column(String, nullable=False)  # whatsapp/sms
+    message = Column(Text, nullable=False)  # As submitted (may contain placeholders)
+    status = Column(String, default="scheduled", index=True)  # scheduled, running, outside_window, completed, cancelled
+    start_at = Column(DateTime, nullable=False)  # UTC
+    window_start = Column(Time, nullable=True)  # Local time in `timezone`; no window = any time
+    window_end = Column(Time, nullable=True)
+    timezone = Column(String, nullable=False)
+    max_rate_per_second = Column(Float, nullable=True)  # None = as fast as the senders allow
+    recipients = Column(Text, nullable=False)  # JSON list of numbers
+    messages = Column(Text, nullable=True)  # JSON list, one rendered message per recipient
+    invalid_numbers = Column(Text, nullable=False, default="[]")  # JSON list
+    total_recipients = Column(Integer, nullable=False)
+    next_index = Column(Integer, default=0)  # Recipients before this one have been sent
+    sent_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    lease_until = Column(DateTime, nullable=True)  # Set while a worker is sending it
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def to_dict(self):
+        """Campaign summary (the recipient lists are left out)"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "channel": self.channel,
+            "message": self.message,
+            "status": self.status,
+            "start_at": self.start_at.isoformat() if self.start_at else None,
+            "window_start": self.window_start.strftime("%H:%M") if self.window_start else None,
+            "window_end": self.window_end.strftime("%H:%M") if self.window_end else None,
+            "timezone": self.timezone,
+            "max_rate_per_second": self.max_rate_per_second,
+            "total_recipients": self.total_recipients,
+            "sent": self.sent_count or 0,
+            "failed": self.failed_count or 0,
+            "remaining": self.total_recipients - (self.next_index or 0),
+            "invalid_numbers": json.loads(self.invalid_numbers or "[]"),
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
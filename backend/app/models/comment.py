@@ -4,9 +4,10 @@ from app.database import Base
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = {"sqlite_autoincrement": True}  # Ids of archived comments are never reused
 
     id = Column(Integer, primary_key=True, index=True)
-    ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=False)
+    ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=False, index=True)
     author_name = Column(String, nullable=False)  # Name of person adding comment
     comment_text = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
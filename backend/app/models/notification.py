@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+from app.database import Base
+
+class OutboxNotification(Base):
+    """Customer notification written in the same commit as the ticket change that caused it"""
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticket_id = Column(Integer, nullable=False, index=True)
+    event = Column(String, nullable=False)  # ticket_created, status_changed, comment_added
+    coalesce_key = Column(String, nullable=False, index=True)  # Newer pending rows with the same key replace older ones
+    channel = Column(String, nullable=False)  # sms/whatsapp
+    to_number = Column(String, nullable=False)
+    message = Column(Text, nullable=False)
+    status = Column(String, default="pending")  # pending, sending, sent, failed, superseded, skipped
+    available_at = Column(DateTime, nullable=False)  # Not sent before this (coalescing window / retry backoff)
+    attempts = Column(Integer, default=0)
+    claim_token = Column(String, nullable=True)
+    lease_until = Column(DateTime, nullable=True)
+    message_sid = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_notification_outbox_due", "status", "available_at"),
+    )
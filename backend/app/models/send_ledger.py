@@ -0,0 +1,62 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Index
+from datetime import datetime
+from app.database import Base
+
+class SendRecord(Base):
+    """One send attempt. Append-only: rows are never updated"""
+    __tablename__ = "send_ledger"
+
+    id = Column(Integer, primary_key=True)
+    campaign_id = Column(String, nullable=True)  # campaign-<id>, job-<id>, bulk-<id>, notifications; None for single sends
+    channel = Column(String, nullable=False)  # sms/whatsapp
+    number = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # success/failed
+    message_sid = Column(String, nullable=True)
+    error_code = Column(Integer, nullable=True)  # Twilio error code, when Twilio gave one
+    error = Column(Text, nullable=True)
+    latency_ms = Column(Float, nullable=False)  # Twilio API call only, not the rate-limit wait
+    sent_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Failure breakdowns read only the failed rows of one campaign
+        Index("ix_send_ledger_campaign_status", "campaign_id", "status"),
+    )
+
+    def to_dict(self):
+        return {
+            "campaign_id": self.campaign_id,
+            "channel": self.channel,
+            "number": self.number,
+            "status": self.status,
+            "message_sid": self.message_sid,
+            "error_code": self.error_code,
+            "error": self.error,
+            "latency_ms": self.latency_ms,
+            "sent_at": self.sent_at.isoformat() if self.sent_at else None,
+        }
+
+class CampaignSendStats(Base):
+    """Running totals per campaign, kept up to date with each ledger batch"""
+    __tablename__ = "send_ledger_rollup"
+
+    campaign_id = Column(String, primary_key=True)
+    channel = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    successful = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    latency_ms_total = Column(Float, nullable=False, default=0.0)
+    first_sent_at = Column(DateTime, nullable=False)
+    last_sent_at = Column(DateTime, nullable=False, index=True)
+
+    def to_dict(self):
+        return {
+            "campaign_id": self.campaign_id,
+            "channel": self.channel,
+            "attempts": self.attempts,
+            "successful": self.successful,
+            "failed": self.failed,
+            "success_rate": round(self.successful / self.attempts, 4) if self.attempts else 0.0,
+            "avg_latency_ms": round(self.latency_ms_total / self.attempts, 1) if self.attempts else None,
+            "first_sent_at": self.first_sent_at.isoformat() if self.first_sent_at else None,
+            "last_sent_at": self.last_sent_at.isoformat() if self.last_sent_at else None,
+        }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Index
 from datetime import datetime
 from app.database import Base
 
@@ -18,6 +18,13 @@ class Ticket(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Status filters and the archival sweep (Closed + updated_at cutoff)
+        Index("ix_tickets_status_updated_at", "status", "updated_at"),
+        # Archived tickets keep their id, so SQLite must not hand it out again
+        {"sqlite_autoincrement": True},
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -37,6 +37,7 @@ class BulkMessageResponse(BaseModel):
     invalid_numbers: List[str]
     results: List[MessageResult]
     message_sent: str
+    campaign_id: Optional[str] = None  # Key of these sends in the send ledger
 
 class SetupInstructions(BaseModel):
     instructions: List[str]
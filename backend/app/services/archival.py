@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Optional
+from sqlalchemy import DateTime, delete, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.archive import CommentArchive, TicketArchive
+from app.models.comment import Comment
+from app.models.ticket import Ticket
+
+logger = logging.getLogger(__name__)
+
+TICKET_COLUMNS = [c.name for c in Ticket.__table__.columns]
+COMMENT_COLUMNS = [c.name for c in Comment.__table__.columns]
+
+
+def _columns(model, names):
+    return [model.__table__.c[name] for name in names]
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Move up to batch_size tickets Closed before cutoff (with their comments) in one transaction"""
+    ids = [ticket_id for (ticket_id,) in db.query(Ticket.id)
+           .filter(Ticket.status == "Closed", Ticket.updated_at < cutoff)
+           .order_by(Ticket.id)
+           .limit(batch_size)
+           .with_for_update()  # Server databases: a concurrent reopen waits for the move
+           .all()]
+    if not ids:
+        return 0
+
+    # Re-checked in the statements, so a ticket reopened since the SELECT stays put
+    still_closed = (Ticket.id.in_(ids), Ticket.status == "Closed", Ticket.updated_at < cutoff)
+    moving = select(Ticket.id).where(*still_closed)
+    db.execute(insert(TicketArchive).from_select(
+        TICKET_COLUMNS + ["archived_at"],
+        select(*_columns(Ticket, TICKET_COLUMNS), literal(datetime.utcnow(), DateTime)).where(*still_closed),
+    ))
+    db.execute(insert(CommentArchive).from_select(
+        COMMENT_COLUMNS,
+        select(*_columns(Comment, COMMENT_COLUMNS)).where(Comment.ticket_id.in_(moving)),
+    ))
+    db.execute(delete(Comment).where(Comment.ticket_id.in_(moving)))
+    moved = db.execute(delete(Ticket).where(*still_closed)).rowcount
+    db.commit()
+    return moved
+
+
+def find_archived_ticket(db: Session, ticket_number: str) -> Optional[TicketArchive]:
+    return db.query(TicketArchive).filter(TicketArchive.ticket_number == ticket_number).first()
+
+
+def restore_ticket(db: Session, ticket_number: str) -> Optional[Ticket]:
+    """Move an archived ticket and its comments back into the active tables (e.g. to reopen it)"""
+    archived = find_archived_ticket(db, ticket_number)
+    if not archived:
+        return None
+
+    ticket_id = archived.id
+    db.execute(insert(Ticket).from_select(
+        TICKET_COLUMNS,
+        select(*_columns(TicketArchive, TICKET_COLUMNS)).where(TicketArchive.id == ticket_id),
+    ))
+    db.execute(insert(Comment).from_select(
+        COMMENT_COLUMNS,
+        select(*_columns(CommentArchive, COMMENT_COLUMNS)).where(CommentArchive.ticket_id == ticket_id),
+    ))
+    db.execute(delete(CommentArchive).where(CommentArchive.ticket_id == ticket_id))
+    db.execute(delete(TicketArchive).where(TicketArchive.id == ticket_id))
+    db.commit()
+    db.expire_all()
+    logger.info(f"Ticket {ticket_number} restored from the archive")
+    return db.get(Ticket, ticket_id)
+
+
+class TicketArchiver:
+    """
+    Moves tickets that have been Closed for more than TICKET_ARCHIVE_AFTER_DAYS
+    (by updated_at) into tickets_archive / comments_archive, in batches.
+
+    Keeps the active tables, which every list, count and search scans, down
+    to the tickets agents still work on. Lookups by ticket number fall back
+    to the archive, and changing an archived ticket restores it first.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+
+    def archive_closed(self, older_than_days: int, batch_size: Optional[int] = None) -> int:
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        batch_size = batch_size or settings.TICKET_ARCHIVE_BATCH_SIZE
+        total = 0
+        retried = False
+        db = self.session_factory()
+        try:
+            while True:
+                try:
+                    moved = archive_batch(db, cutoff, batch_size)
+                except IntegrityError:
+                    db.rollback()
+                    if retried:
+                        raise  # The same batch failed again: not a race with another worker
+                    # Another worker archived some of these tickets first; the next query skips them
+                    logger.info("Ticket archival batch collided with another worker, retrying")
+                    retried = True
+                    continue
+                retried = False
+                total += moved
+                if moved == 0:
+                    break
+        finally:
+            db.close()
+        return total
+
+    async def run_forever(self, interval: Optional[float] = None) -> None:
+        interval = interval or settings.TICKET_ARCHIVE_INTERVAL_SECONDS
+        while True:
+            try:
+                moved = await asyncio.to_thread(self.archive_closed, settings.TICKET_ARCHIVE_AFTER_DAYS)
+                if moved:
+                    logger.info(f"Archived {moved} closed tickets")
+            except Exception as e:
+                logger.error(f"Ticket archival failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+
+@lru_cache(maxsize=None)
+def get_ticket_archiver() -> TicketArchiver:
+    return TicketArchiver()
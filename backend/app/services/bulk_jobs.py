@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Union
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+from app.models.bulk_job import BulkJobStatus
+from app.services.shared_state import SharedStore, get_shared_store
+from app.services.sms_service import SMSService
+from app.services.whatsapp_service import WhatsAppService
+
+logger = logging.getLogger(__name__)
+
+QUEUE_NAME = "bulk_jobs"
+
+
+class BulkJobQueue:
+    """
+    Bulk sends queued in the shared store, so any worker process (on any
+    node, with Redis) can pick them up. Sender rate limits are global, so
+    running jobs on several workers never exceeds a sender's limit.
+
+    A worker holds a lease on the job it runs and renews it while sending.
+    If the worker dies, the lease runs out and another worker picks the job
+    up and marks it failed: part of it was probably sent, so it is not run
+    a second time.
+    """
+
+    def __init__(self, store: SharedStore):
+        self.store = store
+
+    async def submit(
+        self,
+        channel: str,
+        numbers: List[str],
+        message: Union[str, List[str]],
+        invalid_numbers: List[str],
+        message_sent: str,
+    ) -> BulkJobStatus:
+        job = BulkJobStatus(
+            job_id=uuid.uuid4().hex,
+            channel=channel,
+            status="queued",
+            total_numbers=len(numbers),
+            submitted_at=datetime.now(),
+        )
+        payload = {
+            "numbers": numbers,
+            "message": message,
+            "invalid_numbers": invalid_numbers,
+            "message_sent": message_sent,
+        }
+        await self.store.set(self._payload_key(job.job_id), json.dumps(payload), settings.BULK_JOB_RESULT_TTL_SECONDS)
+        await self._save(job)
+        await self.store.push(QUEUE_NAME, job.job_id)
+        return job
+
+    async def check_capacity(self) -> None:
+        """429 when BULK_JOB_MAX_QUEUED jobs are already waiting to run"""
+        if await self.depth() >= settings.BULK_JOB_MAX_QUEUED:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many bulk jobs are queued, try again later",
+                headers={"Retry-After": "60"}
+            )
+
+    async def get(self, job_id: str) -> Optional[BulkJobStatus]:
+        raw = await self.store.get(self._status_key(job_id))
+        return BulkJobStatus.model_validate_json(raw) if raw else None
+
+    async def depth(self) -> int:
+        return await self.store.queue_length(QUEUE_NAME)
+
+    async def run_next(self) -> bool:
+        """Run one queued job; False when the queue is empty"""
+        job_id = await self.store.claim(QUEUE_NAME, settings.BULK_JOB_LEASE_SECONDS)
+        if not job_id:
+            return False
+
+        job = await self.get(job_id)
+        raw_payload = await self.store.get(self._payload_key(job_id))
+        if not job or not raw_payload:
+            logger.warning(f"Bulk job {job_id} expired before it could run")
+            await self.store.ack(QUEUE_NAME, job_id)
+            return True
+        if job.status == "running":
+            logger.error(f"Bulk job {job_id} was abandoned by its worker, marking it failed")
+            job.status = "failed"
+            job.error = "The worker running this job stopped before it finished; some messages may have been sent"
+            await self._finish(job)
+            return True
+        if job.status != "queued":
+            await self.store.ack(QUEUE_NAME, job_id)  # Finished, but the ack was lost
+            return True
+
+        job.status = "running"
+        job.started_at = datetime.now()
+        await self._save(job)
+
+        heartbeat = asyncio.create_task(self._keep_lease(job_id))
+        try:
+            job.result = await self._send(job.job_id, job.channel, json.loads(raw_payload))
+            job.status = "completed"
+        except asyncio.CancelledError:
+            # Worker shutdown: record it now rather than when the lease runs out
+            job.status = "failed"
+            job.error = "Interrupted by a worker shutdown; some messages may have been sent"
+            await self._finish(job)
+            raise
+        except Exception as e:
+            logger.error(f"Bulk job {job_id} failed: {str(e)}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            heartbeat.cancel()
+
+        await self._finish(job)
+        return True
+
+    async def _keep_lease(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(settings.BULK_JOB_LEASE_SECONDS / 3)
+            try:
+                await self.store.extend(QUEUE_NAME, job_id, settings.BULK_JOB_LEASE_SECONDS)
+            except Exception as e:
+                logger.warning(f"Could not renew the lease on bulk job {job_id}: {str(e)}")
+
+    async def _finish(self, job: BulkJobStatus) -> None:
+        job.finished_at = datetime.now()
+        await self._save(job)
+        await self.store.ack(QUEUE_NAME, job.job_id)
+
+    async def worker_loop(self, poll_interval: float = 1.0) -> None:
+        while True:
+            try:
+                ran = await self.run_next()
+            except Exception as e:
+                logger.error(f"Bulk job worker error: {str(e)}")
+                ran = False
+            if not ran:
+                await asyncio.sleep(poll_interval)
+
+    async def _send(self, job_id: str, channel: str, payload: dict) -> dict:
+        campaign_id = f"job-{job_id}"
+        if channel == "whatsapp":
+            results = await WhatsAppService().send_bulk_messages(
+                payload["numbers"], payload["message"], campaign_id=campaign_id
+            )
+            statuses = [r.status for r in results]
+        else:
+            results = await SMSService().send_bulk_sms(payload["numbers"], payload["message"], campaign_id=campaign_id)
+            statuses = [r["status"] for r in results]
+
+        success_count = sum(1 for s in statuses if s == "success")
+        return {
+            "status": "completed",
+            "total_numbers": len(payload["numbers"]),
+            "successful": success_count,
+            "failed": len(statuses) - success_count,
+            "invalid_numbers": payload["invalid_numbers"],
+            "results": jsonable_encoder(results),
+            "message_sent": payload["message_sent"],
+            "campaign_id": campaign_id,
+        }
+
+    async def _save(self, job: BulkJobStatus) -> None:
+        await self.store.set(self._status_key(job.job_id), job.model_dump_json(), settings.BULK_JOB_RESULT_TTL_SECONDS)
+
+    @staticmethod
+    def _status_key(job_id: str) -> str:
+        return f"bulk_job:{job_id}:status"
+
+    @staticmethod
+    def _payload_key(job_id: str) -> str:
+        return f"bulk_job:{job_id}:payload"
+
+
+@lru_cache(maxsize=None)
+def get_bulk_job_queue() -> BulkJobQueue:
+    return BulkJobQueue(get_shared_store())
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Union
+from zoneinfo import ZoneInfo
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, run_in_session
+from app.models.campaign import Campaign
+from app.services.sender_pool import get_sender_pool
+from app.services.shared_state import GlobalRateLimiter
+from app.services.sms_service import SMSService
+from app.services.whatsapp_service import WhatsAppService
+
+logger = logging.getLogger(__name__)
+
+# Campaigns the scheduler still has to (finish) sending
+ACTIVE_STATUSES = ("scheduled", "running", "outside_window")
+
+
+def in_delivery_window(
+    now_utc: datetime, window_start: Optional[time], window_end: Optional[time], timezone: str
+) -> bool:
+    """Whether the local time in `timezone` falls in [window_start, window_end)"""
+    if window_start is None or window_end is None:
+        return True
+    local = now_utc.replace(tzinfo=dt_timezone.utc).astimezone(ZoneInfo(timezone)).time()
+    if window_start <= window_end:
+        return window_start <= local < window_end
+    return local >= window_start or local < window_end  # Window crosses midnight, e.g. 22:00-06:00
+
+
+class CampaignScheduler:
+    """
+    Sends scheduled campaigns from every worker process.
+
+    - A campaign starts at start_at and only sends inside its delivery window.
+      When the window closes, progress is checkpointed and sending resumes
+      the next time the window opens.
+    - max_rate_per_second caps the campaign across all workers. Its sends go
+      out at BULK priority, so single and transactional sends overtake them.
+    - A worker sends at most CAMPAIGN_MAX_RUNNING campaigns at a time.
+    - A worker claims a campaign through a lease in the database, so only one
+      worker sends it at a time. If that worker dies, another resumes from the
+      last checkpoint once the lease expires (the batch in flight may be sent
+      twice).
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self._running: Dict[int, asyncio.Task] = {}
+
+    async def run_forever(self, poll_interval: Optional[float] = None) -> None:
+        poll_interval = poll_interval or settings.CAMPAIGN_POLL_SECONDS
+        try:
+            while True:
+                try:
+                    await self.tick()
+                except Exception as e:
+                    logger.error(f"Campaign scheduler error: {str(e)}")
+                await asyncio.sleep(poll_interval)
+        finally:
+            for task in self._running.values():
+                task.cancel()
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    async def tick(self) -> List[int]:
+        """Start every due campaign this worker manages to claim; returns their ids"""
+        now = datetime.utcnow()
+        due = await run_in_session(self.session_factory, lambda db: db.query(
+            Campaign.id, Campaign.window_start, Campaign.window_end, Campaign.timezone
+        ).filter(
+            Campaign.status.in_(ACTIVE_STATUSES),
+            Campaign.start_at <= now,
+            or_(Campaign.lease_until.is_(None), Campaign.lease_until < now),
+        ).all())
+
+        started = []
+        for campaign_id, window_start, window_end, timezone in due:
+            if len(self._running) >= settings.CAMPAIGN_MAX_RUNNING:
+                break  # The rest wait for a later tick, or for another worker
+            if campaign_id in self._running or not in_delivery_window(now, window_start, window_end, timezone):
+                continue
+            if not await run_in_session(self.session_factory, lambda db: self._claim(db, campaign_id, now)):
+                continue  # Another worker got it first
+            task = asyncio.create_task(self._run(campaign_id))
+            self._running[campaign_id] = task
+            task.add_done_callback(lambda _, cid=campaign_id: self._running.pop(cid, None))
+            started.append(campaign_id)
+        return started
+
+    @staticmethod
+    def _claim(db: Session, campaign_id: int, now: datetime) -> bool:
+        result = db.execute(
+            update(Campaign)
+            .where(
+                Campaign.id == campaign_id,
+                Campaign.status.in_(ACTIVE_STATUSES),
+                or_(Campaign.lease_until.is_(None), Campaign.lease_until < now),
+            )
+            .values(
+                status="running",
+                lease_until=now + timedelta(seconds=settings.CAMPAIGN_LEASE_SECONDS),
+                started_at=func.coalesce(Campaign.started_at, now),
+            )
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    async def _run(self, campaign_id: int) -> None:
+        campaign = await run_in_session(self.session_factory, lambda db: db.get(Campaign, campaign_id))
+        numbers = json.loads(campaign.recipients)
+        messages: Union[str, List[str]] = json.loads(campaign.messages) if campaign.messages else campaign.message
+        limiter = (
+            GlobalRateLimiter(f"campaign:{campaign_id}", campaign.max_rate_per_second)
+            if campaign.max_rate_per_second else None
+        )
+        batch_size = self._batch_size(campaign.channel, campaign.max_rate_per_second)
+        index = campaign.next_index or 0
+
+        try:
+            while index < len(numbers):
+                now = datetime.utcnow()
+                status = await run_in_session(
+                    self.session_factory,
+                    lambda db: db.query(Campaign.status).filter(Campaign.id == campaign_id).scalar()
+                )
+                if status == "cancelled":
+                    logger.info(f"Campaign {campaign_id} cancelled at {index}/{len(numbers)}")
+                    return
+                if not in_delivery_window(now, campaign.window_start, campaign.window_end, campaign.timezone):
+                    logger.info(f"Campaign {campaign_id} paused outside its delivery window at {index}/{len(numbers)}")
+                    await self._update(campaign_id, status="outside_window")
+                    return
+
+                end = min(index + batch_size, len(numbers))
+                batch_messages = messages if isinstance(messages, str) else messages[index:end]
+                statuses = await self._send_batch(
+                    campaign_id, campaign.channel, numbers[index:end], batch_messages, limiter
+                )
+                sent = sum(1 for s in statuses if s == "success")
+
+                await self._update(
+                    campaign_id,
+                    next_index=end,
+                    sent_count=Campaign.sent_count + sent,
+                    failed_count=Campaign.failed_count + (len(statuses) - sent),
+                    lease_until=datetime.utcnow() + timedelta(seconds=settings.CAMPAIGN_LEASE_SECONDS),
+                )
+                index = end
+
+            await self._update(campaign_id, status="completed", finished_at=datetime.utcnow())
+            logger.info(f"Campaign {campaign_id} completed")
+        except asyncio.CancelledError:
+            # Shutting down: hand the campaign back so another worker can resume it right away
+            await self._update(campaign_id)
+            raise
+        except Exception as e:
+            logger.error(f"Campaign {campaign_id} failed: {str(e)}")
+            await self._update(campaign_id, status="failed", last_error=str(e), finished_at=datetime.utcnow())
+
+    async def _update(self, campaign_id: int, **values) -> None:
+        """Update the campaign and release its lease unless a new one is given; never revives a cancelled one"""
+        values.setdefault("lease_until", None)
+
+        def update_campaign(db: Session):
+            db.execute(
+                update(Campaign)
+                .where(Campaign.id == campaign_id, Campaign.status != "cancelled")
+                .values(**values)
+            )
+            db.commit()
+
+        await run_in_session(self.session_factory, update_campaign)
+
+    @staticmethod
+    def _batch_size(channel: str, max_rate_per_second: Optional[float]) -> int:
+        """Keep each batch well inside the lease, so progress is checkpointed before it expires"""
+        intervals = [s.limiter.interval for s in get_sender_pool(channel).senders]
+        if not intervals or any(i <= 0 for i in intervals):
+            rate = max_rate_per_second or 0.0
+        else:
+            senders_rate = sum(1.0 / i for i in intervals)
+            rate = min(senders_rate, max_rate_per_second or senders_rate)
+        if rate <= 0:
+            return settings.CAMPAIGN_BATCH_SIZE
+        return max(1, min(settings.CAMPAIGN_BATCH_SIZE, int(rate * settings.CAMPAIGN_LEASE_SECONDS / 2)))
+
+    @staticmethod
+    async def _send_batch(
+        campaign_id: int,
+        channel: str,
+        numbers: List[str],
+        message: Union[str, List[str]],
+        limiter: Optional[GlobalRateLimiter],
+    ) -> List[str]:
+        ledger_id = f"campaign-{campaign_id}"
+        if channel == "whatsapp":
+            results = await WhatsAppService().send_bulk_messages(
+                numbers, message, rate_limiter=limiter, campaign_id=ledger_id
+            )
+            return [r.status for r in results]
+
+        results = await SMSService().send_bulk_sms(numbers, message, rate_limiter=limiter, campaign_id=ledger_id)
+        return [r["status"] for r in results]
+
+
+@lru_cache(maxsize=None)
+def get_campaign_scheduler() -> CampaignScheduler:
+    return CampaignScheduler()
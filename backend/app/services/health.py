@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.database import engine
+from app.models.notification import OutboxNotification
+from app.services.bulk_jobs import get_bulk_job_queue
+from app.services.number_cache import get_number_cache
+from app.services.send_ledger import get_send_ledger
+from app.services.sender_pool import get_sender_pool
+from app.utils.file_handlers import excel_parse_pool
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "communication_api"
+
+# Event-loop lag is sampled this often; readiness looks at the worst sample of the window
+LAG_SAMPLE_SECONDS = 0.25
+LAG_WINDOW_SECONDS = 10.0
+
+CHANNELS = ("sms", "whatsapp")
+
+# Probe outcomes. "warn" is reported (and exported) but does not make the instance unready
+OK, WARN, FAIL = "ok", "warn", "fail"
+
+
+def _probe_database(busy_timeout_ms: int) -> int:
+    """
+    Check out a connection and run SELECT 1; on SQLite also take the write
+    lock for an instant, since reads still work while another process holds
+    it ("database is locked"). Returns the pending notification count, read
+    on the same connection.
+    """
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1")
+        if engine.dialect.name == "sqlite":
+            cursor.execute("PRAGMA busy_timeout")
+            previous = cursor.fetchone()[0]
+            cursor.execute(f"PRAGMA busy_timeout = {busy_timeout_ms}")
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("ROLLBACK")
+            finally:
+                cursor.execute(f"PRAGMA busy_timeout = {previous}")
+        cursor.execute(f"SELECT count(*) FROM {OutboxNotification.__tablename__} WHERE status = 'pending'")
+        pending = cursor.fetchone()[0]
+        cursor.close()
+        return pending
+    finally:
+        connection.close()
+
+
+def pool_usage() -> Tuple[Optional[int], Optional[int]]:
+    """(checked out, capacity) of the engine's connection pool; None where the pool has no limit"""
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return None, None
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    capacity = pool.size() + max_overflow if max_overflow >= 0 else None
+    return pool.checkedout(), capacity
+
+
+class HealthMonitor:
+    """
+    Readiness probes for the load balancer, run at most once per
+    HEALTH_CACHE_SECONDS however often they are polled: concurrent polls
+    share one run and later ones get the cached report.
+
+    Failing probes (the instance should get no traffic):
+    - database: connection, SELECT 1 and, on SQLite, the write lock, within
+      HEALTH_PROBE_TIMEOUT_SECONDS
+    - db_pool: share of pooled connections checked out
+    - event_loop: worst lag over the last few seconds, sampled by run_forever()
+    - twilio: a sender with credentials for at least one channel
+
+    Reported only (send_queue): queued bulk jobs, pending notifications,
+    buffered ledger rows and uploads being parsed. The bulk queue is shared
+    by every instance, so taking one out of rotation would not drain it.
+    """
+
+    def __init__(self):
+        self._report: Optional[Dict] = None
+        self._checked_at = 0.0
+        self._refresh: Optional[asyncio.Future] = None
+        self._db_probe: Optional[asyncio.Future] = None
+        self._lag_samples: Deque[Tuple[float, float]] = deque()  # (monotonic time, lag seconds)
+
+    # ---- Event-loop lag ----
+
+    async def run_forever(self) -> None:
+        """Sleep LAG_SAMPLE_SECONDS at a time and record how late each wake-up was"""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(LAG_SAMPLE_SECONDS)
+            now = time.monotonic()
+            self._lag_samples.append((now, max(0.0, now - start - LAG_SAMPLE_SECONDS)))
+            while self._lag_samples and self._lag_samples[0][0] < now - LAG_WINDOW_SECONDS:
+                self._lag_samples.popleft()
+
+    def event_loop_lag(self) -> Optional[float]:
+        """Worst lag in seconds over the window; None until the sampler has run"""
+        return max((lag for _, lag in self._lag_samples), default=None)
+
+    # ---- Readiness ----
+
+    async def check(self) -> Dict:
+        if self._report and time.monotonic() - self._checked_at < settings.HEALTH_CACHE_SECONDS:
+            return self._report
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._run_probes())
+        # Shielded: a poller that disconnects must not cancel the run the others wait on
+        return await asyncio.shield(self._refresh)
+
+    async def _run_probes(self) -> Dict:
+        # Pool first: the database probe itself checks out a connection
+        checks = {"db_pool": self._check_pool()}
+        checks["database"], outbox_pending = await self._check_database()
+        checks["event_loop"] = self._check_event_loop()
+        checks["twilio"] = self._check_twilio()
+        checks["send_queue"] = await self._check_send_queue(outbox_pending)
+
+        ready = all(check["status"] != FAIL for check in checks.values())
+        report = {
+            "status": "ready" if ready else "not_ready",
+            "checked_at": datetime.utcnow().isoformat(),
+            "checks": checks,
+        }
+        if not ready and (self._report is None or self._report["status"] == "ready"):
+            failing = [name for name, check in checks.items() if check["status"] == FAIL]
+            logger.warning(f"Instance not ready: {', '.join(failing)} failing")
+        elif ready and self._report is not None and self._report["status"] != "ready":
+            logger.info("Instance ready again")
+        self._report, self._checked_at = report, time.monotonic()
+        return report
+
+    def _check_pool(self) -> Dict:
+        checked_out, capacity = pool_usage()
+        check = {"status": OK, "checked_out": checked_out, "capacity": capacity}
+        if checked_out is not None and capacity:
+            check["utilization"] = round(checked_out / capacity, 3)
+            if check["utilization"] >= settings.HEALTH_MAX_POOL_UTILIZATION:
+                check["status"] = FAIL
+        return check
+
+    async def _check_database(self) -> Tuple[Dict, Optional[int]]:
+        timeout = settings.HEALTH_PROBE_TIMEOUT_SECONDS
+        if self._db_probe is not None and not self._db_probe.done():
+            # A thread cannot be interrupted; wait for the hung probe instead of piling up more
+            return {"status": FAIL, "error": "previous probe still running"}, None
+
+        start = time.perf_counter()
+        # SQLite gives up on the lock well within the timeout, so the error says "database is locked"
+        self._db_probe = asyncio.ensure_future(asyncio.to_thread(_probe_database, int(timeout * 500)))
+        self._db_probe.add_done_callback(lambda f: f.cancelled() or f.exception())  # Abandoned probes: error seen
+        try:
+            outbox_pending = await asyncio.wait_for(asyncio.shield(self._db_probe), timeout)
+        except asyncio.TimeoutError:
+            return {"status": FAIL, "error": f"no answer within {timeout}s"}, None
+        except Exception as e:
+            return {"status": FAIL, "error": str(e)}, None
+        return {"status": OK, "latency_ms": round((time.perf_counter() - start) * 1000, 1)}, outbox_pending
+
+    def _check_event_loop(self) -> Dict:
+        lag = self.event_loop_lag()
+        if lag is None:
+            return {"status": OK, "lag_ms": None}
+        lag_ms = round(lag * 1000, 1)
+        return {"status": FAIL if lag_ms > settings.HEALTH_MAX_EVENT_LOOP_LAG_MS else OK, "lag_ms": lag_ms}
+
+    def _check_twilio(self) -> Dict:
+        try:
+            senders = {channel: len(get_sender_pool(channel).senders) for channel in CHANNELS}
+        except Exception as e:
+            return {"status": FAIL, "senders": {}, "error": str(e)}
+        configured = any(senders.values())
+        status = OK if configured or not settings.HEALTH_REQUIRE_TWILIO else FAIL
+        return {"status": status, "senders": senders}
+
+    async def _check_send_queue(self, outbox_pending: Optional[int]) -> Dict:
+        check = {
+            "status": OK,
+            "bulk_jobs_queued": None,
+            "bulk_jobs_max_queued": settings.BULK_JOB_MAX_QUEUED,
+            "notifications_pending": outbox_pending,
+            "ledger_buffered": None,
+            "ledger_dropped": None,
+            "uploads_parsing": excel_parse_pool.pending,
+            "uploads_capacity": excel_parse_pool.max_workers + excel_parse_pool.max_queued,
+        }
+        try:
+            check["bulk_jobs_queued"] = await get_bulk_job_queue().depth()
+        except Exception as e:
+            check["status"] = WARN
+            check["error"] = str(e)
+        else:
+            if check["bulk_jobs_queued"] >= settings.BULK_JOB_MAX_QUEUED:
+                check["status"] = WARN
+
+        if settings.SEND_LEDGER_ENABLED:
+            ledger = get_send_ledger()
+            check["ledger_buffered"] = ledger.buffered
+            check["ledger_dropped"] = ledger.dropped
+        if excel_parse_pool.pending >= check["uploads_capacity"]:
+            check["status"] = WARN
+        return check
+
+    # ---- Metrics ----
+
+    def metrics(self, report: Dict) -> str:
+        """The report (plus a few counters) in the Prometheus text format"""
+        checks = report["checks"]
+        lines: List[str] = []
+
+        def gauge(name: str, help_text: str, samples: List[Tuple[str, Optional[float]]]) -> None:
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            for labels, value in samples:
+                if value is not None:
+                    lines.append(f"{METRIC_PREFIX}_{name}{labels} {value:g}")
+
+        gauge("ready", "1 when the instance passes its readiness probes", [("", report["status"] == "ready")])
+        gauge("probe_ok", "1 when the probe passes (warn counts as passing)", [
+            (f'{{probe="{name}"}}', check["status"] != FAIL) for name, check in checks.items()
+        ])
+        database_ms = checks["database"].get("latency_ms")
+        gauge("database_probe_seconds", "Time taken by the database probe",
+              [("", database_ms / 1000 if database_ms is not None else None)])
+        gauge("db_pool_checked_out", "Database connections in use", [("", checks["db_pool"]["checked_out"])])
+        gauge("db_pool_capacity", "Database connections the pool can open", [("", checks["db_pool"]["capacity"])])
+        lag_ms = checks["event_loop"]["lag_ms"]
+        gauge("event_loop_lag_seconds", f"Worst event-loop lag over the last {LAG_WINDOW_SECONDS:g}s",
+              [("", lag_ms / 1000 if lag_ms is not None else None)])
+        gauge("twilio_senders", "Senders with Twilio credentials", [
+            (f'{{channel="{channel}"}}', count) for channel, count in checks["twilio"]["senders"].items()
+        ])
+
+        queue = checks["send_queue"]
+        gauge("bulk_jobs_queued", "Bulk send jobs waiting in the shared queue", [("", queue["bulk_jobs_queued"])])
+        gauge("notifications_pending", "Ticket notifications waiting to be sent", [("", queue["notifications_pending"])])
+        gauge("uploads_parsing", "Uploaded sheets being parsed or waiting for a worker", [("", queue["uploads_parsing"])])
+        gauge("send_ledger_buffered", "Send attempts not yet written to the ledger", [("", queue["ledger_buffered"])])
+        if queue["ledger_dropped"] is not None:
+            lines.append(f"# HELP {METRIC_PREFIX}_send_ledger_dropped_total Send attempts dropped while the ledger buffer was full")
+            lines.append(f"# TYPE {METRIC_PREFIX}_send_ledger_dropped_total counter")
+            lines.append(f"{METRIC_PREFIX}_send_ledger_dropped_total {queue['ledger_dropped']}")
+        if settings.NUMBER_CACHE_ENABLED:
+            gauge("number_cache_entries", "Numbers skipped after a permanent Twilio error", [
+                (f'{{channel="{channel}"}}', len(get_number_cache(channel))) for channel in CHANNELS
+            ])
+        return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=None)
+def get_health_monitor() -> HealthMonitor:
+    return HealthMonitor()
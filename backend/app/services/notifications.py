@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, List, Optional, Set, Tuple
+from sqlalchemy import and_, exists, or_, update
+from sqlalchemy.orm import Session, aliased
+
+from app.config import settings
+from app.database import SessionLocal, run_in_session
+from app.models.notification import OutboxNotification
+from app.services.sender_pool import SendPriority, get_sender_pool
+from app.services.sms_service import SMSService
+from app.services.whatsapp_service import WhatsAppService
+from app.utils.validators import MobileNumberValidator
+
+logger = logging.getLogger(__name__)
+
+
+# ---- Write side: called inside the ticket mutation, before its commit ----
+def _enqueue(db: Session, ticket, event: str, topic: str, message: str) -> Optional[OutboxNotification]:
+    if not settings.NOTIFICATIONS_ENABLED:
+        return None
+    cleaned = MobileNumberValidator.clean_mobile_number(ticket.mobile_number)
+    if not cleaned:
+        logger.warning(f"Ticket {ticket.ticket_number} has no usable mobile number, not notifying")
+        return None
+
+    notification = OutboxNotification(
+        ticket_id=ticket.id,
+        event=event,
+        coalesce_key=f"ticket:{ticket.id}:{topic}",
+        channel=settings.NOTIFICATION_CHANNEL,
+        to_number=cleaned,
+        message=message,
+        status="pending",
+        # Held back briefly so a burst of changes collapses into one message
+        available_at=datetime.utcnow() + timedelta(seconds=settings.NOTIFICATION_COALESCE_SECONDS),
+    )
+    db.add(notification)
+    return notification
+
+
+def notify_ticket_created(db: Session, ticket) -> Optional[OutboxNotification]:
+    return _enqueue(
+        db, ticket, "ticket_created", "created",
+        f"Hi {ticket.name}, your ticket {ticket.ticket_number} has been registered. We will get back to you soon."
+    )
+
+
+def notify_status_changed(db: Session, ticket) -> Optional[OutboxNotification]:
+    return _enqueue(
+        db, ticket, "status_changed", "status",
+        f"Your ticket {ticket.ticket_number} is now {ticket.status}."
+    )
+
+
+def notify_comment_added(db: Session, ticket) -> Optional[OutboxNotification]:
+    # Comments include internal notes, so their text never goes to the customer
+    return _enqueue(
+        db, ticket, "comment_added", "comment",
+        f"There is a new update on your ticket {ticket.ticket_number}."
+    )
+
+
+# ---- Dispatch side ----
+class NotificationDispatcher:
+    """
+    Sends outbox rows in the background, at TRANSACTIONAL priority.
+
+    Each pass:
+    - coalesces: a pending row is superseded when a newer row has the same key
+      (e.g. three quick status changes end up as one message, with the final
+      status);
+    - claims a batch of due rows with a token and a lease, so several workers
+      can run dispatchers without sending a row twice;
+    - deduplicates: a message identical to the last one sent for its key, or
+      to another row in the batch for the same number, is skipped;
+    - sends the rest concurrently and retries failures with backoff.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self._warned_unconfigured = False
+
+    async def run_forever(self, poll_interval: Optional[float] = None) -> None:
+        poll_interval = poll_interval or settings.NOTIFICATION_POLL_SECONDS
+        while True:
+            try:
+                sent = await self.dispatch_due()
+            except Exception as e:
+                logger.error(f"Notification dispatcher error: {str(e)}")
+                sent = 0
+            if sent < settings.NOTIFICATION_BATCH_SIZE:
+                await asyncio.sleep(poll_interval)
+
+    async def dispatch_due(self) -> int:
+        """One pass over the outbox; returns how many rows were claimed"""
+        if not get_sender_pool(settings.NOTIFICATION_CHANNEL).senders:
+            if not self._warned_unconfigured:
+                logger.warning("No Twilio sender for notifications; outbox rows stay pending")
+                self._warned_unconfigured = True
+            return 0
+
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        batch = await run_in_session(self.session_factory, lambda db: self._claim(db, token, now))
+        if not batch:
+            return 0
+
+        to_send, skipped = await run_in_session(self.session_factory, lambda db: self._deduplicate(db, batch))
+        results = await asyncio.gather(*(self._send(n) for n in to_send))
+        await run_in_session(self.session_factory, lambda db: self._record(db, to_send, results, skipped))
+        return len(batch)
+
+    @staticmethod
+    def _claim(db: Session, token: str, now: datetime) -> List[OutboxNotification]:
+        newer = aliased(OutboxNotification)
+        db.execute(
+            update(OutboxNotification)
+            .where(
+                OutboxNotification.status == "pending",
+                exists().where(and_(
+                    newer.coalesce_key == OutboxNotification.coalesce_key,
+                    newer.id > OutboxNotification.id,
+                    newer.status.in_(("pending", "sending", "sent")),
+                )),
+            )
+            .values(status="superseded")
+            .execution_options(synchronize_session=False)
+        )
+
+        due_ids = [row_id for (row_id,) in db.query(OutboxNotification.id).filter(
+            or_(
+                and_(OutboxNotification.status == "pending", OutboxNotification.available_at <= now),
+                # Claimed by a worker that died before recording the outcome
+                and_(OutboxNotification.status == "sending", OutboxNotification.lease_until < now),
+            )
+        ).order_by(OutboxNotification.id).limit(settings.NOTIFICATION_BATCH_SIZE).all()]
+        if not due_ids:
+            db.commit()
+            return []
+
+        db.execute(
+            update(OutboxNotification)
+            .where(
+                OutboxNotification.id.in_(due_ids),
+                or_(
+                    OutboxNotification.status == "pending",
+                    and_(OutboxNotification.status == "sending", OutboxNotification.lease_until < now),
+                ),
+            )
+            .values(status="sending", claim_token=token, lease_until=now + timedelta(minutes=5))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        batch = db.query(OutboxNotification).filter(OutboxNotification.claim_token == token).all()
+        db.expunge_all()
+        return batch
+
+    @staticmethod
+    def _deduplicate(
+        db: Session, batch: List[OutboxNotification]
+    ) -> Tuple[List[OutboxNotification], List[OutboxNotification]]:
+        last_sent = dict(
+            db.query(OutboxNotification.coalesce_key, OutboxNotification.message)
+            .filter(
+                OutboxNotification.coalesce_key.in_({n.coalesce_key for n in batch}),
+                OutboxNotification.status == "sent",
+            )
+            .order_by(OutboxNotification.id)
+            .all()
+        )  # Later rows overwrite earlier ones, leaving the most recent per key
+
+        to_send, skipped = [], []
+        seen: Set[Tuple[str, str]] = set()
+        for notification in batch:
+            identity = (notification.to_number, notification.message)
+            if last_sent.get(notification.coalesce_key) == notification.message or identity in seen:
+                skipped.append(notification)
+            else:
+                seen.add(identity)
+                to_send.append(notification)
+        return to_send, skipped
+
+    @staticmethod
+    async def _send(notification: OutboxNotification) -> Tuple[bool, Optional[str], Optional[str]]:
+        """(success, message sid, error)"""
+        if notification.channel == "whatsapp":
+            result = await WhatsAppService().send_single_message(
+                notification.to_number, notification.message,
+                priority=SendPriority.TRANSACTIONAL, campaign_id="notifications"
+            )
+            return result.status == "success", result.message_sid, result.error
+
+        result = await SMSService().send_single_sms(
+            notification.to_number, notification.message,
+            priority=SendPriority.TRANSACTIONAL, campaign_id="notifications"
+        )
+        return result["status"] == "success", result.get("sid"), result.get("error")
+
+    @staticmethod
+    def _record(
+        db: Session,
+        sent: List[OutboxNotification],
+        results: List[Tuple[bool, Optional[str], Optional[str]]],
+        skipped: List[OutboxNotification],
+    ) -> None:
+        now = datetime.utcnow()
+        for notification in skipped:
+            db.query(OutboxNotification).filter(OutboxNotification.id == notification.id).update(
+                {"status": "skipped", "lease_until": None}
+            )
+
+        for notification, (success, message_sid, error) in zip(sent, results):
+            attempts = (notification.attempts or 0) + 1
+            values = {"attempts": attempts, "lease_until": None}
+            if success:
+                values.update(status="sent", sent_at=now, message_sid=message_sid)
+            elif attempts < settings.NOTIFICATION_MAX_ATTEMPTS:
+                backoff = settings.NOTIFICATION_POLL_SECONDS * 2 ** attempts
+                values.update(status="pending", last_error=error, available_at=now + timedelta(seconds=backoff))
+            else:
+                logger.error(f"Giving up on notification {notification.id} after {attempts} attempts: {error}")
+                values.update(status="failed", last_error=error)
+            db.query(OutboxNotification).filter(OutboxNotification.id == notification.id).update(values)
+        db.commit()
+
+
+@lru_cache(maxsize=None)
+def get_notification_dispatcher() -> NotificationDispatcher:
+    return NotificationDispatcher()
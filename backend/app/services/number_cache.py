@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import os
+import re
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Twilio errors that will fail again for the same number, whatever the message
+PERMANENT_ERROR_CODES = frozenset({
+    21211,  # Invalid 'To' phone number
+    21214,  # 'To' phone number cannot be reached
+    21217,  # Phone number does not appear to be valid
+    21401,  # Invalid phone number
+    21421,  # Phone number is invalid
+    21610,  # Recipient replied STOP (until they opt back in; the TTL covers that)
+    21612,  # Cannot route to this number
+    21614,  # 'To' is not a valid mobile number (e.g. a landline)
+    63003,  # WhatsApp: channel could not find the 'To' address
+    63024,  # WhatsApp: invalid message recipient
+})
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Expired entries are ignored by lookups; they are dropped from the arrays this often
+COMPACT_INTERVAL_SECONDS = 24 * 60 * 60
+
+HEADER = struct.Struct("<4sI")  # magic, entry count
+MAGIC = b"NNC1"
+
+
+def number_key(number: str) -> Optional[int]:
+    """E.164 number as an integer (at most 15 digits, so it fits in 64 bits)"""
+    digits = number[1:] if number.startswith("+") else number
+    if not digits.isdigit():
+        digits = re.sub(r"\D", "", number)
+    return int(digits) if 0 < len(digits) <= 15 else None
+
+
+class NegativeNumberCache:
+    """
+    Numbers that Twilio rejected with a permanent error, so later sends to
+    them can be skipped without an API call or a rate-limit slot.
+
+    Entries live in three parallel arrays sorted by number (uint64 number,
+    uint32 expiry, uint16 error code: 14 bytes each), searched with bisect,
+    and are stored on disk in the same layout. Failures recorded since the
+    last save sit in a small dict and are merged in by save(). Every worker
+    process keeps its own copy; save() merges with what the others wrote to
+    the file, so all of them converge within one save interval. (Two workers
+    saving at the same instant can lose one side's new entries; such a
+    number is simply sent to once more and recorded again.)
+    """
+
+    def __init__(self, path: Optional[str], ttl_seconds: int, enabled: bool = True):
+        self.path = path  # None keeps the cache in memory only
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: Tuple[array, array, array] = (array("Q"), array("I"), array("H"))
+        self._pending: Dict[int, Tuple[int, int]] = {}  # number -> (expires_at, error_code)
+        self._compacted_at = 0.0
+        if path and enabled:
+            self._entries = self._read(path)
+
+    def __len__(self) -> int:
+        return len(self._entries[0]) + len(self._pending)
+
+    def lookup(self, number: str) -> Optional[int]:
+        """The permanent error code this number failed with, if it has not expired"""
+        key = number_key(number) if self.enabled else None
+        if key is None:
+            return None
+        now = time.time()
+
+        pending = self._pending.get(key)
+        if pending and pending[0] > now:
+            return pending[1]
+
+        numbers, expires, codes = self._entries
+        i = bisect_left(numbers, key)
+        if i < len(numbers) and numbers[i] == key and expires[i] > now:
+            return codes[i]
+        return None
+
+    def add(self, number: str, error_code: int) -> None:
+        key = number_key(number)
+        if key is not None:
+            self._pending[key] = (int(time.time()) + self.ttl_seconds, error_code)
+
+    def record_failure(self, number: str, error_code: Optional[int]) -> None:
+        """Remember the number if Twilio's error code says retrying is pointless"""
+        if self.enabled and error_code in PERMANENT_ERROR_CODES:
+            self.add(number, error_code)
+
+    async def run_forever(self, save_interval: Optional[float] = None) -> None:
+        save_interval = save_interval or settings.NUMBER_CACHE_SAVE_SECONDS
+        try:
+            while True:
+                await asyncio.sleep(save_interval)
+                try:
+                    await self.save()
+                except Exception as e:
+                    logger.error(f"Could not save the number cache: {str(e)}")
+        finally:
+            await self.save()
+
+    async def save(self) -> None:
+        """Merge new failures with the file (and drop expired entries), then swap the result in"""
+        pending = dict(self._pending)
+        compact = time.time() - self._compacted_at > COMPACT_INTERVAL_SECONDS
+        if compact:
+            self._compacted_at = time.time()
+
+        if not self.path:
+            if pending or compact:
+                self._entries = await asyncio.to_thread(self._merge, self._entries, pending, compact)
+                self._clear_pending(pending)
+            return
+
+        if not pending and not (compact and self._entries[0]):
+            # Nothing new here; pick up what the other workers saved
+            self._entries = await asyncio.to_thread(self._read, self.path)
+            return
+
+        def merge_and_write():
+            merged = self._merge(self._read(self.path), pending, compact)
+            self._write(self.path, merged)
+            return merged
+
+        self._entries = await asyncio.to_thread(merge_and_write)
+        self._clear_pending(pending)
+
+    def _clear_pending(self, saved: Dict[int, Tuple[int, int]]) -> None:
+        # Keep anything recorded (or re-recorded) while the save was running
+        for key, value in saved.items():
+            if self._pending.get(key) == value:
+                del self._pending[key]
+
+    @staticmethod
+    def _merge(
+        entries: Tuple[array, array, array], pending: Dict[int, Tuple[int, int]], compact: bool = False
+    ) -> Tuple[array, array, array]:
+        numbers, expires, codes = entries
+        if compact and expires:
+            # Vectorised, so millions of entries do not hold the GIL for long; numpy comes with pandas
+            import numpy as np
+            keep = np.frombuffer(expires, dtype=np.uint32) > int(time.time())
+            numbers, expires, codes = (
+                array(column.typecode, np.frombuffer(column, dtype=dtype)[keep].tobytes())
+                for column, dtype in ((numbers, np.uint64), (expires, np.uint32), (codes, np.uint16))
+            )
+
+        # One pass of slice copies: the runs between new entries are copied as memory blocks
+        merged = (array("Q"), array("I"), array("H"))
+        start = 0
+        for key, (expires_at, code) in sorted(pending.items()):
+            i = bisect_left(numbers, key, start)
+            for column, source in zip(merged, (numbers, expires, codes)):
+                column.extend(source[start:i])
+            merged[0].append(key)
+            merged[1].append(expires_at)
+            merged[2].append(code)
+            start = i + 1 if i < len(numbers) and numbers[i] == key else i  # An existing entry is replaced
+        for column, source in zip(merged, (numbers, expires, codes)):
+            column.extend(source[start:])
+        return merged
+
+    @staticmethod
+    def _read(path: str) -> Tuple[array, array, array]:
+        numbers, expires, codes = array("Q"), array("I"), array("H")
+        try:
+            with open(path, "rb") as f:
+                magic, count = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC:
+                    raise ValueError("not a number cache file")
+                numbers.fromfile(f, count)
+                expires.fromfile(f, count)
+                codes.fromfile(f, count)
+        except FileNotFoundError:
+            pass
+        except (EOFError, ValueError, struct.error) as e:
+            logger.warning(f"Ignoring unreadable number cache {path}: {str(e)}")
+            return array("Q"), array("I"), array("H")
+        return numbers, expires, codes
+
+    @staticmethod
+    def _write(path: str, entries: Tuple[array, array, array]) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(entries[0])))
+            for column in entries:
+                column.tofile(f)
+        os.replace(tmp_path, path)  # Readers see the old file or the new one, never half of it
+
+
+@lru_cache(maxsize=None)
+def get_number_cache(channel: str) -> NegativeNumberCache:
+    """
+    Process-wide cache per channel: a landline fails for SMS, a number
+    without WhatsApp only for WhatsApp.
+    """
+    path = os.path.join(settings.NUMBER_CACHE_DIR or BASE_DIR, f"negative_numbers_{channel}.bin")
+    return NegativeNumberCache(path, settings.NUMBER_CACHE_TTL_DAYS * 24 * 60 * 60, settings.NUMBER_CACHE_ENABLED)
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import case, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.send_ledger import CampaignSendStats, SendRecord
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("parquet", "arrow")
+
+
+class SendLedger:
+    """
+    Appends every send attempt to the send_ledger table.
+
+    record() only appends to an in-memory buffer, so sending never waits on
+    the database. run_forever() writes the buffer in batches (one executemany
+    insert per batch) and folds each batch into the per-campaign totals in
+    send_ledger_rollup, which is what the stats API reads. Attempts still in
+    the buffer are not visible yet; at most SEND_LEDGER_MAX_BUFFERED are
+    held, beyond that new ones are dropped and counted.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self._buffer: List[Dict] = []
+        self._batch_ready: Optional[asyncio.Event] = None  # Created on the loop running the flusher
+        self.dropped = 0
+
+    @property
+    def buffered(self) -> int:
+        """Send attempts recorded but not yet written"""
+        return len(self._buffer)
+
+    def record(
+        self,
+        campaign_id: Optional[str],
+        channel: str,
+        number: str,
+        status: str,
+        latency_ms: float,
+        message_sid: Optional[str] = None,
+        error: Optional[str] = None,
+        error_code: Optional[int] = None,
+    ) -> None:
+        if not settings.SEND_LEDGER_ENABLED:
+            return
+        if len(self._buffer) >= settings.SEND_LEDGER_MAX_BUFFERED:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Send ledger buffer full, {self.dropped} attempts dropped so far")
+            return
+
+        self._buffer.append({
+            "campaign_id": campaign_id,
+            "channel": channel,
+            "number": number,
+            "status": status,
+            "message_sid": message_sid,
+            "error_code": error_code,
+            "error": error,
+            "latency_ms": round(latency_ms, 1),
+            "sent_at": datetime.utcnow(),
+        })
+        if self._batch_ready and len(self._buffer) >= settings.SEND_LEDGER_BATCH_SIZE:
+            self._batch_ready.set()
+
+    async def run_forever(self, flush_interval: Optional[float] = None) -> None:
+        flush_interval = flush_interval or settings.SEND_LEDGER_FLUSH_SECONDS
+        self._batch_ready = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), timeout=flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                await self.flush()
+        finally:
+            # Shutting down: write what is left
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written"""
+        written = 0
+        while self._buffer:
+            batch = self._buffer[:settings.SEND_LEDGER_BATCH_SIZE]
+            del self._buffer[:len(batch)]
+            if self._batch_ready:
+                self._batch_ready.clear()
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                logger.error(f"Send ledger write failed, {len(batch)} attempts kept for the next flush: {str(e)}")
+                self._buffer[:0] = batch
+                break
+            written += len(batch)
+        return written
+
+    def _write(self, rows: List[Dict]) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(insert(SendRecord), rows)
+            for campaign_id, totals in self._rollup(rows).items():
+                self._add_to_rollup(db, campaign_id, totals)
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _rollup(rows: List[Dict]) -> Dict[str, Dict]:
+        totals: Dict[str, Dict] = defaultdict(lambda: {
+            "attempts": 0, "successful": 0, "latency_ms_total": 0.0, "first": None, "last": None,
+        })
+        for row in rows:
+            if row["campaign_id"] is None:
+                continue
+            t = totals[row["campaign_id"]]
+            t["channel"] = row["channel"]
+            t["attempts"] += 1
+            t["successful"] += row["status"] == "success"
+            t["latency_ms_total"] += row["latency_ms"]
+            t["first"] = min(t["first"] or row["sent_at"], row["sent_at"])
+            t["last"] = max(t["last"] or row["sent_at"], row["sent_at"])
+        return totals
+
+    @staticmethod
+    def _add_to_rollup(db: Session, campaign_id: str, totals: Dict) -> None:
+        stats = CampaignSendStats
+        increment = (
+            update(stats)
+            .where(stats.campaign_id == campaign_id)
+            .values(
+                attempts=stats.attempts + totals["attempts"],
+                successful=stats.successful + totals["successful"],
+                failed=stats.failed + (totals["attempts"] - totals["successful"]),
+                latency_ms_total=stats.latency_ms_total + totals["latency_ms_total"],
+                first_sent_at=case((stats.first_sent_at > totals["first"], totals["first"]), else_=stats.first_sent_at),
+                last_sent_at=case((stats.last_sent_at < totals["last"], totals["last"]), else_=stats.last_sent_at),
+            )
+        )
+        if db.execute(increment).rowcount:
+            return
+
+        try:
+            with db.begin_nested():
+                db.add(CampaignSendStats(
+                    campaign_id=campaign_id,
+                    channel=totals["channel"],
+                    attempts=totals["attempts"],
+                    successful=totals["successful"],
+                    failed=totals["attempts"] - totals["successful"],
+                    latency_ms_total=totals["latency_ms_total"],
+                    first_sent_at=totals["first"],
+                    last_sent_at=totals["last"],
+                ))
+        except IntegrityError:
+            # Another worker created the row in the meantime
+            db.execute(increment)
+
+
+def export_ledger(
+    path: str, fmt: str, campaign_id: Optional[str] = None, since: Optional[datetime] = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> int:
+    """
+    Write the ledger (optionally one campaign, optionally from `since`) to
+    `path` as Parquet or an Arrow IPC file, reading it in id order in chunks
+    of SEND_LEDGER_EXPORT_CHUNK_ROWS. Needs the optional pyarrow package.
+    Returns the number of rows written.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Ledger export needs the 'pyarrow' package, which is not installed")
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("campaign_id", pa.string()),
+        ("channel", pa.string()),
+        ("number", pa.string()),
+        ("status", pa.string()),
+        ("message_sid", pa.string()),
+        ("error_code", pa.int32()),
+        ("error", pa.string()),
+        ("latency_ms", pa.float32()),
+        ("sent_at", pa.timestamp("ms")),
+    ])
+    columns = [getattr(SendRecord, name) for name in schema.names]
+
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = ipc.new_file(path, schema, options=ipc.IpcWriteOptions(compression="zstd"))
+
+    db = session_factory()
+    written, last_id = 0, 0
+    try:
+        while True:
+            query = db.query(*columns).filter(SendRecord.id > last_id)
+            if campaign_id is not None:
+                query = query.filter(SendRecord.campaign_id == campaign_id)
+            if since is not None:
+                query = query.filter(SendRecord.sent_at >= since)
+            rows = query.order_by(SendRecord.id).limit(settings.SEND_LEDGER_EXPORT_CHUNK_ROWS).all()
+            if not rows:
+                break
+
+            # Parquet dictionary-encodes the repetitive columns (channel, status, campaign_id) itself
+            chunk = pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+                schema=schema,
+            )
+            writer.write_table(chunk)
+            written += len(rows)
+            last_id = rows[-1][0]
+    finally:
+        db.close()
+        writer.close()
+    return written
+
+
+@lru_cache(maxsize=None)
+def get_send_ledger() -> SendLedger:
+    return SendLedger()
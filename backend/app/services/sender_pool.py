@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from enum import IntEnum
+from functools import lru_cache
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, TypeVar
+from twilio.base.exceptions import TwilioRestException
+
+from app.config import settings, SenderConfig
+from app.services.shared_state import GlobalRateLimiter
+
+if TYPE_CHECKING:
+    # twilio.rest (and requests) is imported when the first client is built
+    from twilio.rest import Client
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses that point at the sender/account rather than the recipient
+SENDER_FAULT_STATUSES = {401, 403, 429}
+
+
+class SendPriority(IntEnum):
+    """Who gets a sender's next rate-limit slot first (lower value wins)"""
+    TRANSACTIONAL = 0  # System notifications, e.g. ticket updates
+    INTERACTIVE = 1  # /send-single
+    BULK = 2  # /send-bulk, background jobs and campaigns
+
+
+@lru_cache(maxsize=None)
+def get_twilio_client(account_sid: str, auth_token: str) -> "Client":
+    """One Twilio client per (sub-)account, shared by all senders on it"""
+    from twilio.rest import Client
+
+    client = Client(account_sid, auth_token)
+    if settings.TWILIO_API_BASE_URL:
+        client.api.base_url = settings.TWILIO_API_BASE_URL.rstrip("/")
+    return client
+
+
+def is_sender_fault(error: Exception) -> bool:
+    """
+    Decide whether an error should count against the sender's health.
+    Recipient problems (invalid number, not on WhatsApp, ...) do not.
+    """
+    if isinstance(error, TwilioRestException):
+        return error.status in SENDER_FAULT_STATUSES or error.status >= 500
+    # Network errors, timeouts, auth problems raised before a response
+    return True
+
+
+class Sender:
+    """A single sending number with its own rate limit and health state"""
+
+    def __init__(self, config: SenderConfig, client: "Client"):
+        self.channel = config.channel
+        self.from_number = config.from_number
+        self.account_sid = config.account_sid or settings.TWILIO_ACCOUNT_SID
+        self.weight = max(config.weight, 1)
+        self.client = client
+        self.key = f"{self.account_sid}:{self.from_number}"
+        # Shared by every worker process when SHARED_STATE_URL is set
+        self.limiter = GlobalRateLimiter(f"sender:{self.key}", config.rate_per_second)
+
+        self.consecutive_failures = 0
+        self.disabled_until = 0.0
+
+    def is_available(self, now: Optional[float] = None) -> bool:
+        """True unless the sender is cooling down after repeated errors"""
+        return (now or time.monotonic()) >= self.disabled_until
+
+    async def acquire(self, priority: SendPriority = SendPriority.INTERACTIVE) -> None:
+        """Wait for this sender's next free rate-limit slot; urgent sends go ahead of bulk"""
+        await self.limiter.acquire(priority)
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= settings.SENDER_FAILURE_THRESHOLD:
+            self.disabled_until = time.monotonic() + settings.SENDER_COOLDOWN_SECONDS
+            self.consecutive_failures = 0
+            logger.warning(
+                f"Sender {self.from_number} taken out of rotation for "
+                f"{settings.SENDER_COOLDOWN_SECONDS}s after repeated errors"
+            )
+
+    def score(self, recipient: str) -> float:
+        """Weighted rendezvous score: the highest-scoring sender owns the recipient"""
+        digest = hashlib.blake2b(f"{self.key}|{recipient}".encode(), digest_size=8).digest()
+        u = (int.from_bytes(digest, "big") + 1) / (2 ** 64 + 2)  # (0, 1)
+        return -self.weight / math.log(u)
+
+
+class SenderPool:
+    """
+    Shards recipients across several senders.
+
+    Recipients are assigned with weighted rendezvous hashing, so a number keeps
+    going out through the same sender for as long as that sender is healthy,
+    and only the numbers of a failed sender move elsewhere.
+    """
+
+    def __init__(self, channel: str, senders: List[Sender]):
+        self.channel = channel
+        self.senders = senders
+
+    def available_senders(self) -> List[Sender]:
+        now = time.monotonic()
+        healthy = [s for s in self.senders if s.is_available(now)]
+        # If everything is cooling down, keep trying rather than failing outright
+        return healthy or self.senders
+
+    def pick(self, recipient: str) -> Sender:
+        """Sticky, weighted, health-aware sender for a recipient"""
+        return max(self.available_senders(), key=lambda s: s.score(recipient))
+
+    def shard(self, recipients: List[str]) -> Dict[Sender, List[int]]:
+        """Group recipient indexes by the sender that owns them"""
+        candidates = self.available_senders()
+        shards: Dict[Sender, List[int]] = {}
+        for idx, recipient in enumerate(recipients):
+            sender = max(candidates, key=lambda s: s.score(recipient))
+            shards.setdefault(sender, []).append(idx)
+        return shards
+
+    async def dispatch(
+        self,
+        recipients: List[str],
+        send: Callable[[int, Sender], Awaitable[T]],
+    ) -> List[T]:
+        """
+        Run send(index, sender) for every recipient, one concurrent loop per
+        sender, and return results in the original order.
+        """
+        results: List[Optional[T]] = [None] * len(recipients)
+
+        async def run_shard(sender: Sender, indexes: List[int]):
+            for idx in indexes:
+                current = sender if sender.is_available() else self.pick(recipients[idx])
+                results[idx] = await send(idx, current)
+
+        await asyncio.gather(*(run_shard(s, idx) for s, idx in self.shard(recipients).items()))
+        return results
+
+
+def _default_sender_config(channel: str) -> Optional[SenderConfig]:
+    """Single-sender fallback built from the legacy settings"""
+    from_number = settings.TWILIO_WHATSAPP_FROM if channel == "whatsapp" else settings.TWILIO_PHONE_NUMBER
+    if not from_number:
+        return None
+    rate = 1.0 / settings.MESSAGE_DELAY_SECONDS if settings.MESSAGE_DELAY_SECONDS > 0 else 0.0
+    return SenderConfig(channel=channel, from_number=from_number, rate_per_second=rate)
+
+
+@lru_cache(maxsize=None)
+def get_sender_pool(channel: str) -> SenderPool:
+    """Process-wide pool per channel, so pacing and health survive across requests"""
+    configs = [c for c in settings.TWILIO_SENDER_POOL if c.channel == channel]
+    if not configs:
+        default = _default_sender_config(channel)
+        configs = [default] if default else []
+
+    senders = []
+    for config in configs:
+        account_sid = config.account_sid or settings.TWILIO_ACCOUNT_SID
+        auth_token = config.auth_token or settings.TWILIO_AUTH_TOKEN
+        if not account_sid or not auth_token:
+            logger.warning(f"No Twilio credentials for sender {config.from_number}, skipping")
+            continue
+        senders.append(Sender(config, get_twilio_client(account_sid, auth_token)))
+
+    return SenderPool(channel, senders)
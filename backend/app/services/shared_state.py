@@ -0,0 +1,451 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Expired key/values are deleted by writes at most this often (Redis expires them itself)
+PURGE_INTERVAL_SECONDS = 60
+
+
+class SharedStore(ABC):
+    """
+    State that has to be shared by every worker process: rate-limit slots,
+    the bulk-job queue, job status records and Idempotency-Key responses.
+
+    Backends, chosen by SHARED_STATE_URL:
+    - ""            -> MemoryStore (single process, the default)
+    - "sqlite:///p" -> SQLiteStore (all workers on one host; also the local stand-in for tests)
+    - "redis://..." -> RedisStore (multi-node, needs the optional `redis` package)
+    """
+
+    @abstractmethod
+    async def reserve_slot(self, key: str, interval: float) -> float:
+        """
+        Reserve the next send slot for `key`, spaced `interval` seconds apart
+        across all workers (GCRA). Returns how long the caller must wait.
+        """
+
+    @abstractmethod
+    async def push(self, queue: str, item: str) -> None:
+        ...
+
+    @abstractmethod
+    async def claim(self, queue: str, lease_seconds: float) -> Optional[str]:
+        """
+        Oldest item of the queue (None when it is empty), leased to the caller
+        for lease_seconds. It stays in the store until ack(); if the lease
+        runs out first (the worker died), claim() hands it out again.
+        """
+
+    @abstractmethod
+    async def extend(self, queue: str, item: str, lease_seconds: float) -> None:
+        """Renew the lease on a claimed item"""
+
+    @abstractmethod
+    async def ack(self, queue: str, item: str) -> None:
+        """Remove a claimed item for good"""
+
+    @abstractmethod
+    async def queue_length(self, queue: str) -> int:
+        """Items waiting to be claimed (including ones whose lease ran out)"""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> None:
+        ...
+
+    @abstractmethod
+    async def set_if_absent(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> bool:
+        """Atomically set the key unless it holds an unexpired value; True when it was set"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+
+class MemoryStore(SharedStore):
+    """In-process store, only correct with a single worker"""
+
+    def __init__(self):
+        self._slots: Dict[str, float] = {}
+        self._queues: Dict[str, List[str]] = {}
+        self._leases: Dict[str, Dict[str, float]] = {}  # queue -> claimed item -> lease expiry
+        self._values: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._purged_at = time.time()
+
+    async def reserve_slot(self, key: str, interval: float) -> float:
+        now = time.time()
+        slot = max(now, self._slots.get(key, 0.0))
+        self._slots[key] = slot + interval
+        return slot - now
+
+    async def push(self, queue: str, item: str) -> None:
+        self._queues.setdefault(queue, []).append(item)
+
+    async def claim(self, queue: str, lease_seconds: float) -> Optional[str]:
+        now = time.time()
+        leases = self._leases.setdefault(queue, {})
+        item = next((i for i, expires_at in leases.items() if expires_at < now), None)
+        if item is None:
+            items = self._queues.get(queue)
+            if not items:
+                return None
+            item = items.pop(0)
+        leases[item] = now + lease_seconds
+        return item
+
+    async def extend(self, queue: str, item: str, lease_seconds: float) -> None:
+        leases = self._leases.get(queue, {})
+        if item in leases:
+            leases[item] = time.time() + lease_seconds
+
+    async def ack(self, queue: str, item: str) -> None:
+        self._leases.get(queue, {}).pop(item, None)
+
+    async def queue_length(self, queue: str) -> int:
+        now = time.time()
+        expired = sum(1 for expires_at in self._leases.get(queue, {}).values() if expires_at < now)
+        return len(self._queues.get(queue, [])) + expired
+
+    async def set(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> None:
+        now = time.time()
+        if now - self._purged_at > PURGE_INTERVAL_SECONDS:
+            self._purged_at = now
+            self._values = {k: v for k, v in self._values.items() if v[1] is None or v[1] >= now}
+        self._values[key] = (value, now + ttl_seconds if ttl_seconds else None)
+
+    async def set_if_absent(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> bool:
+        # No await in between, so nothing else runs between the check and the set
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl_seconds)
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        value, expires_at = self._values.get(key, (None, None))
+        if expires_at is not None and expires_at < time.time():
+            self._values.pop(key, None)
+            return None
+        return value
+
+    async def delete(self, key: str) -> None:
+        self._values.pop(key, None)
+
+
+class SQLiteStore(SharedStore):
+    """
+    Store in a SQLite file, shared by every process on the host.
+    Each operation is one short IMMEDIATE transaction, so slot reservations
+    and queue claims are atomic across processes.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rate_slots (key TEXT PRIMARY KEY, next_slot REAL NOT NULL);
+        CREATE TABLE IF NOT EXISTS queue_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, queue TEXT NOT NULL, item TEXT NOT NULL, lease_until REAL
+        );
+        CREATE INDEX IF NOT EXISTS ix_queue_items_queue ON queue_items (queue, id);
+        CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL);
+        CREATE INDEX IF NOT EXISTS ix_kv_expires_at ON kv (expires_at);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._purged_at = time.time()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+            # Files created before queue items had leases
+            if "lease_until" not in {row[1] for row in conn.execute("PRAGMA table_info(queue_items)")}:
+                conn.execute("ALTER TABLE queue_items ADD COLUMN lease_until REAL")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, fn):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def reserve_slot(self, key: str, interval: float) -> float:
+        def reserve(conn):
+            now = time.time()
+            row = conn.execute("SELECT next_slot FROM rate_slots WHERE key = ?", (key,)).fetchone()
+            slot = max(now, row[0] if row else 0.0)
+            conn.execute(
+                "INSERT INTO rate_slots (key, next_slot) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET next_slot = excluded.next_slot",
+                (key, slot + interval),
+            )
+            return slot - now
+
+        return await asyncio.to_thread(self._transaction, reserve)
+
+    async def push(self, queue: str, item: str) -> None:
+        await asyncio.to_thread(
+            self._transaction,
+            lambda conn: conn.execute("INSERT INTO queue_items (queue, item) VALUES (?, ?)", (queue, item)),
+        )
+
+    async def claim(self, queue: str, lease_seconds: float) -> Optional[str]:
+        def claim(conn):
+            now = time.time()
+            row = conn.execute(
+                "SELECT id, item FROM queue_items WHERE queue = ? AND (lease_until IS NULL OR lease_until < ?) "
+                "ORDER BY id LIMIT 1",
+                (queue, now),
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE queue_items SET lease_until = ? WHERE id = ?", (now + lease_seconds, row[0]))
+            return row[1]
+
+        return await asyncio.to_thread(self._transaction, claim)
+
+    async def extend(self, queue: str, item: str, lease_seconds: float) -> None:
+        await asyncio.to_thread(
+            self._transaction,
+            lambda conn: conn.execute(
+                "UPDATE queue_items SET lease_until = ? WHERE queue = ? AND item = ? AND lease_until IS NOT NULL",
+                (time.time() + lease_seconds, queue, item),
+            ),
+        )
+
+    async def ack(self, queue: str, item: str) -> None:
+        await asyncio.to_thread(
+            self._transaction,
+            lambda conn: conn.execute("DELETE FROM queue_items WHERE queue = ? AND item = ?", (queue, item)),
+        )
+
+    async def queue_length(self, queue: str) -> int:
+        def length(conn):
+            return conn.execute(
+                "SELECT COUNT(*) FROM queue_items WHERE queue = ? AND (lease_until IS NULL OR lease_until < ?)",
+                (queue, time.time()),
+            ).fetchone()[0]
+
+        return await asyncio.to_thread(self._transaction, length)
+
+    async def set(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> None:
+        def set_value(conn):
+            now = time.time()
+            if now - self._purged_at > PURGE_INTERVAL_SECONDS:
+                self._purged_at = now
+                conn.execute("DELETE FROM kv WHERE expires_at < ?", (now,))
+            conn.execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, value, now + ttl_seconds if ttl_seconds else None),
+            )
+
+        await asyncio.to_thread(self._transaction, set_value)
+
+    async def set_if_absent(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> bool:
+        def set_if_absent(conn):
+            now = time.time()
+            cursor = conn.execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE kv.expires_at IS NOT NULL AND kv.expires_at < ?",
+                (key, value, now + ttl_seconds if ttl_seconds else None, now),
+            )
+            return cursor.rowcount == 1
+
+        return await asyncio.to_thread(self._transaction, set_if_absent)
+
+    async def get(self, key: str) -> Optional[str]:
+        def get(conn):
+            row = conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (key, time.time()),
+            ).fetchone()
+            return row[0] if row else None
+
+        return await asyncio.to_thread(self._transaction, get)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(
+            self._transaction, lambda conn: conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        )
+
+
+class RedisStore(SharedStore):
+    """Store in Redis, for workers spread over several hosts"""
+
+    # Atomic GCRA reservation; Redis server time keeps all nodes on one clock
+    RESERVE_SLOT = """
+        local t = redis.call('TIME')
+        local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+        local next_slot = tonumber(redis.call('GET', KEYS[1]) or '0')
+        local slot = math.max(now, next_slot)
+        local interval = tonumber(ARGV[1])
+        redis.call('SET', KEYS[1], tostring(slot + interval), 'PX', math.ceil((slot - now + interval) * 1000) + 1000)
+        return tostring(slot - now)
+    """
+
+    # Oldest expired lease first, else the head of the list; leases live in a sorted set by expiry
+    CLAIM = """
+        local t = redis.call('TIME')
+        local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+        local item = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now, 'LIMIT', 0, 1)[1]
+        if not item then
+            item = redis.call('LPOP', KEYS[1])
+        end
+        if item then
+            redis.call('ZADD', KEYS[2], now + tonumber(ARGV[1]), item)
+        end
+        return item
+    """
+
+    EXTEND = """
+        local t = redis.call('TIME')
+        local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+        return redis.call('ZADD', KEYS[1], 'XX', now + tonumber(ARGV[1]), ARGV[2])
+    """
+
+    LENGTH = """
+        local t = redis.call('TIME')
+        local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+        return redis.call('LLEN', KEYS[1]) + redis.call('ZCOUNT', KEYS[2], '-inf', now)
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("SHARED_STATE_URL points at Redis but the 'redis' package is not installed")
+        self.client = redis.from_url(url, decode_responses=True)
+        self._reserve = self.client.register_script(self.RESERVE_SLOT)
+        self._claim = self.client.register_script(self.CLAIM)
+        self._extend = self.client.register_script(self.EXTEND)
+        self._length = self.client.register_script(self.LENGTH)
+
+    async def reserve_slot(self, key: str, interval: float) -> float:
+        return float(await self._reserve(keys=[f"slot:{key}"], args=[interval]))
+
+    async def push(self, queue: str, item: str) -> None:
+        await self.client.rpush(f"queue:{queue}", item)
+
+    async def claim(self, queue: str, lease_seconds: float) -> Optional[str]:
+        return await self._claim(keys=[f"queue:{queue}", f"leases:{queue}"], args=[lease_seconds])
+
+    async def extend(self, queue: str, item: str, lease_seconds: float) -> None:
+        await self._extend(keys=[f"leases:{queue}"], args=[lease_seconds, item])
+
+    async def ack(self, queue: str, item: str) -> None:
+        await self.client.zrem(f"leases:{queue}", item)
+
+    async def queue_length(self, queue: str) -> int:
+        return int(await self._length(keys=[f"queue:{queue}", f"leases:{queue}"]))
+
+    async def set(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> None:
+        await self.client.set(f"kv:{key}", value, ex=ttl_seconds)
+
+    async def set_if_absent(self, key: str, value: str, ttl_seconds: Optional[int] = None) -> bool:
+        return bool(await self.client.set(f"kv:{key}", value, ex=ttl_seconds, nx=True))
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(f"kv:{key}")
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(f"kv:{key}")
+
+
+def create_store(url: str) -> SharedStore:
+    if not url:
+        return MemoryStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
+
+
+@lru_cache(maxsize=None)
+def get_shared_store() -> SharedStore:
+    """Process-wide store configured by SHARED_STATE_URL"""
+    store = create_store(settings.SHARED_STATE_URL)
+    if isinstance(store, MemoryStore) and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        logger.warning("Running several workers without SHARED_STATE_URL: rate limits are per process")
+    return store
+
+
+class GlobalRateLimiter:
+    """
+    At most `rate_per_second` acquisitions per key across all workers sharing the store.
+
+    Within a process, waiters are served by priority (lower value first): only
+    one slot per key is reserved at a time, and it goes to the most urgent
+    waiter when it comes due. Bulk traffic therefore never queues up slots
+    ahead of an urgent send, which waits at most about one interval per
+    worker process sharing the key.
+    """
+
+    def __init__(self, key: str, rate_per_second: float, store: Optional[SharedStore] = None):
+        self.key = key
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self.store = store or get_shared_store()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._granter: Optional[asyncio.Task] = None
+
+    async def acquire(self, priority: int = 0) -> None:
+        if self.interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._granter is None or self._granter.done() or self._granter.get_loop() is not loop:
+            self._granter = loop.create_task(self._grant_slots())
+        await future
+
+    async def _grant_slots(self) -> None:
+        try:
+            while self._pending_waiters():
+                wait = await self.store.reserve_slot(self.key, self.interval)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                # Whoever is most urgent now gets the slot, including late arrivals
+                while self._waiters:
+                    _, _, future = heapq.heappop(self._waiters)
+                    if not future.done():
+                        future.set_result(None)
+                        break
+        except Exception as e:
+            logger.error(f"Rate limiter {self.key} failed: {str(e)}")
+            while self._waiters:
+                _, _, future = heapq.heappop(self._waiters)
+                if not future.done():
+                    future.set_exception(e)
+
+    def _pending_waiters(self) -> bool:
+        # Drop waiters that were cancelled while queued
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        return bool(self._waiters)
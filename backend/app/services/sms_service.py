@@ -1,11 +1,16 @@
 import asyncio
 import logging
+import time
 from datetime import datetime
-from typing import List, Dict
-from twilio.rest import Client
+from typing import List, Dict, Optional, Union
+from twilio.base import values
 from twilio.base.exceptions import TwilioException
 
 from app.config import settings
+from app.services.number_cache import get_number_cache
+from app.services.send_ledger import get_send_ledger
+from app.services.sender_pool import Sender, SendPriority, get_sender_pool, is_sender_fault
+from app.services.shared_state import GlobalRateLimiter
 from app.utils.validators import MobileNumberValidator
 
 logger = logging.getLogger(__name__)
@@ -13,19 +18,25 @@ logger = logging.getLogger(__name__)
 class SMSService:
 
     def __init__(self):
-        if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
+        self.pool = get_sender_pool("sms")
+        self.number_cache = get_number_cache("sms")
+        if not self.pool.senders:
             logger.warning("Twilio credentials not set. SMS service will not work.")
-            self.client = None
-        else:
-            self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
 
     def validate_credentials(self) -> bool:
         """Check if Twilio credentials are configured"""
-        return self.client is not None
+        return bool(self.pool.senders)
 
-    async def send_single_sms(self, to_number: str, message: str) -> Dict:
-        """Send SMS to a single number"""
-        if not self.client:
+    async def send_single_sms(
+        self,
+        to_number: str,
+        message: str,
+        sender: Optional[Sender] = None,
+        priority: SendPriority = SendPriority.INTERACTIVE,
+        campaign_id: Optional[str] = None,
+    ) -> Dict:
+        """Send SMS to a single number; the attempt is recorded in the send ledger under campaign_id"""
+        if not self.pool.senders:
             return {
                 "number": to_number,
                 "status": "failed",
@@ -33,16 +44,34 @@ class SMSService:
                 "timestamp": datetime.now().isoformat()
             }
 
+        # Skipped without an API call or a rate-limit slot
+        known_error = self.number_cache.lookup(to_number)
+        if known_error:
+            return {
+                "number": to_number,
+                "status": "failed",
+                "error": f"Skipped: Twilio rejected this number before (error {known_error})",
+                "timestamp": datetime.now().isoformat()
+            }
+
+        sender = sender or self.pool.pick(to_number)
+        await sender.acquire(priority)
+
+        error_code = None
+        start = time.perf_counter()
         try:
             # For SMS, we don't use the whatsapp: prefix
-            message_instance = self.client.messages.create(
+            message_instance = await asyncio.to_thread(
+                sender.client.messages.create,
                 body=message,
-                from_=settings.TWILIO_PHONE_NUMBER,
-                to=to_number
+                from_=sender.from_number,
+                to=to_number,
+                status_callback=settings.TWILIO_STATUS_CALLBACK_URL or values.unset
             )
+            sender.record_success()
 
             logger.info(f"SMS sent to {to_number}, SID: {message_instance.sid}")
-            return {
+            result = {
                 "number": str(to_number),
                 "status": "success",
                 "sid": message_instance.sid,
@@ -51,7 +80,11 @@ class SMSService:
 
         except TwilioException as e:
             logger.error(f"Twilio error for {to_number}: {str(e)}")
-            return {
+            error_code = getattr(e, "code", None)
+            self.number_cache.record_failure(to_number, error_code)
+            if is_sender_fault(e):
+                sender.record_failure()
+            result = {
                 "number": to_number,
                 "status": "failed",
                 "error": f"Twilio error: {str(e)}",
@@ -59,23 +92,42 @@ class SMSService:
             }
         except Exception as e:
             logger.error(f"Failed to send SMS to {to_number}: {str(e)}")
-            return {
+            sender.record_failure()
+            result = {
                 "number": to_number,
                 "status": "failed",
                 "error": str(e),
                 "timestamp": datetime.now().isoformat()
             }
 
-    async def send_bulk_sms(self, numbers: List[str], message: str) -> List[Dict]:
-        """Send SMS to multiple numbers with rate limiting"""
-        results = []
+        get_send_ledger().record(
+            campaign_id, "sms", to_number, result["status"], (time.perf_counter() - start) * 1000,
+            message_sid=result.get("sid"), error=result.get("error"), error_code=error_code,
+        )
+        return result
 
-        for i, number in enumerate(numbers):
-            result = await self.send_single_sms('+91' + number, message)
-            results.append(result)
+    async def send_bulk_sms(
+        self,
+        numbers: List[str],
+        message: Union[str, List[str]],
+        rate_limiter: Optional[GlobalRateLimiter] = None,
+        campaign_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Send SMS to multiple numbers, sharded across the sender pool.
+        rate_limiter optionally caps the whole send below the senders' own limits.
+        campaign_id groups the attempts in the send ledger.
+        """
+        recipients = ['+91' + number for number in numbers]
+        # Either one message for everyone or one personalized message per number
+        messages = [message] * len(numbers) if isinstance(message, str) else message
 
-            # Rate limiting: wait between messages (for trial account)
-            if i < len(numbers) - 1:
-                await asyncio.sleep(settings.MESSAGE_DELAY_SECONDS)
+        async def send(idx: int, sender: Sender) -> Dict:
+            if rate_limiter and not self.number_cache.lookup(recipients[idx]):
+                await rate_limiter.acquire(SendPriority.BULK)
+            return await self.send_single_sms(
+                recipients[idx], messages[idx], sender=sender, priority=SendPriority.BULK, campaign_id=campaign_id
+            )
 
-        return results
+        # Each sender paces itself at its own rate limit
+        return await self.pool.dispatch(recipients, send)
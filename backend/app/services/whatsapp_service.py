@@ -1,12 +1,17 @@
 import asyncio
 import logging
+import time
 from datetime import datetime
-from typing import List
-from twilio.rest import Client
+from typing import List, Optional, Union
+from twilio.base import values
 from twilio.base.exceptions import TwilioException
 
 from app.config import settings
 from app.models.whatsapp import MessageResult
+from app.services.number_cache import get_number_cache
+from app.services.send_ledger import get_send_ledger
+from app.services.sender_pool import Sender, SendPriority, get_sender_pool, is_sender_fault
+from app.services.shared_state import GlobalRateLimiter
 from app.utils.validators import MobileNumberValidator
 
 logger = logging.getLogger(__name__)
@@ -14,37 +19,59 @@ logger = logging.getLogger(__name__)
 class WhatsAppService:
     
     def __init__(self):
-        if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
+        self.pool = get_sender_pool("whatsapp")
+        self.number_cache = get_number_cache("whatsapp")
+        if not self.pool.senders:
             logger.warning("Twilio credentials not set. WhatsApp service will not work.")
-            self.client = None
-        else:
-            self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
     
     def validate_credentials(self) -> bool:
         """Check if Twilio credentials are configured"""
-        #print('self.client',self.client)
-        return self.client is not None
+        return bool(self.pool.senders)
     
-    async def send_single_message(self, to_number: str, message: str) -> MessageResult:
-        """Send WhatsApp message to a single number"""
-        if not self.client:
+    async def send_single_message(
+        self,
+        to_number: str,
+        message: str,
+        sender: Optional[Sender] = None,
+        priority: SendPriority = SendPriority.INTERACTIVE,
+        campaign_id: Optional[str] = None,
+    ) -> MessageResult:
+        """Send WhatsApp message to a single number; the attempt is recorded in the send ledger under campaign_id"""
+        if not self.pool.senders:
             return MessageResult(
                 number=to_number,
                 status="failed",
                 error="Twilio credentials not configured",
                 timestamp=datetime.now()
             )
-        
+
+        # Skipped without an API call or a rate-limit slot
+        known_error = self.number_cache.lookup(to_number)
+        if known_error:
+            return MessageResult(
+                number=to_number,
+                status="failed",
+                error=f"Skipped: Twilio rejected this number before (error {known_error})",
+                timestamp=datetime.now()
+            )
+
+        sender = sender or self.pool.pick(to_number)
+        await sender.acquire(priority)
+
+        error_code = None
+        start = time.perf_counter()
         try:
             whatsapp_to = f"whatsapp:{to_number}"
             
-            message_instance = self.client.messages.create(
+            message_instance = await asyncio.to_thread(
+                sender.client.messages.create,
                 body=message,
-                from_=settings.TWILIO_WHATSAPP_FROM,
-                to=whatsapp_to
+                from_=sender.from_number,
+                to=whatsapp_to,
+                status_callback=settings.TWILIO_STATUS_CALLBACK_URL or values.unset
             )
-            print('to_number',to_number)
-            return MessageResult(
+            sender.record_success()
+            result = MessageResult(
                 number=str(to_number),
                 status="success",
                 message_sid=message_instance.sid,
@@ -53,7 +80,11 @@ class WhatsAppService:
             
         except TwilioException as e:
             logger.error(f"Twilio error for {to_number}: {str(e)}")
-            return MessageResult(
+            error_code = getattr(e, "code", None)
+            self.number_cache.record_failure(to_number, error_code)
+            if is_sender_fault(e):
+                sender.record_failure()
+            result = MessageResult(
                 number=to_number,
                 status="failed",
                 error=f"Twilio error: {str(e)}",
@@ -61,25 +92,42 @@ class WhatsAppService:
             )
         except Exception as e:
             logger.error(f"Failed to send message to {to_number}: {str(e)}")
-            return MessageResult(
+            sender.record_failure()
+            result = MessageResult(
                 number=to_number,
                 status="failed",
                 error=str(e),
                 timestamp=datetime.now()
             )
+
+        get_send_ledger().record(
+            campaign_id, "whatsapp", to_number, result.status, (time.perf_counter() - start) * 1000,
+            message_sid=result.message_sid, error=result.error, error_code=error_code,
+        )
+        return result
     
-    async def send_bulk_messages(self, numbers: List[str], message: str) -> List[MessageResult]:
-        """Send WhatsApp messages to multiple numbers with rate limiting"""
-        results = []
-        
-        for i, number in enumerate(numbers):
-            #print('number hai hai:',number)
-            result = await self.send_single_message('+91'+number, message)
-            #print("result hai hai ", result)
-            results.append(result)
-            
-            # Rate limiting: wait between messages (for trial account)
-            if i < len(numbers) - 1:
-                await asyncio.sleep(settings.MESSAGE_DELAY_SECONDS)
-        
-        return results
\ No newline at end of file
+    async def send_bulk_messages(
+        self,
+        numbers: List[str],
+        message: Union[str, List[str]],
+        rate_limiter: Optional[GlobalRateLimiter] = None,
+        campaign_id: Optional[str] = None,
+    ) -> List[MessageResult]:
+        """
+        Send WhatsApp messages to multiple numbers, sharded across the sender pool.
+        rate_limiter optionally caps the whole send below the senders' own limits.
+        campaign_id groups the attempts in the send ledger.
+        """
+        recipients = ['+91' + number for number in numbers]
+        # Either one message for everyone or one personalized message per number
+        messages = [message] * len(numbers) if isinstance(message, str) else message
+
+        async def send(idx: int, sender: Sender) -> MessageResult:
+            if rate_limiter and not self.number_cache.lookup(recipients[idx]):
+                await rate_limiter.acquire(SendPriority.BULK)
+            return await self.send_single_message(
+                recipients[idx], messages[idx], sender=sender, priority=SendPriority.BULK, campaign_id=campaign_id
+            )
+
+        # Each sender paces itself at its own rate limit
+        return await self.pool.dispatch(recipients, send)
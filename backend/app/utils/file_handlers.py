@@ -1,8 +1,22 @@
-import pandas as pd
+import asyncio
+import os
 import re
-from typing import List, Tuple, Optional
+import shutil
+import sys
+import tempfile
+from datetime import datetime, time
+from itertools import repeat
+from typing import TYPE_CHECKING, List, Tuple, Optional
 from fastapi import UploadFile, HTTPException
-from io import BytesIO
+
+from app.config import settings
+from app.utils.process_pool import BoundedProcessPool
+from app.utils.templating import MessageTemplate, builtin_fields, normalize_field_name
+from app.utils.validators import is_missing
+
+if TYPE_CHECKING:
+    # pandas is imported on first use so the API starts without it
+    import pandas as pd
 
 
 class MobileNumberValidator:
@@ -14,7 +28,7 @@ class MobileNumberValidator:
         - Accepts numbers with +91 or 91 prefix
         - Returns a 10-digit string if valid, otherwise None
         """
-        if number is None or pd.isna(number):
+        if is_missing(number):
             return None
 
         # Convert to string and strip spaces
@@ -34,36 +48,149 @@ class MobileNumberValidator:
         return None
 
 
+# Sheet parsing is CPU-bound, so it runs in worker processes off the event loop
+excel_parse_pool = BoundedProcessPool(
+    name="Excel parsing",
+    max_workers=settings.EXCEL_PARSE_WORKERS or min(4, os.cpu_count() or 1),
+    max_queued=settings.EXCEL_PARSE_MAX_QUEUED,
+    timeout_seconds=settings.EXCEL_PARSE_TIMEOUT_SECONDS,
+    max_tasks_per_child=100,  # Recycle workers so pandas' memory doesn't accumulate
+)
+
+
 class ExcelProcessor:
 
     @staticmethod
-    async def read_excel_file(file: UploadFile) -> pd.DataFrame:
-        """Read Excel file and return DataFrame"""
+    async def parse_recipients(
+        file: UploadFile, column_name: str, template: MessageTemplate
+    ) -> Tuple[List[str], List[str], Optional[List[str]]]:
+        """
+        Parse an uploaded sheet in the process pool.
+        Returns valid numbers, invalid row descriptions and, when the template
+        has placeholders, one rendered message per valid number (else None).
+        """
+        ExcelProcessor._check_upload(file)
+
+        # The worker reads the sheet from a file path, so the upload is never
+        # held as bytes in this process nor pickled across to the worker
+        path = ExcelProcessor._spooled_path(file)
+        copied = path is None
+        if copied:
+            path = await asyncio.to_thread(ExcelProcessor._copy_to_temp_file, file)
+        try:
+            outcome = await excel_parse_pool.run(
+                _parse_recipients_in_worker,
+                path,
+                column_name,
+                template.source if template.has_placeholders else None,
+            )
+        finally:
+            if copied:
+                os.unlink(path)
+
+        if outcome[0] == "error":
+            raise HTTPException(status_code=outcome[1], detail=outcome[2])
+        return outcome[1]
+
+    @staticmethod
+    def parse_recipients_file(
+        path: str, column_name: str, template_source: Optional[str] = None
+    ) -> Tuple[List[str], List[str], Optional[List[str]]]:
+        """Synchronous parse + extraction of a sheet on disk (runs inside the pool)"""
+        import pandas as pd
+
+        try:
+            df = pd.read_excel(path)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error reading Excel file: {str(e)}")
+        if df.empty:
+            raise HTTPException(status_code=400, detail="Excel file is empty")
+
+        if template_source:
+            template = MessageTemplate(template_source)
+            return ExcelProcessor.extract_personalized_messages(df, column_name, template)
+
+        valid_numbers, invalid_numbers = ExcelProcessor.extract_mobile_numbers(df, column_name)
+        return valid_numbers, invalid_numbers, None
+
+    @staticmethod
+    def _check_upload(file: UploadFile) -> None:
         if not file.filename.endswith(('.xlsx', '.xls')):
             raise HTTPException(
                 status_code=400,
                 detail="File must be Excel format (.xlsx or .xls)"
             )
+        if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File exceeds the maximum size of {settings.MAX_FILE_SIZE / (1024 * 1024):.1f} MB"
+            )
 
+    @staticmethod
+    def _spooled_path(file: UploadFile) -> Optional[str]:
+        """
+        A path the worker can open the upload by, without copying it. The
+        spooled upload lives in an unlinked temp file (fileno() moves one still
+        held in memory there), which Linux exposes as /proc/<pid>/fd/<fd>.
+        None where that is not available.
+        """
+        if not sys.platform.startswith("linux"):
+            return None
         try:
-            contents = await file.read()
-            df = pd.read_excel(BytesIO(contents))  # <-- use BytesIO to read from memory
-
-            if df.empty:
-                raise HTTPException(status_code=400, detail="Excel file is empty")
+            fd = file.file.fileno()
+        except (AttributeError, OSError):
+            return None
+        file.file.flush()
+        path = f"/proc/{os.getpid()}/fd/{fd}"
+        return path if os.path.exists(path) else None
 
-            return df
-        except pd.errors.EmptyDataError:
-            raise HTTPException(status_code=400, detail="Excel file is empty")
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error reading Excel file: {str(e)}"
-            )
+    @staticmethod
+    def _copy_to_temp_file(file: UploadFile) -> str:
+        """Stream the upload into a named temp file in 1 MB chunks and return its path"""
+        suffix = os.path.splitext(file.filename)[1]
+        file.file.seek(0)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            shutil.copyfileobj(file.file, tmp, 1024 * 1024)
+            return tmp.name
 
     @staticmethod
-    def extract_mobile_numbers(df: pd.DataFrame, column_name: str) -> Tuple[List[str], List[str]]:
+    def extract_mobile_numbers(df: "pd.DataFrame", column_name: str) -> Tuple[List[str], List[str]]:
         """Extract and validate mobile numbers from DataFrame"""
+        valid_numbers, invalid_numbers, _ = ExcelProcessor._split_mobile_numbers(df, column_name)
+        return valid_numbers, invalid_numbers
+
+    @staticmethod
+    def extract_personalized_messages(
+        df: "pd.DataFrame", column_name: str, template: MessageTemplate
+    ) -> Tuple[List[str], List[str], List[str]]:
+        """
+        Extract valid numbers plus one rendered message per valid number.
+        Template placeholders are matched against the sheet's columns
+        (case/spacing-insensitive) and the GDRIVE_* settings.
+        """
+        valid_numbers, invalid_numbers, valid_rows = ExcelProcessor._split_mobile_numbers(df, column_name)
+
+        sheet_columns = {normalize_field_name(c): c for c in df.columns}
+        builtins = builtin_fields()
+        columns = []
+        for field in template.fields:
+            if field in sheet_columns:
+                values = ExcelProcessor._column_as_text(df[sheet_columns[field]])
+                columns.append([values[row] for row in valid_rows])
+            elif field in builtins:
+                columns.append(repeat(builtins[field], len(valid_rows)))
+            else:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Placeholder '{{{field}}}' has no matching column. "
+                           f"Available columns: {list(df.columns)}, built-ins: {list(builtins)}"
+                )
+
+        return valid_numbers, invalid_numbers, template.render_many(columns)
+
+    @staticmethod
+    def _split_mobile_numbers(df: "pd.DataFrame", column_name: str) -> Tuple[List[str], List[str], List[int]]:
+        """Valid numbers, invalid row descriptions, and the row positions of the valid numbers"""
         if column_name not in df.columns:
             available_columns = list(df.columns)
             raise HTTPException(
@@ -73,12 +200,47 @@ class ExcelProcessor:
 
         valid_numbers: List[str] = []
         invalid_numbers: List[str] = []
+        valid_rows: List[int] = []
 
         for idx, number in enumerate(df[column_name]):
             cleaned = MobileNumberValidator.clean_mobile_number(number)
             if cleaned:
                 valid_numbers.append(cleaned)
+                valid_rows.append(idx)
             else:
                 invalid_numbers.append(f"Row {idx + 2}: {number}")  # +2 accounts for header + 1-based index
 
-        return valid_numbers, invalid_numbers
+        return valid_numbers, invalid_numbers, valid_rows
+
+    @staticmethod
+    def _column_as_text(series: "pd.Series") -> List[str]:
+        """Render a sheet column as display strings (dates without 00:00:00, 12.0 -> 12, NaN -> '')"""
+        import pandas as pd
+
+        if pd.api.types.is_datetime64_any_dtype(series):
+            fmt = "%Y-%m-%d" if (series.dropna().dt.normalize() == series.dropna()).all() else "%Y-%m-%d %H:%M"
+            return series.dt.strftime(fmt).fillna("").tolist()
+
+        if pd.api.types.is_float_dtype(series):
+            return [
+                "" if pd.isna(v) else (str(int(v)) if v.is_integer() else str(v))
+                for v in series.tolist()
+            ]
+
+        return [ExcelProcessor._cell_as_text(v) for v in series.tolist()]
+
+    @staticmethod
+    def _cell_as_text(value) -> str:
+        if is_missing(value):
+            return ""
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d" if value.time() == time.min else "%Y-%m-%d %H:%M")
+        return str(value).strip()
+
+
+def _parse_recipients_in_worker(path: str, column_name: str, template_source: Optional[str]):
+    """Pool entry point; HTTPException doesn't pickle, so errors travel as a tuple"""
+    try:
+        return ("ok", ExcelProcessor.parse_recipients_file(path, column_name, template_source))
+    except HTTPException as e:
+        return ("error", e.status_code, e.detail)
@@ -0,0 +1,63 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+from fastapi import Request, Response
+
+# Ticket reads: the client may keep a copy but must revalidate it on every poll
+REVALIDATE = "private, no-cache"
+# Content that only changes on deploy
+STATIC = "public, max-age=86400"
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag: the same resource state may be served gzip/br/identity encoded"""
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None, cache_control: str = REVALIDATE) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified:
+        # Database timestamps are naive UTC
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Evaluate If-None-Match (preferred) or If-Modified-Since against the current state"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)  # "-0000" parses as naive; HTTP dates are UTC
+        # HTTP dates have whole-second precision
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = REVALIDATE,
+) -> Optional[Response]:
+    """
+    A 304 when the client's copy is current (the caller returns it without
+    building the body), otherwise None after adding the validators to the
+    response that will be sent.
+    """
+    headers = cache_headers(etag, last_modified, cache_control)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
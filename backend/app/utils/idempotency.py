@@ -0,0 +1,193 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import zlib
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException, Response, UploadFile
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+from app.services.shared_state import SharedStore, get_shared_store
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+# The in-flight marker of a running request; renewed while it runs, so it
+# only lapses (and lets a retry run) when its worker died
+IN_FLIGHT_SECONDS = 30
+
+# Duplicates waiting on a request running in another worker poll this often
+POLL_MIN_SECONDS = 0.05
+POLL_MAX_SECONDS = 1.0
+
+
+class IdempotencyStore:
+    """
+    Remembers the response of requests sent with an Idempotency-Key header,
+    in the shared store, so a retry that reaches another worker process is
+    recognised too.
+
+    - A replay of a finished request gets the stored response back without
+      running the handler again.
+    - A duplicate that arrives while the first request is still running waits
+      for it and gets the same response, instead of racing it. The first
+      request claims the key with an atomic in-flight marker; duplicates in
+      the same process wait on it directly, others poll the store.
+    - Reusing a key with different parameters is rejected with 422.
+
+    Keys are stored as digests, bodies zlib-compressed; entries expire after
+    IDEMPOTENCY_TTL_SECONDS.
+    """
+
+    def __init__(self, store: SharedStore, ttl_seconds: int):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self._in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    @staticmethod
+    def _digest(value: str) -> str:
+        return hashlib.blake2b(value.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _replay(status_code: int, body: bytes) -> Response:
+        return Response(
+            content=zlib.decompress(body),
+            status_code=status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    async def run(
+        self,
+        key: str,
+        scope: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+
+        store_key = f"idempotency:{self._digest(f'{scope}|{key}')}"
+        fingerprint_digest = self._digest(fingerprint)
+        marker = json.dumps({"fingerprint": fingerprint_digest, "status_code": None})
+        delay = POLL_MIN_SECONDS
+
+        while True:
+            in_flight = self._in_flight.get(store_key)
+            if in_flight:
+                running_fingerprint, future = in_flight
+                self._check_fingerprint(running_fingerprint, fingerprint_digest)
+                status_code, body = await asyncio.shield(future)
+                return self._replay(status_code, body)
+
+            raw = await self.store.get(store_key)
+            if raw:
+                entry = json.loads(raw)
+                self._check_fingerprint(entry["fingerprint"], fingerprint_digest)
+                if entry["status_code"] is not None:
+                    return self._replay(entry["status_code"], base64.b64decode(entry["body"]))
+                # Running in another worker
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, POLL_MAX_SECONDS)
+                continue
+
+            if await self.store.set_if_absent(store_key, marker, IN_FLIGHT_SECONDS):
+                return await self._run_handler(store_key, fingerprint_digest, marker, handler)
+
+    async def _run_handler(
+        self,
+        store_key: str,
+        fingerprint_digest: str,
+        marker: str,
+        handler: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[store_key] = (fingerprint_digest, future)
+        renew = asyncio.create_task(self._keep_marker(store_key, marker))
+        try:
+            result = await handler()
+            if isinstance(result, Response):
+                status_code, raw = result.status_code, result.body
+            else:
+                status_code, raw = 200, json.dumps(jsonable_encoder(result), separators=(",", ":")).encode()
+            body = zlib.compress(raw)
+        except BaseException as e:
+            # Failed requests are not stored, so the client can retry them;
+            # duplicates already waiting here get the same error
+            renew.cancel()
+            self._in_flight.pop(store_key, None)
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Mark as retrieved when nobody is waiting
+            await self._release(store_key)
+            raise
+
+        renew.cancel()
+        future.set_result((status_code, body))
+        entry = {"fingerprint": fingerprint_digest, "status_code": status_code, "body": base64.b64encode(body).decode()}
+        try:
+            await self.store.set(store_key, json.dumps(entry), self.ttl_seconds)
+        except Exception as e:
+            logger.error(f"Could not store the response for an Idempotency-Key: {str(e)}")
+            await self._release(store_key)
+        finally:
+            self._in_flight.pop(store_key, None)
+        return result
+
+    async def _keep_marker(self, store_key: str, marker: str) -> None:
+        while True:
+            await asyncio.sleep(IN_FLIGHT_SECONDS / 3)
+            try:
+                await self.store.set(store_key, marker, IN_FLIGHT_SECONDS)
+            except Exception as e:
+                logger.warning(f"Could not renew an Idempotency-Key marker: {str(e)}")
+
+    async def _release(self, store_key: str) -> None:
+        try:
+            await self.store.delete(store_key)
+        except Exception as e:
+            logger.warning(f"Could not release an Idempotency-Key marker: {str(e)}")
+
+    @staticmethod
+    def _check_fingerprint(stored: str, current: str) -> None:
+        if stored != current:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with different request parameters"
+            )
+
+
+@lru_cache(maxsize=None)
+def get_idempotency_store() -> IdempotencyStore:
+    return IdempotencyStore(get_shared_store(), ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+
+
+async def upload_digest(file: UploadFile) -> str:
+    """Digest of an uploaded file's content for request fingerprints, read in 1 MB chunks off the event loop"""
+    def digest() -> str:
+        h = hashlib.blake2b(digest_size=16)
+        file.file.seek(0)
+        for chunk in iter(lambda: file.file.read(1024 * 1024), b""):
+            h.update(chunk)
+        file.file.seek(0)
+        return h.hexdigest()
+
+    return await asyncio.to_thread(digest)
+
+
+async def run_idempotent(
+    key: Optional[str],
+    scope: str,
+    fingerprint: str,
+    handler: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Run handler once per Idempotency-Key (or every time when no key was sent)"""
+    if not key:
+        return await handler()
+    return await get_idempotency_store().run(key, scope, fingerprint, handler)
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, List, Optional
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+
+def _report_pid(pids) -> None:
+    """Worker initializer: tell the parent which process runs this slot's jobs"""
+    pids.put(os.getpid())
+
+
+class _Slot:
+    """
+    One worker process with its own executor, so a job that has to be
+    stopped takes down only the process it runs in.
+    """
+
+    def __init__(self, context, max_tasks_per_child: Optional[int]):
+        self._context = context
+        self._max_tasks_per_child = max_tasks_per_child
+        self._pid: Optional[int] = None
+        self._start()
+
+    def _start(self) -> None:
+        self._pids = self._context.SimpleQueue()
+        # The process itself is started on the first submit
+        self.executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=self._context,
+            initializer=_report_pid,
+            initargs=(self._pids,),
+            max_tasks_per_child=self._max_tasks_per_child,
+        )
+
+    def worker_pid(self) -> Optional[int]:
+        # A recycled worker (max_tasks_per_child) reports its own pid; the last one is current
+        while not self._pids.empty():
+            self._pid = self._pids.get()
+        return self._pid
+
+    def restart(self) -> None:
+        """Stop the worker (and whatever it is running) and start afresh"""
+        pid = self.worker_pid()
+        if pid is not None:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self._pid = None
+        self._start()
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class BoundedProcessPool:
+    """
+    Process pool for CPU-bound request work (e.g. parsing uploaded sheets),
+    so it runs on other cores instead of blocking the event loop.
+
+    - At most max_workers jobs run at once, and at most max_queued wait;
+      beyond that requests are rejected with 503 + Retry-After.
+    - A job running longer than timeout_seconds is abandoned with 422 and
+      the one worker process running it is killed, so a pathological file
+      can't pin a core indefinitely; jobs in the other workers carry on.
+    - Worker processes are started on first use, keeping app startup light.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queued: int,
+        timeout_seconds: float,
+        max_tasks_per_child: Optional[int] = None,
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.timeout_seconds = timeout_seconds
+        self.max_tasks_per_child = max_tasks_per_child
+        self.pending = 0
+        self._slots: List[_Slot] = []
+        self._idle: List[_Slot] = []
+        self._waiters: Deque[asyncio.Future] = deque()
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        self._context = multiprocessing.get_context("spawn")
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.max_workers + self.max_queued:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many uploads are being processed, please retry shortly",
+                headers={"Retry-After": "5"},
+            )
+
+        self.pending += 1
+        try:
+            slot = await self._acquire()
+            try:
+                future = asyncio.get_running_loop().run_in_executor(slot.executor, fn, *args)
+                return await asyncio.wait_for(future, timeout=self.timeout_seconds)
+            except asyncio.TimeoutError:
+                logger.error(f"{self.name} job exceeded {self.timeout_seconds}s, stopping its worker")
+                slot.restart()
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"File took longer than {self.timeout_seconds:.0f}s to process; please split it into smaller files",
+                )
+            except BrokenProcessPool:
+                slot.restart()
+                raise HTTPException(status_code=500, detail="File processing worker crashed, please retry")
+            finally:
+                self._release(slot)
+        finally:
+            self.pending -= 1
+
+    async def _acquire(self) -> _Slot:
+        while not self._idle and len(self._slots) >= self.max_workers:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_next()  # Woken just as the request went away; pass the slot on
+                else:
+                    self._waiters.remove(waiter)
+                raise
+
+        if self._idle:
+            return self._idle.pop()
+        slot = _Slot(self._context, self.max_tasks_per_child)
+        self._slots.append(slot)
+        return slot
+
+    def _release(self, slot: _Slot) -> None:
+        self._idle.append(slot)
+        self._wake_next()
+
+    def _wake_next(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def shutdown(self) -> None:
+        for slot in self._slots:
+            slot.shutdown()
+        self._slots.clear()
+        self._idle.clear()
@@ -0,0 +1,69 @@
+import re
+from string import Formatter
+from typing import Dict, List, Sequence
+from fastapi import HTTPException
+
+from app.config import settings
+
+
+def normalize_field_name(name) -> str:
+    """'Event Date' / 'event_date ' / 'EVENT-DATE' -> 'event_date'"""
+    return re.sub(r"[^0-9a-z]+", "_", str(name).strip().lower()).strip("_")
+
+
+def builtin_fields() -> Dict[str, str]:
+    """Placeholders that come from settings rather than the sheet"""
+    return {
+        "gdrive_link": settings.GDRIVE_LINK,
+        "gdrive_alias": settings.GDRIVE_ALIAS,
+    }
+
+
+class MessageTemplate:
+    """
+    Message text with {placeholder} fields, e.g.
+    "Hi {name}, your ticket {ticket_number} for {event_date}: {gdrive_link}"
+
+    The template is parsed once into a positional format string
+    ("Hi {0}, your ticket {1} ...") so rendering a row is a single
+    str.format call.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.fields: List[str] = []
+        parts: List[str] = []
+
+        try:
+            parsed = list(Formatter().parse(source))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid message template: {str(e)}")
+
+        for literal, field, spec, conversion in parsed:
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if not field.strip() or spec or conversion:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid placeholder '{{{field}}}' in message template"
+                )
+            name = normalize_field_name(field)
+            if name not in self.fields:
+                self.fields.append(name)
+            parts.append(f"{{{self.fields.index(name)}}}")
+
+        self._format = "".join(parts)
+
+    @property
+    def has_placeholders(self) -> bool:
+        return bool(self.fields)
+
+    def render(self, values: Sequence[str]) -> str:
+        """Render with values given in the order of self.fields"""
+        return self._format.format(*values)
+
+    def render_many(self, columns: Sequence[Sequence[str]]) -> List[str]:
+        """Render one message per row from column-wise values (one sequence per field)"""
+        render = self._format.format
+        return [render(*row) for row in zip(*columns)]
@@ -1,13 +1,25 @@
 import re
-import pandas as pd
 from typing import Optional
 
+
+def is_missing(value) -> bool:
+    """None / NaN / NaT / pd.NA check that doesn't need pandas imported"""
+    if value is None:
+        return True
+    try:
+        # NaN and NaT are the only values not equal to themselves
+        return bool(value != value)
+    except TypeError:
+        # pd.NA refuses to be coerced to bool
+        return True
+
+
 class MobileNumberValidator:
     
     @staticmethod
     def clean_mobile_number(number) -> Optional[str]:
         """Clean and validate mobile number"""
-        if pd.isna(number):
+        if is_missing(number):
             return None
         
         # Convert to string and remove any non-digit characters except +
@@ -0,0 +1,108 @@
+"""
+Multi-worker rate-limit check: N worker processes hammer the same sender
+through the shared store, and the aggregate send rate must stay within the
+sender's limit.
+
+Each worker runs Sender.acquire() (the exact call the send path makes) as
+fast as it can for --duration seconds and records a timestamp per slot. The
+parent merges the timestamps and checks that no sliding one-second window
+holds more than --rate slots (plus one for boundary rounding).
+
+    cd backend
+    python -m benchmarks.bench_global_rate_limit --workers 4 --rate 20 --duration 5
+
+By default the SQLite stand-in store in a temp file is used; pass
+--store-url redis://localhost:6379/0 to check Redis instead.
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+
+def worker(store_url: str, rate: float, duration: float, start_at: float, queue) -> None:
+    os.environ["SHARED_STATE_URL"] = store_url
+    os.environ["TWILIO_ACCOUNT_SID"] = "ACbench"
+    os.environ["TWILIO_AUTH_TOKEN"] = "bench"
+
+    from app.config import SenderConfig
+    from app.services.sender_pool import Sender
+
+    sender = Sender(SenderConfig(channel="sms", from_number="+15005550006", rate_per_second=rate), client=None)
+
+    async def run():
+        stamps = []
+        await asyncio.sleep(max(0.0, start_at - time.time()))
+        end = start_at + duration
+        while True:
+            await sender.acquire()
+            now = time.time()
+            if now >= end:
+                break
+            stamps.append(now)
+        return stamps
+
+    queue.put(asyncio.run(run()))
+
+
+def max_in_window(stamps, window: float = 1.0) -> int:
+    best = 0
+    for i, start in enumerate(stamps):
+        best = max(best, bisect.bisect_left(stamps, start + window) - i)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=20.0, help="Sender limit in messages/second")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--store-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_url = args.store_url or f"sqlite:///{os.path.join(tmp, 'shared-state.db')}"
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        start_at = time.time() + 3.0  # Let every process finish importing first
+        processes = [
+            ctx.Process(target=worker, args=(store_url, args.rate, args.duration, start_at, queue))
+            for _ in range(args.workers)
+        ]
+        for p in processes:
+            p.start()
+        per_worker = [queue.get(timeout=args.duration + 60) for _ in processes]
+        for p in processes:
+            p.join()
+
+    stamps = sorted(s for worker_stamps in per_worker for s in worker_stamps)
+    allowed = args.rate * args.duration + 1
+    peak = max_in_window(stamps)
+    report = {
+        "benchmark": "global_rate_limit",
+        "workers": args.workers,
+        "limit_per_second": args.rate,
+        "duration_seconds": args.duration,
+        "sends_per_worker": [len(s) for s in per_worker],
+        "total_sends": len(stamps),
+        "allowed_sends": int(allowed),
+        "aggregate_per_second": round(len(stamps) / args.duration, 2),
+        "peak_sends_in_any_1s_window": peak,
+    }
+    print(json.dumps(report, indent=2))
+
+    if len(stamps) > allowed or peak > args.rate + 1:
+        print("Aggregate throughput exceeded the global limit", file=sys.stderr)
+        sys.exit(1)
+    if min(len(s) for s in per_worker) == 0:
+        print("A worker never got a slot", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Cost of polling /health/ready and /metrics.
+
+- cached: --polls requests within one HEALTH_CACHE_SECONDS window, so the
+  probes run once and every other poll is served from the cached report
+- uncached: the same with HEALTH_CACHE_SECONDS=0, so every poll runs the
+  database, pool, event-loop, Twilio and send-queue probes
+- concurrent: --concurrency simultaneous polls against an expired cache;
+  reports how many probe runs they caused (1 means they shared one)
+
+Prints a JSON report.
+
+    cd backend
+    python -m benchmarks.bench_health_checks --output health-checks.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict
+
+# The limiter has its own benchmark
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+
+from app.config import settings
+from app.database import init_db
+from app.main import app
+from app.services import health
+from benchmarks.bench_tickets_api import git_commit
+
+PROBE_RUNS = [0]  # Database probe runs, counted by count_probe_runs()
+
+
+def count_probe_runs() -> None:
+    probe = health._probe_database
+
+    def counted(busy_timeout_ms: int) -> int:
+        PROBE_RUNS[0] += 1
+        return probe(busy_timeout_ms)
+
+    health._probe_database = counted
+
+
+async def poll(client: httpx.AsyncClient, path: str, polls: int) -> Dict:
+    runs_before = PROBE_RUNS[0]
+    start = time.perf_counter()
+    for _ in range(polls):
+        await client.get(path)
+    elapsed = time.perf_counter() - start
+    return {
+        "polls": polls,
+        "mean_us": round(elapsed / polls * 1e6, 1),
+        "probe_runs": PROBE_RUNS[0] - runs_before,
+    }
+
+
+async def run(polls: int, concurrency: int) -> Dict:
+    monitor = health.get_health_monitor()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        settings.HEALTH_CACHE_SECONDS = 3600
+        await client.get("/health/ready")
+        cached = await poll(client, "/health/ready", polls)
+        metrics = await poll(client, "/metrics", polls)
+
+        settings.HEALTH_CACHE_SECONDS = 0
+        uncached = await poll(client, "/health/ready", polls)
+
+        settings.HEALTH_CACHE_SECONDS = 3600
+        monitor._report = None
+        runs_before = PROBE_RUNS[0]
+        responses = await asyncio.gather(*(client.get("/health/ready") for _ in range(concurrency)))
+
+    return {
+        "cached": cached,
+        "metrics_cached": metrics,
+        "uncached": uncached,
+        "concurrent": {
+            "polls": concurrency,
+            "probe_runs": PROBE_RUNS[0] - runs_before,
+            "statuses": sorted({r.status_code for r in responses}),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--polls", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    init_db()
+    count_probe_runs()
+    report = {
+        "benchmark": "health_checks",
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        **asyncio.run(run(args.polls, args.concurrency)),
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Cold-start guard: how long `import app.main` takes in a fresh interpreter.
+
+Runs the import several times under `python -X importtime`, reports the
+median total and the heaviest modules, and fails if startup is slower than
+--max-ms or if any module that should load lazily (pandas, numpy,
+openpyxl, twilio.rest, requests) was imported at startup.
+
+    cd backend
+    python -m benchmarks.bench_import_time --max-ms 800 --output import-time.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once a bulk upload or a send actually happens
+LAZY_MODULES = ["pandas", "numpy", "openpyxl", "twilio.rest", "requests"]
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+PROBE = (
+    "import sys, json; import app.main; "
+    f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+)
+
+
+def run_once() -> Tuple[int, Dict[str, int], List[str]]:
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench-import.db')}",
+    }
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: Dict[str, int] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative_us, indent, module = match.groups()
+        cumulative[module] = int(cumulative_us)
+        if len(indent) == 1:  # Top-level imports of the probe
+            total_us += int(cumulative_us)
+    eager = json.loads(proc.stdout.strip().splitlines()[-1])
+    return total_us, cumulative, eager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if the median import is slower")
+    parser.add_argument("--top", type=int, default=15, help="Heaviest modules to report")
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    run_once()  # Warm the bytecode cache so every measured run is comparable
+
+    totals, eager, last = [], set(), {}
+    for _ in range(args.runs):
+        total_us, cumulative, eager_modules = run_once()
+        totals.append(total_us)
+        eager.update(eager_modules)
+        last = cumulative
+
+    median_ms = statistics.median(totals) / 1000.0
+    heaviest = sorted(
+        ((m, us) for m, us in last.items() if m.startswith("app") or "." not in m),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:args.top]
+
+    report = {
+        "benchmark": "import_time",
+        "runs": args.runs,
+        "median_ms": round(median_ms, 1),
+        "min_ms": round(min(totals) / 1000.0, 1),
+        "max_ms": round(max(totals) / 1000.0, 1),
+        "eagerly_imported": sorted(eager),
+        "heaviest_modules_ms": {m: round(us / 1000.0, 1) for m, us in heaviest},
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+    failures = []
+    if eager:
+        failures.append(f"Imported at startup but should be lazy: {', '.join(sorted(eager))}")
+    if args.max_ms is not None and median_ms > args.max_ms:
+        failures.append(f"Median import time {median_ms:.0f}ms exceeds {args.max_ms:.0f}ms")
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
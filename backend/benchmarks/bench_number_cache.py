@@ -0,0 +1,134 @@
+"""
+Negative number cache at scale: file size, load/save time, lookup cost.
+
+For each size in --sizes, builds a cache file of that many rejected numbers
+and measures:
+
+- file_mb and the in-memory size of the arrays, against a dict holding the
+  same entries (what a naive cache would keep)
+- load_ms: reading the file at startup
+- save_ms: one periodic save that merges --new-failures fresh entries, and
+  the same with the daily compaction of expired entries
+- lookup_ns: hits and misses, each averaged over --lookups random numbers
+
+Prints a JSON report.
+
+    cd backend
+    python -m benchmarks.bench_number_cache --sizes 100000 1000000 5000000 --output number-cache.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from array import array
+from datetime import datetime
+from typing import Dict, List
+
+from app.services.number_cache import NegativeNumberCache, PERMANENT_ERROR_CODES
+from benchmarks.bench_tickets_api import git_commit
+
+TTL_SECONDS = 30 * 24 * 60 * 60
+CODES = sorted(PERMANENT_ERROR_CODES)
+
+
+def random_numbers(count: int, rng: random.Random) -> List[int]:
+    # Indian mobiles: 91 + 10 digits starting with 6-9
+    return [910000000000 + rng.randrange(6_000_000_000, 10_000_000_000) for _ in range(count)]
+
+
+def build_file(path: str, size: int, rng: random.Random) -> List[int]:
+    numbers = sorted(set(random_numbers(size, rng)))
+    expires_at = int(time.time()) + TTL_SECONDS
+    entries = (
+        array("Q", numbers),
+        array("I", (expires_at - rng.randrange(TTL_SECONDS // 2) for _ in numbers)),
+        array("H", (rng.choice(CODES) for _ in numbers)),
+    )
+    NegativeNumberCache._write(path, entries)
+    return numbers
+
+
+def dict_bytes(numbers: List[int], rng: random.Random) -> int:
+    tracemalloc.start()
+    naive: Dict[str, tuple] = {f"+{n}": (time.time() + TTL_SECONDS, rng.choice(CODES)) for n in numbers}
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del naive
+    return size
+
+
+def lookup_ns(cache: NegativeNumberCache, numbers: List[str]) -> float:
+    start = time.perf_counter_ns()
+    for number in numbers:
+        cache.lookup(number)
+    return round((time.perf_counter_ns() - start) / len(numbers), 1)
+
+
+def bench_size(size: int, new_failures: int, lookups: int, tmp: str) -> Dict:
+    rng = random.Random(size)
+    path = os.path.join(tmp, f"negative-{size}.bin")
+    numbers = build_file(path, size, rng)
+
+    start = time.perf_counter()
+    cache = NegativeNumberCache(path, TTL_SECONDS)
+    load_ms = (time.perf_counter() - start) * 1000
+    array_bytes = sum(column.itemsize * len(column) for column in cache._entries)
+
+    hits = [f"+{n}" for n in rng.sample(numbers, min(lookups, len(numbers)))]
+    known = set(numbers)
+    misses = [f"+{n}" for n in random_numbers(lookups * 2, rng) if n not in known][:lookups]
+
+    def timed_save() -> float:
+        for number in random_numbers(new_failures, rng):
+            cache.add(f"+{number}", CODES[0])
+        start = time.perf_counter()
+        asyncio.run(cache.save())
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    save_with_compaction_ms = timed_save()  # The first save of a process compacts
+    save_ms = timed_save()
+
+    return {
+        "entries": len(numbers),
+        "file_mb": round(os.path.getsize(path) / 1024 / 1024, 2),
+        "arrays_mb": round(array_bytes / 1024 / 1024, 2),
+        "dict_mb": round(dict_bytes(numbers, rng) / 1024 / 1024, 2),
+        "load_ms": round(load_ms, 1),
+        "save_ms": save_ms,
+        "save_with_compaction_ms": save_with_compaction_ms,
+        "lookup_hit_ns": lookup_ns(cache, hits),
+        "lookup_miss_ns": lookup_ns(cache, misses),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--new-failures", type=int, default=500, help="Entries merged by the measured save")
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "number_cache",
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="number-cache-bench-") as tmp:
+        for size in args.sizes:
+            report["sizes"][str(size)] = bench_size(size, args.new_failures, args.lookups, tmp)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Cost of RateLimitMiddleware per request, and how fast it sheds load.
+
+- asgi: a bare ASGI app called directly, with and without the middleware
+  (default routes, --clients distinct client addresses), so the number is
+  the middleware's own cost per request, in microseconds
+- fastapi: a trivial FastAPI route through httpx's ASGI transport, with and
+  without the middleware, to put that cost next to a real request
+- shedding: --burst concurrent 200 ms requests against a route with
+  concurrency 4 and 8 queue places; reports how many were served and how
+  quickly the rest got their 429
+
+Prints a JSON report.
+
+    cd backend
+    python -m benchmarks.bench_rate_limit_overhead --output rate-limit-overhead.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI
+
+from app.config import RouteLimit, settings
+from app.middleware.rate_limit import RateLimitMiddleware
+from benchmarks.bench_tickets_api import git_commit
+
+# Generous limits, so every request passes and only the bookkeeping is measured
+PASS_THROUGH_ROUTES = [
+    RouteLimit(**{**route.model_dump(), "rate_per_second": 1e9, "burst": 10**9})
+    for route in settings.RATE_LIMIT_ROUTES
+]
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def drive_asgi(app, requests: int, clients: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scopes = [
+        {"type": "http", "method": "GET", "path": "/api/v1/tickets/list", "headers": [], "client": (f"10.0.{i // 256}.{i % 256}", 5000)}
+        for i in range(clients)
+    ]
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(scopes[i % clients], receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def bench_asgi(requests: int, clients: int) -> Dict:
+    limited = RateLimitMiddleware(
+        bare_app, PASS_THROUGH_ROUTES,
+        client_concurrency=settings.RATE_LIMIT_CLIENT_CONCURRENCY, max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+    )
+    bare_us = asyncio.run(drive_asgi(bare_app, requests, clients))
+    limited_us = asyncio.run(drive_asgi(limited, requests, clients))
+    return {
+        "requests": requests,
+        "clients": clients,
+        "bare_us": round(bare_us, 2),
+        "with_middleware_us": round(limited_us, 2),
+        "overhead_us": round(limited_us - bare_us, 2),
+    }
+
+
+def make_app(with_limits: bool, routes: List[RouteLimit]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/api/v1/slow")
+    async def slow():
+        await asyncio.sleep(0.2)
+        return {"ok": True}
+
+    if with_limits:
+        app.add_middleware(RateLimitMiddleware, routes=routes, client_concurrency=0)
+    return app
+
+
+async def drive_fastapi(app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):
+            await client.get("/api/v1/ping")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/api/v1/ping")
+        return (time.perf_counter() - start) / requests * 1e6
+
+
+def bench_fastapi(requests: int) -> Dict:
+    bare_us = asyncio.run(drive_fastapi(make_app(False, []), requests))
+    limited_us = asyncio.run(drive_fastapi(make_app(True, PASS_THROUGH_ROUTES), requests))
+    return {
+        "requests": requests,
+        "bare_us": round(bare_us, 1),
+        "with_middleware_us": round(limited_us, 1),
+        "overhead_pct": round((limited_us - bare_us) / bare_us * 100, 1),
+    }
+
+
+async def drive_burst(burst: int) -> Dict:
+    routes = [RouteLimit(name="slow", paths=["/api/*"], concurrency=4, max_waiting=8, max_wait_seconds=1.0)]
+    transport = httpx.ASGITransport(app=make_app(True, routes))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+        async def one():
+            start = time.perf_counter()
+            response = await client.get("/api/v1/slow")
+            return response.status_code, (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(burst)))
+        elapsed = time.perf_counter() - start
+
+    served = [ms for status, ms in results if status == 200]
+    shed = [ms for status, ms in results if status == 429]
+    return {
+        "burst": burst,
+        "served": len(served),
+        "shed": len(shed),
+        "served_p50_ms": round(statistics.median(served), 1) if served else None,
+        "shed_p50_ms": round(statistics.median(shed), 1) if shed else None,
+        "shed_max_ms": round(max(shed), 1) if shed else None,
+        "total_seconds": round(elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200_000, help="Direct ASGI calls per variant")
+    parser.add_argument("--http-requests", type=int, default=5_000, help="FastAPI requests per variant")
+    parser.add_argument("--clients", type=int, default=5_000)
+    parser.add_argument("--burst", type=int, default=200)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "rate_limit_overhead",
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "asgi": bench_asgi(args.requests, args.clients),
+        "fastapi": bench_fastapi(args.http_requests),
+        "shedding": asyncio.run(drive_burst(args.burst)),
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
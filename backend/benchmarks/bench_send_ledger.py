@@ -0,0 +1,234 @@
+"""
+Send ledger: append throughput, stats queries and columnar export.
+
+Seeds a SQLite send_ledger with --rows attempts spread over --campaigns
+campaigns (and the matching send_ledger_rollup rows), then measures:
+
+- append: SendLedger's batched flush against one INSERT + commit per attempt
+  (the per-attempt case runs on a smaller sample; both report rows/s)
+- stats: the rollup reads behind /ledger/campaigns and /ledger/campaigns/{id}
+  against the GROUP BY over the raw ledger they replace
+- export: time and file size for one campaign and for the whole ledger, as
+  Parquet and Arrow (skipped when pyarrow is not installed)
+
+Prints a JSON report.
+
+    cd backend
+    python -m benchmarks.bench_send_ledger --rows 1000000 --output bench-ledger.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+from sqlalchemy import case, create_engine, event, func, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base
+from app.models.send_ledger import CampaignSendStats, SendRecord
+from app.services.send_ledger import SendLedger, export_ledger
+from benchmarks.bench_tickets_api import git_commit, measure
+from benchmarks.seed_tickets import fast_sqlite_writes
+
+ERRORS = [(21211, "Invalid 'To' Phone Number"), (21610, "Attempt to send to unsubscribed recipient"),
+          (30003, "Unreachable destination handset"), (63003, "Channel could not find To address")]
+
+
+def attempts(rows: int, campaigns: int, rng: random.Random) -> Iterator[Dict]:
+    start = datetime.utcnow() - timedelta(days=365)
+    step = timedelta(days=365) / max(rows, 1)
+    per_campaign = max(1, rows // campaigns)
+    for i in range(rows):
+        failed = rng.random() < 0.04
+        code, error = rng.choice(ERRORS) if failed else (None, None)
+        yield {
+            "campaign_id": f"campaign-{i // per_campaign}",
+            "channel": "sms" if (i // per_campaign) % 3 else "whatsapp",
+            "number": f"+9198{rng.randrange(10**8):08d}",
+            "status": "failed" if failed else "success",
+            "message_sid": None if failed else f"SM{i:032x}",
+            "error_code": code,
+            "error": error,
+            "latency_ms": round(rng.lognormvariate(4.8, 0.3), 1),
+            "sent_at": start + step * i,
+        }
+
+
+def seed(engine, rows: int, campaigns: int, batch: int = 20_000) -> None:
+    rng = random.Random(7)
+    buffer: List[Dict] = []
+    with engine.begin() as conn:
+        for row in attempts(rows, campaigns, rng):
+            buffer.append(row)
+            if len(buffer) >= batch:
+                conn.execute(insert(SendRecord), buffer)
+                buffer.clear()
+        if buffer:
+            conn.execute(insert(SendRecord), buffer)
+
+        conn.execute(insert(CampaignSendStats).from_select(
+            ["campaign_id", "channel", "attempts", "successful", "failed",
+             "latency_ms_total", "first_sent_at", "last_sent_at"],
+            select(*naive_stats_columns()).group_by(SendRecord.campaign_id),
+        ))
+        conn.execute(text("ANALYZE"))
+
+
+def naive_stats_columns():
+    successful = func.sum(case((SendRecord.status == "success", 1), else_=0))
+    return (
+        SendRecord.campaign_id, func.min(SendRecord.channel), func.count(), successful,
+        func.count() - successful, func.sum(SendRecord.latency_ms),
+        func.min(SendRecord.sent_at), func.max(SendRecord.sent_at),
+    )
+
+
+def bench_append(Session, sample: int) -> Dict:
+    rng = random.Random(3)
+    ledger = SendLedger(Session)
+
+    async def batched():
+        for row in attempts(sample, 10, rng):
+            ledger.record(row["campaign_id"], row["channel"], row["number"], row["status"], row["latency_ms"],
+                          row["message_sid"], row["error"], row["error_code"])
+        await ledger.flush()
+
+    start = time.perf_counter()
+    asyncio.run(batched())
+    batched_seconds = time.perf_counter() - start
+
+    per_row_sample = max(1, sample // 25)
+    start = time.perf_counter()
+    for row in attempts(per_row_sample, 10, rng):
+        db = Session()
+        db.execute(insert(SendRecord), [row])
+        db.commit()
+        db.close()
+    per_row_seconds = time.perf_counter() - start
+
+    return {
+        "batched": {"rows": sample, "rows_per_second": round(sample / batched_seconds)},
+        "per_row_commit": {"rows": per_row_sample, "rows_per_second": round(per_row_sample / per_row_seconds)},
+    }
+
+
+def bench_stats(Session, campaign_id: str, rounds: int) -> Dict:
+    db = Session()
+
+    def rollup_list():
+        db.query(CampaignSendStats).order_by(CampaignSendStats.last_sent_at.desc()).limit(100).all()
+
+    def rollup_detail():
+        db.query(CampaignSendStats).filter(CampaignSendStats.campaign_id == campaign_id).first()
+        db.query(SendRecord.error_code, func.count()).filter(
+            SendRecord.campaign_id == campaign_id, SendRecord.status == "failed"
+        ).group_by(SendRecord.error_code).all()
+
+    def naive_list():
+        db.query(*naive_stats_columns()).group_by(SendRecord.campaign_id).order_by(
+            func.max(SendRecord.sent_at).desc()
+        ).limit(100).all()
+
+    def naive_detail():
+        db.query(*naive_stats_columns()).filter(SendRecord.campaign_id == campaign_id).group_by(
+            SendRecord.campaign_id
+        ).all()
+
+    try:
+        return {
+            "list_rollup": measure(rollup_list, rounds),
+            "list_group_by": measure(naive_list, max(3, rounds // 10)),
+            "detail_rollup": measure(rollup_detail, rounds),
+            "detail_group_by": measure(naive_detail, rounds),
+        }
+    finally:
+        db.close()
+
+
+def bench_export(Session, campaign_id: str, tmp: str) -> Dict:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return {"skipped": "pyarrow is not installed"}
+
+    results = {}
+    for fmt in ("parquet", "arrow"):
+        for scope, cid in (("campaign", campaign_id), ("all", None)):
+            path = os.path.join(tmp, f"export-{scope}.{fmt}")
+            start = time.perf_counter()
+            rows = export_ledger(path, fmt, campaign_id=cid, session_factory=Session)
+            results[f"{fmt}_{scope}"] = {
+                "rows": rows,
+                "seconds": round(time.perf_counter() - start, 2),
+                "file_mb": round(os.path.getsize(path) / 1024 / 1024, 2),
+            }
+            os.remove(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--campaigns", type=int, default=500)
+    parser.add_argument("--append-sample", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    settings.SEND_LEDGER_MAX_BUFFERED = max(settings.SEND_LEDGER_MAX_BUFFERED, args.append_sample)
+    report = {
+        "benchmark": "send_ledger",
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "rows": args.rows,
+        "campaigns": args.campaigns,
+    }
+    with tempfile.TemporaryDirectory(prefix="ledger-bench-") as tmp:
+        path = os.path.join(tmp, "ledger.db")
+        engine = create_engine(f"sqlite:///{path}")
+        fast_sqlite_writes(engine)
+        Base.metadata.create_all(engine, tables=[SendRecord.__table__, CampaignSendStats.__table__])
+        start = time.perf_counter()
+        seed(engine, args.rows, args.campaigns)
+        report["seed_seconds"] = round(time.perf_counter() - start, 1)
+        report["database_mb"] = round(os.path.getsize(path) / 1024 / 1024, 1)
+        engine.dispose()
+
+        # The app's own settings (WAL, synchronous=NORMAL) for the measured part
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _pragmas(dbapi_connection, _):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        Session = sessionmaker(bind=engine)
+        campaign_id = f"campaign-{args.campaigns // 2}"
+        report["stats"] = bench_stats(Session, campaign_id, args.rounds)
+        report["export"] = bench_export(Session, campaign_id, tmp)
+        report["append"] = bench_append(Session, args.append_sample)
+        engine.dispose()
+
+    report["speedup_median"] = {
+        "list": round(report["stats"]["list_group_by"]["median_ms"] / max(report["stats"]["list_rollup"]["median_ms"], 1e-6), 1),
+        "detail": round(report["stats"]["detail_group_by"]["median_ms"] / max(report["stats"]["detail_rollup"]["median_ms"], 1e-6), 1),
+        "append": round(report["append"]["batched"]["rows_per_second"] / max(report["append"]["per_row_commit"]["rows_per_second"], 1), 1),
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
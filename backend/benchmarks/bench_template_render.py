@@ -0,0 +1,76 @@
+"""
+Template rendering cost vs. send cost for a large personalized campaign.
+
+Builds an in-memory sheet (mobile, name, event date, ticket number), then
+times number extraction + per-row rendering of a template with the same
+code path the /send-bulk endpoints use, and compares it with the minimum
+time the sends themselves take.
+
+    cd backend
+    python -m benchmarks.bench_template_render --rows 100000 --send-latency-ms 150
+"""
+import argparse
+import json
+import time
+
+import pandas as pd
+
+from app.config import settings
+from app.utils.file_handlers import ExcelProcessor
+from app.utils.templating import MessageTemplate
+
+TEMPLATE = (
+    "Hi {name}, thank you for attending on {event_date}. "
+    "Your ticket is {ticket_number}. {gdrive_alias}: {gdrive_link}"
+)
+
+
+def build_sheet(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "mobile": [f"98{i:08d}" for i in range(rows)],
+        "Name": [f"Customer {i}" for i in range(rows)],
+        "Event Date": pd.date_range("2025-01-01", periods=rows, freq="min").normalize(),
+        "Ticket Number": [f"TKT-20250101-{i % 10000:04d}" for i in range(rows)],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--send-latency-ms", type=float, default=150.0,
+                        help="Typical Twilio API round-trip per message")
+    args = parser.parse_args()
+
+    df = build_sheet(args.rows)
+
+    compile_start = time.perf_counter()
+    template = MessageTemplate(TEMPLATE)
+    compile_seconds = time.perf_counter() - compile_start
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        numbers, _, messages = ExcelProcessor.extract_personalized_messages(df, "mobile", template)
+        timings.append(time.perf_counter() - start)
+    assert len(messages) == len(numbers) == args.rows
+
+    render_seconds = min(timings)
+    # Lower bound for the sends: API latency alone, or the sender's pacing if that is slower
+    per_send = max(args.send_latency_ms / 1000.0, float(settings.MESSAGE_DELAY_SECONDS))
+    send_seconds = per_send * args.rows
+
+    print(json.dumps({
+        "benchmark": "template_render",
+        "rows": args.rows,
+        "compile_us": round(compile_seconds * 1e6, 2),
+        "render_seconds": round(render_seconds, 4),
+        "render_us_per_row": round(render_seconds / args.rows * 1e6, 3),
+        "send_seconds_lower_bound": round(send_seconds, 1),
+        "render_share_of_send": f"{render_seconds / send_seconds:.6%}",
+        "sample": messages[0],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
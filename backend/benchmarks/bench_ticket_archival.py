@@ -0,0 +1,138 @@
+"""
+Tickets API before and after archiving 90% of the tickets.
+
+Seeds a SQLite database with benchmarks.seed_tickets, marks 90% of the
+tickets as Closed for longer than the archive cutoff, and runs the
+benchmarks.bench_tickets_api cases twice: once with every ticket in the
+active tables, once after TicketArchiver has moved the closed ones to
+tickets_archive / comments_archive. Lookups of archived tickets (which fall
+back to the archive) are measured too. Prints a JSON report with both runs
+and the speedup per endpoint.
+
+    cd backend
+    python -m benchmarks.bench_ticket_archival --rows 100000 --output bench-archival.json
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict
+
+# Keep the app's default database untouched by the benchmark
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench-default.db')}")
+# One client hammering the API would be throttled; the limiter has its own benchmark
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import get_db
+from app.main import app
+from app.models.archive import TicketArchive
+from app.models.comment import Comment
+from app.models.ticket import Ticket
+from app.services.archival import TicketArchiver
+from benchmarks.bench_tickets_api import bench_volume, git_commit, measure
+from benchmarks.seed_tickets import fast_sqlite_writes, seed
+
+ARCHIVE_AFTER_DAYS = 30
+
+
+def close_most_tickets(engine, share: float) -> None:
+    """Every ticket except 1 in round(1/(1-share)) becomes Closed, last touched before the cutoff"""
+    keep_every = round(1 / (1 - share))
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE tickets SET status = 'Closed', "
+            "updated_at = MIN(updated_at, datetime('now', :age)) WHERE id % :n != 0"
+        ), {"age": f"-{ARCHIVE_AFTER_DAYS + 1} days", "n": keep_every})
+        conn.execute(text("UPDATE tickets SET status = 'Open' WHERE id % :n = 0"), {"n": keep_every})
+        conn.execute(text("ANALYZE"))
+
+
+def bench_archived_lookups(client: TestClient, engine, rounds: int) -> Dict:
+    with engine.connect() as conn:
+        sample = [row[0] for row in conn.execute(
+            select(TicketArchive.ticket_number).order_by(TicketArchive.id).limit(1000)
+        )]
+    rng = random.Random(11)
+
+    def check(response):
+        assert response.status_code < 400, response.text
+
+    cases = {
+        "get_archived_ticket": lambda: check(client.get(f"/api/v1/tickets/{rng.choice(sample)}")),
+        "get_archived_comments": lambda: check(client.get(f"/api/v1/tickets/{rng.choice(sample)}/comments")),
+        "list_archived": lambda: check(client.get("/api/v1/tickets/list", params={"archived": True})),
+    }
+    return {name: measure(fn, rounds) for name, fn in cases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--archive-share", type=float, default=0.9)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "ticket_archival",
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "rows": args.rows,
+    }
+    with tempfile.TemporaryDirectory(prefix="archival-bench-") as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'tickets.db')}"
+        engine = create_engine(url)
+        fast_sqlite_writes(engine)
+        seed(engine, args.rows)
+        close_most_tickets(engine, args.archive_share)
+        engine.dispose()
+
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        with TestClient(app) as client:
+            report["before"] = bench_volume(client, url, args.rows, args.rounds)
+
+            start = time.perf_counter()
+            archived = TicketArchiver(Session).archive_closed(ARCHIVE_AFTER_DAYS)
+            report["archive_run"] = {"tickets_moved": archived, "seconds": round(time.perf_counter() - start, 2)}
+            with engine.begin() as conn:
+                conn.execute(text("ANALYZE"))
+                report["active_tickets"] = conn.execute(select(func.count()).select_from(Ticket)).scalar()
+                report["active_comments"] = conn.execute(select(func.count()).select_from(Comment)).scalar()
+
+            report["after"] = bench_volume(client, url, args.rows, args.rounds)
+
+            def override_get_db():
+                db = Session()
+                try:
+                    yield db
+                finally:
+                    db.close()
+
+            app.dependency_overrides[get_db] = override_get_db
+            report["archived_lookups"] = bench_archived_lookups(client, engine, args.rounds)
+            app.dependency_overrides.pop(get_db, None)
+        engine.dispose()
+
+    report["speedup_median"] = {
+        name: round(report["before"][name]["median_ms"] / max(report["after"][name]["median_ms"], 1e-6), 2)
+        for name in report["before"]
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
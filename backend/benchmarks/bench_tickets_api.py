@@ -0,0 +1,179 @@
+"""
+Benchmark every endpoint in app/api/v1/tickets.py at several data volumes.
+
+For each volume a SQLite database is seeded with benchmarks.seed_tickets
+(cached under --data-dir, so large volumes are generated only once) and the
+endpoints are called through the full FastAPI stack. Results are written as
+JSON keyed by volume and endpoint, together with the git commit, so runs can
+be diffed across commits.
+
+    cd backend
+    python -m benchmarks.bench_tickets_api --volumes 10000,100000,1000000 --output bench-tickets.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+# Keep the app's default database untouched by the benchmark
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench-default.db')}")
+# One client hammering the API would be throttled; the limiter has its own benchmark
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import get_db
+from app.main import app
+from app.models.ticket import Ticket
+from benchmarks.seed_tickets import fast_sqlite_writes, seed
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def measure(fn: Callable[[], None], rounds: int, warmup: int = 2) -> Dict:
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "rounds": rounds,
+        "min_ms": round(samples[0] * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+        "stddev_ms": round(statistics.pstdev(samples) * 1000, 3),
+    }
+
+
+def prepare_database(volume: int, data_dir: str) -> str:
+    path = os.path.join(data_dir, f"tickets-{volume}.db")
+    url = f"sqlite:///{path}"
+    if not os.path.exists(path):
+        engine = create_engine(url)
+        fast_sqlite_writes(engine)
+        result = seed(engine, volume)
+        engine.dispose()
+        print(f"Seeded {volume} tickets in {result['seconds']}s -> {path}")
+    return url
+
+
+def bench_volume(client: TestClient, database_url: str, volume: int, rounds: int) -> Dict:
+    engine = create_engine(database_url, connect_args={"check_same_thread": False})
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    rng = random.Random(7)
+
+    with engine.connect() as conn:
+        sample = conn.execute(
+            select(Ticket.ticket_number, Ticket.name, Ticket.mobile_number)
+            .order_by(Ticket.id).limit(1000)
+        ).all()
+
+    def pick():
+        return rng.choice(sample)
+
+    def check(response):
+        assert response.status_code < 400, response.text
+
+    payload = {
+        "name": "Bench Customer",
+        "father_name": "Bench Senior",
+        "address": "1 Benchmark Road",
+        "pincode": "560001",
+        "mobile_number": "9876543210",
+        "event_date": "2025-01-01",
+        "query": "Benchmark ticket",
+    }
+
+    cases = {
+        "list_tickets": lambda: check(client.get("/api/v1/tickets/list")),
+        "list_tickets_status": lambda: check(client.get("/api/v1/tickets/list", params={"status": "Open"})),
+        "list_tickets_deep_page": lambda: check(
+            client.get("/api/v1/tickets/list", params={"skip": volume // 2, "limit": 100})),
+        "search_name": lambda: check(client.get("/api/v1/tickets/list", params={"search": pick()[1].split()[1]})),
+        "search_mobile": lambda: check(client.get("/api/v1/tickets/list", params={"search": pick()[2][-6:]})),
+        "search_ticket_number": lambda: check(client.get("/api/v1/tickets/list", params={"search": pick()[0]})),
+        "get_ticket": lambda: check(client.get(f"/api/v1/tickets/{pick()[0]}")),
+        "get_comments": lambda: check(client.get(f"/api/v1/tickets/{pick()[0]}/comments")),
+        "create_ticket": lambda: check(client.post("/api/v1/tickets/create", json=payload)),
+        "update_ticket_status": lambda: check(client.patch(
+            f"/api/v1/tickets/{pick()[0]}/status", json={"status": rng.choice(["Open", "In Progress"])})),
+        "add_comment": lambda: check(client.post(
+            f"/api/v1/tickets/{pick()[0]}/comments", json={"author_name": "Bench", "comment_text": "Benchmark"})),
+    }
+
+    results = {name: measure(fn, rounds) for name, fn in cases.items()}
+    app.dependency_overrides.pop(get_db, None)
+    engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--volumes", default="10000,100000", help="Comma-separated ticket counts (10k - 10M)")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "ticket-bench"))
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    volumes = [int(v) for v in args.volumes.split(",")]
+
+    report = {
+        "benchmark": "tickets_api",
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "volumes": {},
+    }
+    with TestClient(app) as client:
+        for volume in volumes:
+            # Work on a copy so write benchmarks don't grow the cached dataset
+            source = prepare_database(volume, args.data_dir)[len("sqlite:///"):]
+            with tempfile.TemporaryDirectory() as tmp:
+                copy = os.path.join(tmp, "bench.db")
+                shutil.copyfile(source, copy)
+                report["volumes"][str(volume)] = bench_volume(client, f"sqlite:///{copy}", volume, args.rounds)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
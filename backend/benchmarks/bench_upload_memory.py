@@ -0,0 +1,236 @@
+"""
+Peak memory of the API process while it receives and parses bulk uploads.
+
+Starts the API as a subprocess, uploads 10 MB and 100 MB sheets to
+/api/v1/sms/send-bulk and samples the server's RSS (and that of its Excel
+parser workers) every few milliseconds. Reports the peak RSS growth over
+the idle baseline for each case, as JSON.
+
+Cases:
+- 10mb_accepted: under MAX_FILE_SIZE, received, spooled and fully parsed
+- 100mb_content_length: over the limit, refused from the Content-Length header
+- 100mb_chunked: over the limit without Content-Length, refused mid-stream
+- 100mb_raised_limit: a second server with MAX_FILE_SIZE=128MB accepts it,
+  showing that a large accepted upload is spooled to disk, not held in memory
+
+The sheets are real .xlsx files padded to size with an unreferenced zip
+member, so they are quick to build and cheap to parse. Uploads use a
+missing column name, so the request ends with a 400 after parsing and
+nothing is sent. Linux only (reads /proc).
+
+    cd backend
+    python -m benchmarks.bench_upload_memory --output upload-memory.json
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+import pandas as pd
+
+from benchmarks.loadtest import free_port, wait_until_up
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MB = 1024 * 1024
+
+
+# -------------------- Sheets --------------------
+def build_padded_sheet(path: str, size_bytes: int, rows: int = 1000) -> None:
+    df = pd.DataFrame({"mobile": [f"98765{i:05d}" for i in range(rows)]})
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    with open(path, "wb") as f:
+        f.write(buffer.getvalue())
+    padding = max(0, size_bytes - os.path.getsize(path) - 200)  # ~200 bytes of zip headers
+    with zipfile.ZipFile(path, "a", compression=zipfile.ZIP_STORED) as zf:
+        with zf.open("padding.bin", "w", force_zip64=True) as member:
+            while padding > 0:
+                chunk = os.urandom(min(MB, padding))
+                member.write(chunk)
+                padding -= len(chunk)
+
+
+# -------------------- Memory sampling --------------------
+def rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return 0
+
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(p) for p in f.read().split())
+        except FileNotFoundError:
+            continue
+    return children
+
+
+class PeakSampler(threading.Thread):
+    """Polls the RSS of the server and of its child processes until stopped"""
+
+    def __init__(self, pid: int, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.server_peak = 0
+        self.workers_peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.server_peak = max(self.server_peak, rss_bytes(self.pid))
+            self.workers_peak = max(
+                self.workers_peak, max((rss_bytes(p) for p in child_pids(self.pid)), default=0)
+            )
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+# -------------------- Server --------------------
+class ApiServer:
+    def __init__(self, tempdir: str, max_file_size: Optional[int] = None):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        env = {
+            **os.environ,
+            "TWILIO_ACCOUNT_SID": "ACbench",
+            "TWILIO_AUTH_TOKEN": "bench",
+            "TWILIO_PHONE_NUMBER": "+15005550006",
+            "DATABASE_URL": f"sqlite:///{os.path.join(tempdir, f'bench-{self.port}.db')}",
+            "RATE_LIMIT_ENABLED": "false",  # Back-to-back uploads would exceed the bulk route's burst
+        }
+        if max_file_size:
+            env["MAX_FILE_SIZE"] = str(max_file_size)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(self.port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        wait_until_up(f"{self.url}/health")
+
+    def close(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+# -------------------- Uploads --------------------
+BOUNDARY = "bench-upload-boundary"
+
+
+def chunked_multipart(path: str) -> Iterator[bytes]:
+    """Multipart body as a generator, so httpx sends it without Content-Length"""
+    yield (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"message\"\r\n\r\nhello\r\n"
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"column_name\"\r\n\r\nmissing\r\n"
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"upload.xlsx\"\r\n"
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    with open(path, "rb") as f:
+        while chunk := f.read(MB):
+            yield chunk
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def upload(server: ApiServer, path: str, chunked: bool = False) -> Dict:
+    url = f"{server.url}/api/v1/sms/send-bulk"
+    sampler = PeakSampler(server.process.pid)
+    baseline = rss_bytes(server.process.pid)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        with httpx.Client(timeout=300) as client:
+            if chunked:
+                response = client.post(
+                    url,
+                    content=chunked_multipart(path),
+                    headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+                )
+            else:
+                with open(path, "rb") as f:
+                    response = client.post(
+                        url,
+                        files={"file": ("upload.xlsx", f)},
+                        data={"message": "hello", "column_name": "missing"},
+                    )
+            status = response.status_code
+    except httpx.HTTPError as e:
+        # The server may close the connection right after refusing a large body
+        status = f"connection closed ({type(e).__name__})"
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+    return {
+        "file_mb": round(os.path.getsize(path) / MB, 1),
+        "status": status,
+        "seconds": round(elapsed, 3),
+        "api_baseline_rss_mb": round(baseline / MB, 1),
+        "api_peak_rss_growth_mb": round(max(0, sampler.server_peak - baseline) / MB, 1),
+        "parser_worker_peak_rss_mb": round(sampler.workers_peak / MB, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small-mb", type=float, default=9.5, help="Size of the accepted upload")
+    parser.add_argument("--large-mb", type=float, default=100.0, help="Size of the oversized upload")
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = {"benchmark": "upload_memory", "cases": {}}
+    with tempfile.TemporaryDirectory(prefix="upload-bench-") as tempdir:
+        small = os.path.join(tempdir, "small.xlsx")
+        large = os.path.join(tempdir, "large.xlsx")
+        warmup = os.path.join(tempdir, "warmup.xlsx")
+        build_padded_sheet(small, int(args.small_mb * MB))
+        build_padded_sheet(large, int(args.large_mb * MB))
+        build_padded_sheet(warmup, 0)
+
+        servers = []
+        try:
+            default = ApiServer(tempdir)
+            servers.append(default)
+            upload(default, warmup)  # Start the parser pool before measuring
+            report["cases"]["10mb_accepted"] = upload(default, small)
+            report["cases"]["100mb_content_length"] = upload(default, large)
+            report["cases"]["100mb_chunked"] = upload(default, large, chunked=True)
+
+            raised = ApiServer(tempdir, max_file_size=128 * MB)
+            servers.append(raised)
+            upload(raised, warmup)
+            report["cases"]["100mb_raised_limit"] = upload(raised, large)
+        finally:
+            for server in servers:
+                server.close()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
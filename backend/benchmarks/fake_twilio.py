@@ -0,0 +1,208 @@
+"""
+Local stand-in for the Twilio Messages API.
+
+Accepts the same POST the twilio client sends for messages.create, answers
+after a configurable latency, injects recipient errors, server errors and
+429 throttling, and delivers status callbacks ("sent", then "delivered")
+to the StatusCallback URL of each accepted message.
+
+    cd backend
+    python -m benchmarks.fake_twilio --port 8099 --latency-ms 120 --error-rate 0.02 --rate 50
+
+Then start the API against it:
+
+    TWILIO_API_BASE_URL=http://127.0.0.1:8099 TWILIO_ACCOUNT_SID=ACfake \\
+    TWILIO_AUTH_TOKEN=fake TWILIO_PHONE_NUMBER=+15005550006 MESSAGE_DELAY_SECONDS=0 \\
+    uvicorn app.main:app --port 8000
+
+GET /_stats returns counters; POST /_reset clears them; POST /_callbacks is a
+callback sink that just counts what it receives.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class FakeTwilioConfig:
+    def __init__(
+        self,
+        latency_ms: float = 100.0,
+        jitter_ms: float = 30.0,
+        error_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        rate: float = 0.0,
+        burst: int = 10,
+        callback_delay_ms: float = 200.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate  # Recipient errors (400, code 21211 / 63003)
+        self.server_error_rate = server_error_rate  # 500s
+        self.rate = rate  # Messages per second per sender before 429; 0 = unlimited
+        self.burst = burst
+        self.callback_delay_ms = callback_delay_ms
+        self.random = random.Random(seed)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def twilio_error(status: int, code: int, message: str) -> JSONResponse:
+    """Error body in the shape TwilioRestException parses"""
+    return JSONResponse(
+        status_code=status,
+        content={
+            "code": code,
+            "message": message,
+            "more_info": f"https://www.twilio.com/docs/errors/{code}",
+            "status": status,
+        },
+    )
+
+
+def create_fake_twilio_app(config: FakeTwilioConfig) -> FastAPI:
+    app = FastAPI(title="Fake Twilio")
+    stats: Counter = Counter()
+    buckets: Dict[str, TokenBucket] = defaultdict(lambda: TokenBucket(config.rate, config.burst))
+    background = set()
+
+    async def deliver_callbacks(url: str, fields: Dict[str, str], final_status: str):
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            for status in ("sent", final_status):
+                await asyncio.sleep(config.callback_delay_ms / 1000.0)
+                try:
+                    await client.post(url, data={**fields, "MessageStatus": status, "SmsStatus": status})
+                    stats["callbacks_delivered"] += 1
+                except httpx.HTTPError:
+                    stats["callbacks_failed"] += 1
+
+    @app.post("/2010-04-01/Accounts/{account_sid}/Messages.json")
+    async def create_message(account_sid: str, request: Request):
+        form = await request.form()
+        to, from_, body = form.get("To"), form.get("From"), form.get("Body", "")
+        stats["requests"] += 1
+
+        latency = max(0.0, config.random.gauss(config.latency_ms, config.jitter_ms)) / 1000.0
+        await asyncio.sleep(latency)
+
+        if config.rate > 0 and not buckets[f"{account_sid}:{from_}"].take():
+            stats["throttled"] += 1
+            return twilio_error(429, 20429, "Too Many Requests")
+
+        roll = config.random.random()
+        if roll < config.server_error_rate:
+            stats["server_errors"] += 1
+            return twilio_error(500, 20500, "Internal Server Error")
+        if roll < config.server_error_rate + config.error_rate:
+            stats["recipient_errors"] += 1
+            if str(to).startswith("whatsapp:"):
+                return twilio_error(400, 63003, "Channel could not find To address")
+            return twilio_error(400, 21211, f"The 'To' number {to} is not a valid phone number.")
+
+        sid = "SM" + uuid.uuid4().hex
+        now = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S +0000")
+        stats["accepted"] += 1
+
+        callback_url = form.get("StatusCallback")
+        if callback_url:
+            fields = {"MessageSid": sid, "AccountSid": account_sid, "To": to, "From": from_}
+            task = asyncio.create_task(deliver_callbacks(callback_url, fields, "delivered"))
+            background.add(task)
+            task.add_done_callback(background.discard)
+
+        return JSONResponse(
+            status_code=201,
+            content={
+                "sid": sid,
+                "account_sid": account_sid,
+                "to": to,
+                "from": from_,
+                "body": body,
+                "status": "queued",
+                "num_segments": "1",
+                "direction": "outbound-api",
+                "date_created": now,
+                "date_updated": now,
+                "date_sent": None,
+                "error_code": None,
+                "error_message": None,
+                "price": None,
+                "uri": f"/2010-04-01/Accounts/{account_sid}/Messages/{sid}.json",
+            },
+        )
+
+    @app.post("/_callbacks")
+    async def receive_callback(request: Request):
+        """Callback sink, so a load test can point StatusCallback back here"""
+        form = await request.form()
+        stats[f"callbacks_received_{form.get('MessageStatus')}"] += 1
+        return {"status": "ok"}
+
+    @app.get("/_stats")
+    async def get_stats():
+        return dict(stats)
+
+    @app.post("/_reset")
+    async def reset_stats():
+        stats.clear()
+        buckets.clear()
+        return {"status": "reset"}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=30.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--server-error-rate", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=0.0, help="Per-sender messages/sec before 429 (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--callback-delay-ms", type=float, default=200.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeTwilioConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        server_error_rate=args.server_error_rate,
+        rate=args.rate,
+        burst=args.burst,
+        callback_delay_ms=args.callback_delay_ms,
+        seed=args.seed,
+    )
+    uvicorn.run(create_fake_twilio_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+End-to-end load test for the API (bulk WhatsApp, bulk SMS, ticket CRUD).
+
+By default it starts benchmarks.fake_twilio and the FastAPI app as local
+subprocesses (temporary SQLite database, no real Twilio traffic), drives
+them with concurrent clients and prints throughput and latency percentiles
+as JSON.
+
+    cd backend
+    python -m benchmarks.loadtest --duration 20 --concurrency 8 --output results.json
+
+Compare against a previous run and fail on regressions:
+
+    python -m benchmarks.loadtest --baseline results.json --max-regression 0.2
+
+Use --target http://host:port to load an already running instance instead.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("bulk_whatsapp", "bulk_sms", "tickets")
+
+
+# -------------------- Measurements --------------------
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.messages: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float, ok: bool, messages: int = 0):
+        self.latencies[name].append(seconds)
+        self.messages[name] += messages
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict]:
+        report = {}
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            report[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "requests_per_second": round(len(values) / elapsed, 2),
+                "messages_per_second": round(self.messages[name] / elapsed, 2),
+                "p50_ms": percentile_ms(values, 50),
+                "p90_ms": percentile_ms(values, 90),
+                "p95_ms": percentile_ms(values, 95),
+                "p99_ms": percentile_ms(values, 99),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        return report
+
+
+def percentile_ms(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return round(sorted_values[rank] * 1000, 2)
+
+
+async def timed(recorder: Recorder, name: str, request, messages_from_response=None):
+    start = time.perf_counter()
+    try:
+        response = await request
+        ok = response.status_code < 400
+        messages = messages_from_response(response) if ok and messages_from_response else 0
+    except httpx.HTTPError:
+        response, ok, messages = None, False, 0
+    recorder.record(name, time.perf_counter() - start, ok, messages)
+    return response
+
+
+# -------------------- Scenarios --------------------
+def build_sheet(size: int) -> bytes:
+    df = pd.DataFrame({
+        "mobile": [f"9{random.randint(100000000, 999999999)}" for _ in range(size)],
+        "name": [f"Load Test {i}" for i in range(size)],
+    })
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def count_sent(response: httpx.Response) -> int:
+    body = response.json()
+    return body.get("successful", 0) + body.get("failed", 0)
+
+
+async def bulk_worker(client: httpx.AsyncClient, recorder: Recorder, channel: str, sheet: bytes, deadline: float):
+    while time.monotonic() < deadline:
+        await timed(
+            recorder,
+            f"bulk_{channel}",
+            client.post(
+                f"/api/v1/{channel}/send-bulk",
+                files={"file": ("loadtest.xlsx", sheet)},
+                data={"message": "Hi {name}, this is a load test", "column_name": "mobile"},
+            ),
+            count_sent,
+        )
+
+
+async def tickets_worker(client: httpx.AsyncClient, recorder: Recorder, deadline: float):
+    while time.monotonic() < deadline:
+        response = await timed(recorder, "tickets.create", client.post("/api/v1/tickets/create", json={
+            "name": "Load Test",
+            "father_name": "Load Test Sr",
+            "address": "1 Benchmark Road",
+            "pincode": "560001",
+            "mobile_number": f"9{random.randint(100000000, 999999999)}",
+            "event_date": "2025-01-01",
+            "query": "Load test ticket",
+        }))
+        if response is None or response.status_code >= 400:
+            continue
+        ticket_number = response.json()["ticket_number"]
+
+        await timed(recorder, "tickets.get", client.get(f"/api/v1/tickets/{ticket_number}"))
+        await timed(recorder, "tickets.update_status", client.patch(
+            f"/api/v1/tickets/{ticket_number}/status", json={"status": "In Progress"}))
+        await timed(recorder, "tickets.add_comment", client.post(
+            f"/api/v1/tickets/{ticket_number}/comments",
+            json={"author_name": "Agent", "comment_text": "Looking into it"}))
+        await timed(recorder, "tickets.get_comments", client.get(f"/api/v1/tickets/{ticket_number}/comments"))
+        await timed(recorder, "tickets.list", client.get("/api/v1/tickets/list", params={"limit": 50}))
+        await timed(recorder, "tickets.search", client.get("/api/v1/tickets/list", params={"search": "Load"}))
+
+
+async def run_load(target: str, scenarios: List[str], concurrency: int, duration: float, bulk_size: int) -> Dict:
+    recorder = Recorder()
+    sheet = build_sheet(bulk_size)
+    limits = httpx.Limits(max_connections=concurrency * len(scenarios) + 4)
+
+    async with httpx.AsyncClient(base_url=target, timeout=300.0, limits=limits) as client:
+        deadline = time.monotonic() + duration
+        workers = []
+        for _ in range(concurrency):
+            if "bulk_whatsapp" in scenarios:
+                workers.append(bulk_worker(client, recorder, "whatsapp", sheet, deadline))
+            if "bulk_sms" in scenarios:
+                workers.append(bulk_worker(client, recorder, "sms", sheet, deadline))
+            if "tickets" in scenarios:
+                workers.append(tickets_worker(client, recorder, deadline))
+
+        start = time.monotonic()
+        await asyncio.gather(*workers)
+        elapsed = time.monotonic() - start
+
+    return {"elapsed_seconds": round(elapsed, 2), "results": recorder.summary(elapsed)}
+
+
+# -------------------- Local stack --------------------
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+class LocalStack:
+    """fake_twilio + the API as subprocesses, torn down on exit"""
+
+    def __init__(self, args):
+        self.args = args
+        self.processes: List[subprocess.Popen] = []
+        self.tempdir = tempfile.TemporaryDirectory(prefix="loadtest-")
+
+    def __enter__(self) -> "LocalStack":
+        twilio_port, api_port = free_port(), free_port()
+        self.twilio_url = f"http://127.0.0.1:{twilio_port}"
+        self.api_url = f"http://127.0.0.1:{api_port}"
+        self.processes.append(subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.fake_twilio", "--port", str(twilio_port),
+             "--latency-ms", str(self.args.twilio_latency_ms),
+             "--error-rate", str(self.args.twilio_error_rate),
+             "--rate", str(self.args.twilio_rate),
+             "--seed", "42"],
+            cwd=BACKEND_DIR,
+        ))
+        wait_until_up(f"{self.twilio_url}/_stats")
+
+        env = {
+            **os.environ,
+            "TWILIO_API_BASE_URL": self.twilio_url,
+            "TWILIO_STATUS_CALLBACK_URL": f"{self.twilio_url}/_callbacks",
+            "TWILIO_ACCOUNT_SID": "ACloadtest",
+            "TWILIO_AUTH_TOKEN": "loadtest",
+            "TWILIO_PHONE_NUMBER": "+15005550006",
+            "MESSAGE_DELAY_SECONDS": "0",
+            "DATABASE_URL": f"sqlite:///{os.path.join(self.tempdir.name, 'loadtest.db')}",
+            # Raw capacity: every request comes from one client, which the limiter would throttle
+            "RATE_LIMIT_ENABLED": "false",
+        }
+        self.processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(api_port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+        ))
+        wait_until_up(f"{self.api_url}/health")
+        return self
+
+    def __exit__(self, *exc):
+        for process in reversed(self.processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.tempdir.cleanup()
+
+
+# -------------------- Regression check --------------------
+def find_regressions(current: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        now = current["results"].get(name)
+        if not now:
+            continue
+        if base["p95_ms"] > 0 and now["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {now['p95_ms']}ms")
+        if now["requests_per_second"] < base["requests_per_second"] * (1 - max_regression):
+            regressions.append(
+                f"{name}: throughput {base['requests_per_second']}/s -> {now['requests_per_second']}/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default=None, help="Running API base URL (default: start a local stack)")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds to run")
+    parser.add_argument("--bulk-size", type=int, default=50, help="Numbers per bulk upload")
+    parser.add_argument("--twilio-latency-ms", type=float, default=100.0)
+    parser.add_argument("--twilio-error-rate", type=float, default=0.01)
+    parser.add_argument("--twilio-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", default=None, help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    scenarios = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+
+    if args.target:
+        report = asyncio.run(run_load(args.target, scenarios, args.concurrency, args.duration, args.bulk_size))
+    else:
+        with LocalStack(args) as stack:
+            report = asyncio.run(run_load(stack.api_url, scenarios, args.concurrency, args.duration, args.bulk_size))
+            report["fake_twilio"] = httpx.get(f"{stack.twilio_url}/_stats").json()
+
+    report["config"] = {k: v for k, v in vars(args).items() if k not in ("output", "baseline")}
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(report, json.load(f), args.max_regression)
+        if regressions:
+            print("Performance regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Seed the tickets database with realistic Ticket and Comment rows.
+
+Rows are generated lazily and written with batched executemany inserts, so
+volumes from 10k up to 10M tickets fit in constant memory.
+
+    cd backend
+    python -m benchmarks.seed_tickets --rows 100000 --comments-per-ticket 2 \\
+        --database-url sqlite:////tmp/tickets-100k.db
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.engine import Engine
+
+from app.database import Base
+from app.models.ticket import Ticket
+from app.models.comment import Comment
+
+FIRST_NAMES = [
+    "Aarav", "Vivaan", "Aditya", "Vihaan", "Arjun", "Sai", "Reyansh", "Krishna", "Ishaan", "Rohan",
+    "Ananya", "Diya", "Saanvi", "Aadhya", "Pari", "Anika", "Navya", "Myra", "Priya", "Kavya",
+    "Rahul", "Amit", "Suresh", "Ramesh", "Sunita", "Pooja", "Neha", "Deepak", "Manoj", "Sahil",
+]
+LAST_NAMES = [
+    "Sharma", "Verma", "Gupta", "Singh", "Kumar", "Patel", "Reddy", "Iyer", "Nair", "Joshi",
+    "Mehta", "Chopra", "Malhotra", "Bose", "Das", "Rao", "Pillai", "Yadav", "Mishra", "Agarwal",
+]
+CITIES = [
+    ("Mumbai", "400"), ("Delhi", "110"), ("Bengaluru", "560"), ("Hyderabad", "500"), ("Chennai", "600"),
+    ("Kolkata", "700"), ("Pune", "411"), ("Jaipur", "302"), ("Lucknow", "226"), ("Ahmedabad", "380"),
+]
+STREETS = ["MG Road", "Station Road", "Gandhi Nagar", "Nehru Street", "Park Avenue", "Lake View", "Main Bazaar"]
+QUERIES = [
+    "Photos from the event are not visible in the shared folder.",
+    "I have not received the video link for my event yet.",
+    "Please resend the WhatsApp message with the drive link.",
+    "The printed album has missing pages, need a replacement.",
+    "Wrong name spelt on the certificate, please correct it.",
+    "Requesting refund for the cancelled booking.",
+    "Need additional copies of the group photo.",
+]
+COMMENTS = [
+    "Checked with the studio team, will update shortly.",
+    "Link resent to the customer on WhatsApp.",
+    "Customer confirmed receipt, closing soon.",
+    "Escalated to the operations lead.",
+    "Waiting on the customer for the correct address.",
+]
+AGENTS = ["Support Agent", "Sahil", "Operations", "Studio Team", "Admin"]
+STATUSES = (["Open"] * 3) + (["In Progress"] * 2) + (["Closed"] * 5)
+
+TICKETS_PER_DAY = 5000  # Keeps TKT-YYYYMMDD-XXXX numbers unique
+
+
+def ticket_rows(rows: int, rng: random.Random, end: datetime) -> Iterator[Dict]:
+    days = max(730, rows // TICKETS_PER_DAY + 1)
+    start = (end - timedelta(days=days)).replace(hour=0, minute=0, second=0)
+    per_day = -(-rows // days)  # ceil
+
+    for i in range(rows):
+        day, seq = divmod(i, per_day)
+        created_at = start + timedelta(days=day, seconds=rng.randint(0, 86399))
+        updated_at = min(end, created_at + timedelta(hours=rng.randint(0, 240)))
+        city, pin_prefix = rng.choice(CITIES)
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        yield {
+            "ticket_number": f"TKT-{created_at:%Y%m%d}-{seq:04d}",
+            "name": name,
+            "father_name": f"{rng.choice(FIRST_NAMES)} {name.split()[1]}",
+            "address": f"{rng.randint(1, 999)}, {rng.choice(STREETS)}, {city}",
+            "pincode": f"{pin_prefix}{rng.randint(0, 999):03d}",
+            "mobile_number": f"{rng.choice('6789')}{rng.randint(0, 999999999):09d}",
+            "event_date": (created_at - timedelta(days=rng.randint(0, 60))).date(),
+            "query": rng.choice(QUERIES),
+            "status": rng.choice(STATUSES),
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+
+def comment_rows(ticket_ids: range, per_ticket: float, rng: random.Random, end: datetime) -> Iterator[Dict]:
+    for ticket_id in ticket_ids:
+        count = int(per_ticket) + (1 if rng.random() < per_ticket % 1 else 0)
+        for _ in range(count):
+            yield {
+                "ticket_id": ticket_id,
+                "author_name": rng.choice(AGENTS),
+                "comment_text": rng.choice(COMMENTS),
+                "created_at": end - timedelta(seconds=rng.randint(0, 730 * 86400)),
+            }
+
+
+def insert_batched(engine: Engine, table, rows: Iterator[Dict], batch_size: int) -> int:
+    total = 0
+    batch: List[Dict] = []
+    with engine.begin() as conn:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.execute(insert(table), batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            conn.execute(insert(table), batch)
+            total += len(batch)
+    return total
+
+
+def fast_sqlite_writes(engine: Engine):
+    """Seeding only: trade durability for speed on SQLite"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.close()
+
+
+def seed(
+    engine: Engine,
+    rows: int,
+    comments_per_ticket: float = 2.0,
+    seed_value: int = 42,
+    batch_size: int = 10_000,
+) -> Dict:
+    """Create the schema and fill an empty database with `rows` tickets plus comments"""
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed_value)
+    end = datetime.utcnow().replace(microsecond=0)
+
+    with engine.connect() as conn:
+        first_id = (conn.execute(select(func.max(Ticket.id))).scalar() or 0) + 1
+
+    start = time.perf_counter()
+    tickets = insert_batched(engine, Ticket.__table__, ticket_rows(rows, rng, end), batch_size)
+    comments = insert_batched(
+        engine,
+        Comment.__table__,
+        comment_rows(range(first_id, first_id + tickets), comments_per_ticket, rng, end),
+        batch_size,
+    )
+    return {"tickets": tickets, "comments": comments, "seconds": round(time.perf_counter() - start, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="Tickets to generate (10k - 10M)")
+    parser.add_argument("--comments-per-ticket", type=float, default=2.0)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    fast_sqlite_writes(engine)
+    result = seed(engine, args.rows, args.comments_per_ticket, args.seed, args.batch_size)
+    print(f"Inserted {result['tickets']} tickets and {result['comments']} comments in {result['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()